@@ -0,0 +1,177 @@
+"""
+Benchmarks for the simulator and agent hot paths, with JSON baselines and a regression gate.
+
+    python -m benchmarks.bench                          # run and print
+    python -m benchmarks.bench --save benchmarks/baseline.json
+    python -m benchmarks.bench --compare benchmarks/baseline.json --threshold 0.25
+
+--compare exits with status 1 if any benchmark is worse than its baseline by more than
+the threshold (relative). Each benchmark reports its best of --repeat runs.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from src.simulator.distributions import LogNormal
+from src.simulator.env import DreamEnv
+from src.simulator.q_agent import QLearningAgent
+from src.simulator.queue_model import SpeculativeServer
+
+BENCHMARKS = {}
+
+
+def benchmark(name, unit, higher_is_better):
+    def register(fn):
+        BENCHMARKS[name] = (fn, unit, higher_is_better)
+        return fn
+    return register
+
+
+def _server_events_per_sec(load, horizon=20000.0, dt=1.0):
+    server = SpeculativeServer(mu=1.0, lam=load, tau=1.0, seed=0)
+    t0 = time.perf_counter()
+    while server.time < horizon:
+        server.step(dt)
+    wall = time.perf_counter() - t0
+    return (2 * server.completions + server.q_len) / wall  # arrivals + completions
+
+
+for _load in (0.3, 0.7, 0.95):
+    benchmark(f"server_step_events_per_sec[lam/mu={_load}]", "events/s", True)(
+        lambda load=_load: _server_events_per_sec(load))
+
+
+def _per_call_us(fn, calls):
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return 1e6 * (time.perf_counter() - t0) / calls
+
+
+@benchmark("estimate_rho_tau_cached_us", "us/call", False)
+def bench_rho_cached():
+    server = SpeculativeServer(mu=1.0, lam=0.7, tau=1.0)
+    return _per_call_us(server.estimate_rho_tau, 20000)
+
+
+@benchmark("estimate_rho_tau_cold_us[exponential]", "us/call", False)
+def bench_rho_cold():
+    server = SpeculativeServer(mu=1.0, lam=0.7, tau=1.0)
+
+    def cold():
+        server.invalidate_rho_cache()
+        server.estimate_rho_tau()
+    return _per_call_us(cold, 5000)
+
+
+@benchmark("estimate_rho_tau_cold_us[lognormal]", "us/call", False)
+def bench_rho_cold_quad():
+    server = SpeculativeServer(mu=1.0, lam=0.7, tau=1.0, service=LogNormal(0.0, 1.0))
+
+    def cold():
+        server.invalidate_rho_cache()
+        server.estimate_rho_tau()
+    return _per_call_us(cold, 200)
+
+
+@benchmark("metrics_us", "us/call", False)
+def bench_metrics():
+    server = SpeculativeServer(mu=1.0, lam=0.7, tau=1.0, seed=0)
+    server.run_until(20000.0)
+    return _per_call_us(server.metrics, 2000)
+
+
+@benchmark("dream_env_q_agent_steps_per_sec", "steps/s", True)
+def bench_env_agent(steps=100000):
+    env = DreamEnv(seed=0)
+    agent = QLearningAgent(env.action_space, env, seed=0)
+    state = env.reset()
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        action = agent.act(state)
+        next_state, reward, done, _ = env.step(action)
+        agent.learn(state, action, reward, next_state)
+        state = env.reset() if done else next_state
+    return steps / (time.perf_counter() - t0)
+
+
+@benchmark("run_sim_comparison_secs[episodes=500]", "s", False)
+def bench_comparison(episodes=500):
+    from scripts.run_sim_comparison import run_experiment
+    from src.simulator.reactive_agent import ReactiveAgent
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = DreamEnv()
+        run_experiment(QLearningAgent(env.action_space, env), episodes)
+        run_experiment(ReactiveAgent(env.action_space), episodes)
+    return time.perf_counter() - t0
+
+
+def run(names=None, repeat=3):
+    results = {}
+    for name, (fn, unit, higher) in BENCHMARKS.items():
+        if names and not any(n in name for n in names):
+            continue
+        vals = [fn() for _ in range(repeat)]
+        results[name] = {"value": max(vals) if higher else min(vals), "unit": unit, "higher_is_better": higher}
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "system": platform.system()}
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Rows of (name, baseline, current, relative change, regressed); the change is signed
+    so that positive always means slower.
+    """
+    rows = []
+    for name, cur in results.items():
+        base = baseline.get("results", baseline).get(name)
+        if base is None:
+            continue
+        b, c = base["value"], cur["value"]
+        change = (b - c) / b if cur["higher_is_better"] else (c - b) / b
+        rows.append((name, b, c, change, change > threshold))
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--save", help="write results as a JSON baseline")
+    ap.add_argument("--compare", help="baseline JSON to gate against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", nargs="*", help="run benchmarks whose name contains any of these")
+    args = ap.parse_args(argv)
+
+    results = run(args.only, args.repeat)
+    for name, r in results.items():
+        print(f"{name:45s} {r['value']:14.2f} {r['unit']}")
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") and baseline["environment"] != environment():
+            print(f"warning: baseline recorded on {baseline['environment']}")
+        rows = compare(results, baseline, args.threshold)
+        failed = [r for r in rows if r[4]]
+        for name, b, c, change, bad in rows:
+            print(f"{'REGRESSION' if bad else 'ok':10s} {name:45s} {b:12.2f} -> {c:12.2f} ({change:+.1%} slower)")
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
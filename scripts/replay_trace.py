@@ -0,0 +1,24 @@
+import os
+import sys
+
+from src.evaluation import instrument
+from src.simulator.queue_model import SpeculativeServer
+from src.simulator.trace import TraceWorkload, replay, synthetic_trace
+
+
+if __name__ == "__main__":
+    instrument.from_env()
+    # usage: python -m scripts.replay_trace [TRACE_DIR_OR_NPY] [TAU] [BETA]
+    path = sys.argv[1] if len(sys.argv) > 1 else "outputs/trace_synthetic"
+    tau = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    beta = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    if not os.path.exists(path):
+        synthetic_trace(path, n=1_000_000, lam=1.5, mu=2.0)
+
+    workload = TraceWorkload.open(path)
+    svc_mean = float(workload.service[:min(len(workload), 1 << 20)].mean())
+    server = SpeculativeServer(mu=1.0 / svc_mean, lam=workload.rate(), tau=tau, beta=beta, workload=workload)
+    stats = replay(server, window=100.0)
+    print(f"replayed {len(workload)} jobs: {stats['events']} events in {stats['wall_secs']:.2f}s "
+          f"({stats['events_per_sec']:.0f} events/s)")
+    print(server.metrics())
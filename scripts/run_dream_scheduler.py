@@ -0,0 +1,31 @@
+import json
+import os
+
+from src.evaluation import instrument
+from src.evaluation.metrics import mttr_proxy, summarize
+from src.evaluation.sink import MetricsSink
+from src.scheduler.dream_scheduler import DreamScheduler
+from src.simulator.queue_model import SpeculativeServer
+
+
+def run(episodes=500, out_dir="outputs"):
+    server = SpeculativeServer(mu=1.0, lam=0.6, tau=0.5, beta=0.2, seed=0)
+    scheduler = DreamScheduler(server, eps=0.1, n_workers=2)
+    os.makedirs(out_dir, exist_ok=True)
+    # rows stream to history.csv in chunks; the summaries read them back chunk by chunk
+    sink = MetricsSink(os.path.join(out_dir, "history.csv"), chunk=1024, overwrite=True)
+    scheduler.run(episodes=episodes, dt=1.0, sink=sink)
+
+    _, summary = summarize(sink)
+    with open(os.path.join(out_dir, "summary.txt"), "w") as f:
+        f.write(summary.to_string())
+    with open(os.path.join(out_dir, "mttr.txt"), "w") as f:
+        f.write(f"MTTR proxy (steps): {mttr_proxy(sink):.2f}")
+
+    print(summary)
+    print(json.dumps(scheduler.report(), indent=2))
+
+
+if __name__ == "__main__":
+    instrument.from_env()  # DREAM_PROFILE=1|cprofile|sample
+    run()
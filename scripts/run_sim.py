@@ -1,4 +1,5 @@
-import matplotlib.pyplot as plt
+from src.evaluation import instrument
+from src.evaluation.sink import MetricsSink, read_column
 from src.simulator.env import DreamEnv
 from src.simulator.utils import compute_metrics
 
@@ -6,12 +7,13 @@ from src.simulator.utils import compute_metrics
 from src.simulator.q_agent import QLearningAgent
 
 
-def run_sim(episodes=20):
+def run_sim(episodes=20, out_path="outputs/run_sim_episodes.csv"):
     env = DreamEnv()
     # Instantiate the QLearningAgent, passing the environment object
     agent = QLearningAgent(env.action_space, env)
 
-    rewards, throughputs, drops = [], [], []
+    # per-episode rows are flushed to disk in chunks rather than kept in lists
+    sink = MetricsSink(out_path, chunk=256, overwrite=True)
 
     for ep in range(episodes):
         state = env.reset()
@@ -33,9 +35,8 @@ def run_sim(episodes=20):
         # Compute episode-level metrics after the episode is complete
         info = compute_metrics(env)
 
-        rewards.append(ep_reward)
-        throughputs.append(info["throughput"])
-        drops.append(info["drop_rate"])
+        sink.append({"episode": ep, "reward": ep_reward, "throughput": info["throughput"],
+                     "drop_rate": info["drop_rate"], "epsilon": agent.epsilon})
 
         # Print the progress
         print(f"[Episode {ep+1}/{episodes}] "
@@ -44,7 +45,11 @@ def run_sim(episodes=20):
               f"DropRate={info['drop_rate']:.3f}, "
               f"Epsilon={agent.epsilon:.3f}") # Print epsilon to monitor decay
 
+    sink.close()
+    rewards, throughputs, drops = (read_column(out_path, c) for c in ("reward", "throughput", "drop_rate"))
+
     # --- Plotting ---
+    import matplotlib.pyplot as plt  # headless batch runs use `python -m src.cli train` instead
     fig, axs = plt.subplots(3, 1, figsize=(8, 10))
 
     axs[0].plot(rewards, marker="o")
@@ -67,4 +72,5 @@ def run_sim(episodes=20):
 
 
 if __name__ == "__main__":
+    instrument.from_env()
     run_sim(episodes=500)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from src.experiments.cache import default_cache
+from src.experiments.sweep import dream_env_cell, grid, run_sweep, server_cell
+
+
+if __name__ == "__main__":
+    cache = default_cache()  # cells computed by an earlier sweep are not recomputed
+    # Capacity-planning sweep over the speculative server...
+    server_grid = grid(mu=[1.0], lam=[0.2, 0.4, 0.6, 0.8], tau=[0.25, 0.5, 1.0, 2.0], beta=[0.2],
+                       horizon=[2000.0])
+    records = run_sweep(server_cell, server_grid, "outputs/sweep_server.jsonl", replicates=8, cache=cache)
+    print(f"server sweep: {len(records)} cells")
+
+    # ...and over the failure dynamics of DreamEnv
+    env_grid = grid(fail_prob=[0.01, 0.05, 0.1], repair_prob=[0.1, 0.2, 0.5], max_queue=[5, 10, 20])
+    records = run_sweep(dream_env_cell, env_grid, "outputs/sweep_dream_env.jsonl", replicates=8, cache=cache)
+    print(f"DreamEnv sweep: {len(records)} cells")
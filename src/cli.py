@@ -0,0 +1,274 @@
+"""
+Headless entry point for batch runs:
+
+    python -m src.cli train --episodes 500 [--warm-start] [--plot]
+    python -m src.cli compare --episodes 500 --agents q reactive dp [--plot]
+    python -m src.cli simulate-server --episodes 500 --lam 0.6 --tau 0.5 [--plot]
+    python -m src.cli sweep --cell server --axis lam=0.2,0.4,0.6 --axis tau=0.5,1 --replicates 8
+    python -m src.cli live --duration 10 --lam 40 [--mode process]
+
+Parameters come from flags, or from --config FILE (JSON, or YAML when PyYAML is
+installed) holding either flat keys or one section per subcommand; flags win. Output
+goes to --out-dir (default outputs/) as CSV, with PNGs only when --plot is given.
+train/compare runs and sweep cells are reused from the result cache (DREAM_CACHE_DIR,
+default outputs/cache) unless --no-cache is given or DREAM_CACHE=0.
+Only this module's standard-library imports run at startup: each subcommand imports
+what it needs, and pandas/matplotlib load only for summaries and plots.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")  # never block on a display
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _save_plot(out_dir, name, series, title, ylabels):
+    plt = _pyplot()
+    fig, axs = plt.subplots(len(ylabels), 1, figsize=(9, 3 * len(ylabels)), squeeze=False)
+    for ax, ylabel in zip(axs[:, 0], ylabels):
+        for label, cols in series.items():
+            ax.plot(cols[ylabel], label=label)
+        ax.set_ylabel(ylabel)
+        ax.grid(True, linestyle="--")
+        if len(series) > 1:
+            ax.legend()
+    axs[-1, 0].set_xlabel("episode")
+    fig.suptitle(title)
+    fig.tight_layout()
+    path = os.path.join(out_dir, name)
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return path
+
+
+def _env(args):
+    from .simulator.env import DreamEnv
+    return DreamEnv(max_queue=args.max_queue, fail_prob=args.fail_prob, repair_prob=args.repair_prob,
+                    seed=args.seed)
+
+
+def _agent(kind, env, args):
+    if kind == "q":
+        from .simulator.q_agent import QLearningAgent
+        table = None
+        if getattr(args, "warm_start", False):
+            from .simulator.dp_solver import solve_q_table
+            table = solve_q_table(env, args.discount)
+        return QLearningAgent(env.action_space, env, discount_factor=args.discount, seed=args.seed, q_table=table)
+    if kind == "reactive":
+        from .simulator.reactive_agent import ReactiveAgent
+        return ReactiveAgent(env.action_space)
+    if kind == "dp":
+        from .simulator.dp_solver import DPAgent
+        return DPAgent(env.action_space, env, discount_factor=args.discount)
+    raise ValueError(f"unknown agent {kind!r}")
+
+
+def _episodes(kind, args):
+    """Run one agent, streaming per-episode rows to <out-dir>/<name>.csv; returns (path, columns)."""
+    from .evaluation.sink import MetricsSink, read_column
+    from .experiments.cache import default_cache
+    from .simulator.utils import run_experiment
+
+    env = _env(args)
+    path = os.path.join(args.out_dir, f"{args.command}_{kind}.csv")
+    sink = MetricsSink(path, chunk=1024, overwrite=True)
+    cache = default_cache() if args.cache else None
+    run_experiment(_agent(kind, env, args), args.episodes, env=env, sink=sink, verbose=False,
+                   seed=args.seed, cache=cache)
+    cols = ("reward", "throughput", "drop_rate", "mttr")
+    series = {c: read_column(path, c) for c in cols}
+    tail = max(1, args.episodes // 10)
+    print(f"{kind:9s} " + " ".join(f"{c}={series[c][-tail:].mean():.3f}" for c in cols) + f"  -> {path}")
+    return path, series
+
+
+def cmd_train(args):
+    _, series = _episodes("q", args)
+    if args.plot:
+        print(_save_plot(args.out_dir, "train.png", {"q": series}, "Q-learning on DreamEnv",
+                         ["reward", "throughput", "drop_rate"]))
+
+
+def cmd_compare(args):
+    results = {kind: _episodes(kind, args)[1] for kind in args.agents}
+    if args.plot:
+        print(_save_plot(args.out_dir, "compare.png", results, "Agent comparison on DreamEnv",
+                         ["reward", "throughput", "drop_rate", "mttr"]))
+
+
+def cmd_simulate_server(args):
+    from .evaluation.metrics import mttr_proxy, summarize
+    from .evaluation.sink import MetricsSink, read_column
+    from .scheduler.dream_scheduler import DreamScheduler
+    from .simulator.queue_model import SpeculativeServer
+
+    server = SpeculativeServer(mu=args.mu, lam=args.lam, tau=args.tau, beta=args.beta, seed=args.seed)
+    scheduler = DreamScheduler(server, eps=args.eps, n_workers=args.workers)
+    path = os.path.join(args.out_dir, "history.csv")
+    sink = MetricsSink(path, chunk=1024, overwrite=True)
+    scheduler.run(episodes=args.episodes, dt=args.dt, sink=sink)
+    if args.summary:
+        _, summary = summarize(sink)
+        with open(os.path.join(args.out_dir, "summary.txt"), "w") as f:
+            f.write(summary.to_string())
+        print(summary.to_string())
+    mttr = mttr_proxy(sink)
+    with open(os.path.join(args.out_dir, "mttr.txt"), "w") as f:
+        f.write(f"MTTR proxy (steps): {mttr:.2f}")
+    print(f"MTTR proxy (steps): {mttr:.2f}  -> {path}")
+    if args.plot:
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(9, 3))
+        ax.plot(read_column(path, "time"), read_column(path, "lat_p95"))
+        ax.set_xlabel("time")
+        ax.set_ylabel("lat_p95")
+        fig.tight_layout()
+        fig.savefig(os.path.join(args.out_dir, "p95.png"), dpi=100)
+        plt.close(fig)
+
+
+def _axis(text):
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,..., got {text!r}")
+    return name, [json.loads(v) for v in values.split(",")]
+
+
+def cmd_sweep(args):
+    from .experiments import sweep
+    from .experiments.cache import default_cache
+
+    axes = dict(args.axis or [])
+    if not axes:
+        raise SystemExit("sweep needs at least one --axis NAME=V1,V2,...")
+    cell = {"server": sweep.server_cell, "dream_env": sweep.dream_env_cell}[args.cell]
+    out = args.out or os.path.join(args.out_dir, f"sweep_{args.cell}.jsonl")
+    records = sweep.run_sweep(cell, sweep.grid(**axes), out, replicates=args.replicates,
+                              root_seed=args.seed, workers=args.workers,
+                              cache=default_cache() if args.cache else None)
+    print(f"{args.cell} sweep: {len(records)} records -> {out}")
+
+
+def cmd_live(args):
+    from .scheduler.live import LiveGateway
+
+    executor = None
+    if args.mode == "process":
+        from .scheduler.executor import DreamExecutor
+        executor = DreamExecutor(workers=args.dream_workers)
+    try:
+        gw = LiveGateway(lam=args.lam, mean_service=args.mean_service, workers=args.workers, beta=args.beta,
+                         dream_slice=args.dream_slice, mode=args.mode, executor=executor, seed=args.seed)
+        res = gw.compare(args.duration)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    path = os.path.join(args.out_dir, "live_gateway.json")
+    with open(path, "w") as f:
+        json.dump(res, f, indent=2)
+    for key in ("quiet", "dreaming"):
+        r = res[key]
+        print(f"{key:9s} p50={1e3 * r['fg_p50']:.2f}ms p99={1e3 * r['fg_p99']:.2f}ms rho={r['rho_measured']:.3f} "
+              f"(model {r['rho_predicted']:.3f}) dream_cpu={r['dream_cpu_frac']:.3f} (budget {r['budget_mean']:.3f})")
+    print(f"added p50={1e3 * res['added_p50']:.2f}ms p99={1e3 * res['added_p99']:.2f}ms  -> {path}")
+
+
+def _load_config(path):
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="python -m src.cli", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="JSON/YAML file of parameters (flags override it)")
+    common.add_argument("--out-dir", default="outputs")
+    common.add_argument("--seed", type=int, default=0)
+    common.add_argument("--plot", action="store_true", help="also write PNGs (needs matplotlib)")
+    common.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="recompute runs/cells instead of reusing the result cache (outputs/cache)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    env = argparse.ArgumentParser(add_help=False)
+    env.add_argument("--episodes", type=int, default=500)
+    env.add_argument("--max-queue", type=int, default=10)
+    env.add_argument("--fail-prob", type=float, default=0.05)
+    env.add_argument("--repair-prob", type=float, default=0.2)
+    env.add_argument("--discount", type=float, default=0.95)
+
+    p = sub.add_parser("train", parents=[common, env], help="train a Q-learning agent on DreamEnv")
+    p.add_argument("--warm-start", action="store_true", help="start from the exact DP Q-table")
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("compare", parents=[common, env], help="Q-learning vs reactive vs DP optimum")
+    p.add_argument("--agents", nargs="+", default=["q", "reactive", "dp"], choices=["q", "reactive", "dp"])
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("simulate-server", parents=[common], help="dream scheduler on a SpeculativeServer")
+    p.add_argument("--episodes", type=int, default=500, help="scheduler ticks")
+    p.add_argument("--dt", type=float, default=1.0)
+    p.add_argument("--mu", type=float, default=1.0)
+    p.add_argument("--lam", type=float, default=0.6)
+    p.add_argument("--tau", type=float, default=0.5)
+    p.add_argument("--beta", type=float, default=0.2)
+    p.add_argument("--eps", type=float, default=0.1)
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--no-summary", dest="summary", action="store_false",
+                   help="skip summary.txt (avoids loading pandas)")
+    p.set_defaults(func=cmd_simulate_server)
+
+    p = sub.add_parser("sweep", parents=[common], help="resumable parameter sweep over a process pool")
+    p.add_argument("--cell", choices=["server", "dream_env"], default="server")
+    p.add_argument("--axis", type=_axis, action="append", help="NAME=V1,V2,... (repeatable)")
+    p.add_argument("--replicates", type=int, default=1)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--out", help="JSONL results file (default <out-dir>/sweep_<cell>.jsonl)")
+    p.set_defaults(func=cmd_sweep)
+    p = sub.add_parser("live", parents=[common], help="asyncio gateway: real foreground p50/p99 with and without dreams")
+    p.add_argument("--duration", type=float, default=10.0, help="seconds per run (two runs)")
+    p.add_argument("--lam", type=float, default=40.0, help="foreground requests per second")
+    p.add_argument("--mean-service", type=float, default=0.02, help="seconds")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--beta", type=float, default=0.2)
+    p.add_argument("--dream-slice", type=float, default=0.002, help="coroutine mode: seconds per dream slice")
+    p.add_argument("--mode", choices=["coroutine", "process"], default="coroutine")
+    p.add_argument("--dream-workers", type=int, default=1, help="process mode: executor workers")
+    p.set_defaults(func=cmd_live)
+    ap.subcommands = sub.choices
+    return ap
+
+
+def main(argv=None):
+    t0 = time.perf_counter()
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if args.config:
+        conf = _load_config(args.config)
+        conf = {**{k: v for k, v in conf.items() if not isinstance(v, dict)}, **conf.get(args.command, {})}
+        if "axis" in conf and isinstance(conf["axis"], dict):
+            conf["axis"] = list(conf["axis"].items())
+        ap.subcommands[args.command].set_defaults(**{k.replace("-", "_"): v for k, v in conf.items()})
+        args = ap.parse_args(argv)
+
+    from .evaluation import instrument
+    instrument.from_env(prefix=f"profile_{args.command}")
+    os.makedirs(args.out_dir, exist_ok=True)
+    args.func(args)
+    print(f"done in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Opt-in hot-path instrumentation: per-phase timers and counters, plus optional cProfile or
+sampling profiles, exported as JSON/CSV next to the other run outputs.
+
+Nothing in the simulator calls into this module. enable() wraps the methods listed in
+PHASES with timing shims and disable() puts the originals back, so a run that never
+enables it pays nothing. Scripts opt in through the environment:
+
+    DREAM_PROFILE=1 python scripts/run_dream_scheduler.py          # phase timers
+    DREAM_PROFILE=cprofile python scripts/run_sim_comparison.py    # + cProfile
+    DREAM_PROFILE=sample python scripts/replay_trace.py            # + stack sampler
+
+Phase times are inclusive: server.step contains server.drain, which contains
+server.arrivals. `items` counts the work a phase did (arrivals generated, jobs
+completed) where that is cheap to read off; `calls` is always recorded.
+"""
+import atexit
+import cProfile
+import csv
+import importlib
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ENV_VAR = "DREAM_PROFILE"
+DIR_VAR = "DREAM_PROFILE_DIR"
+MODES = ("timers", "cprofile", "sample")
+
+
+def _completions(server):
+    return server.completions
+
+
+def _bulk_size(server, out):
+    return out.shape[1]
+
+
+# phase -> (module, "Class.method", items); items is ("delta", f(obj)) for a counter read
+# before and after the call, or ("result", f(obj, result)).
+PHASES = {
+    "server.step": ("src.simulator.queue_model", "SpeculativeServer.step", ("delta", _completions)),
+    "server.arrivals": ("src.simulator.queue_model", "SpeculativeServer._bulk_arrivals", ("result", _bulk_size)),
+    "server.drain": ("src.simulator.queue_model", "SpeculativeServer._drain_window", ("delta", _completions)),
+    "server.event": ("src.simulator.queue_model", "SpeculativeServer._handle", None),
+    "server.budget": ("src.simulator.queue_model", "SpeculativeServer.idle_budget", None),
+    "server.metrics": ("src.simulator.queue_model", "SpeculativeServer.metrics", None),
+    "cluster.step": ("src.simulator.cluster", "SpeculativeCluster.step", None),
+    "env.step": ("src.simulator.env", "DreamEnv.step", None),
+    "vec_env.step": ("src.simulator.vec_env", "VecDreamEnv.step", None),
+    "agent.act": ("src.simulator.q_agent", "QLearningAgent.act", None),
+    "agent.learn": ("src.simulator.q_agent", "QLearningAgent.learn", None),
+    "agent.act_batch": ("src.simulator.q_agent", "QLearningAgent.act_batch", None),
+    "agent.learn_batch": ("src.simulator.q_agent", "QLearningAgent.learn_batch", None),
+    "reactive.act": ("src.simulator.reactive_agent", "ReactiveAgent.act", None),
+    "scheduler.tick": ("src.scheduler.dream_scheduler", "DreamScheduler.tick", None),
+    "scheduler.pack": ("src.scheduler.dream_scheduler", "DreamScheduler._pack", None),
+    "scheduler.dispatch": ("src.scheduler.dream_scheduler", "DreamScheduler._dispatch", None),
+    "scheduler.select": ("src.scheduler.dream_scheduler", "DreamScheduler._select", None),
+    "tuner.window": ("src.scheduler.tuner", "TauTuner.step_window", None),
+}
+
+
+class _State:
+    mode = None
+    last_mode = None  # kept after disable() for export
+    stats = {}        # phase -> [calls, total_ns, max_ns, items]
+    patched = []      # (cls, attr, original)
+    profiler = None
+    sampler = None
+
+
+def _timed(phase, fn, items):
+    rec = _State.stats.setdefault(phase, [0, 0, 0, 0])
+    clock = time.perf_counter_ns
+    kind, count = items if items else (None, None)
+
+    def wrapper(self, *args, **kwargs):
+        before = count(self) if kind == "delta" else 0
+        t0 = clock()
+        out = fn(self, *args, **kwargs)
+        dt = clock() - t0
+        rec[0] += 1
+        rec[1] += dt
+        if dt > rec[2]:
+            rec[2] = dt
+        if kind == "delta":
+            rec[3] += count(self) - before
+        elif kind == "result":
+            rec[3] += count(self, out)
+        return out
+    wrapper.__wrapped__ = fn
+    wrapper.__name__ = fn.__name__
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+class _Sampler(threading.Thread):
+    """Every `interval` seconds, records the target thread's stack: leaf and inclusive hits per function."""
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.leaf = {}
+        self.inclusive = {}
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            leaf = True
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                if leaf:
+                    self.leaf[key] = self.leaf.get(key, 0) + 1
+                    leaf = False
+                if key not in seen:
+                    seen.add(key)
+                    self.inclusive[key] = self.inclusive.get(key, 0) + 1
+                frame = frame.f_back
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+def enabled():
+    return _State.mode is not None
+
+
+def enable(mode="timers", phases=None, interval=0.001):
+    """
+    Install the phase timers (all of PHASES, or the named subset). mode "cprofile" also
+    runs cProfile over the calling thread; "sample" starts a stack sampler thread.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    disable()
+    _State.profiler = _State.sampler = None
+    for phase in phases or PHASES:
+        module, attr, items = PHASES[phase]
+        cls_name, meth = attr.split(".")
+        cls = getattr(importlib.import_module(module), cls_name)
+        orig = cls.__dict__[meth]
+        _State.patched.append((cls, meth, orig))
+        setattr(cls, meth, _timed(phase, orig, items))
+    _State.mode = _State.last_mode = mode
+    if mode == "cprofile":
+        _State.profiler = cProfile.Profile()
+        _State.profiler.enable()
+    elif mode == "sample":
+        _State.sampler = _Sampler(threading.get_ident(), interval)
+        _State.sampler.start()
+
+
+def disable():
+    """Restore the original methods and stop any profiler; collected stats are kept."""
+    for cls, meth, orig in reversed(_State.patched):
+        setattr(cls, meth, orig)
+    _State.patched = []
+    if _State.profiler is not None:
+        _State.profiler.disable()
+    if _State.sampler is not None and _State.sampler.is_alive():
+        _State.sampler.stop()
+    _State.mode = None
+
+
+def reset():
+    """Zero the phase stats and restart a running cProfile."""
+    for rec in _State.stats.values():
+        rec[:] = [0, 0, 0, 0]
+    if _State.mode == "cprofile":
+        _State.profiler.disable()
+        _State.profiler = cProfile.Profile()
+        _State.profiler.enable()
+
+
+@contextmanager
+def section(name):
+    """Time an ad-hoc block under `name` (e.g. a script's setup); a no-op unless enabled."""
+    if _State.mode is None:
+        yield
+        return
+    rec = _State.stats.setdefault(name, [0, 0, 0, 0])
+    t0 = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter_ns() - t0
+        rec[0] += 1
+        rec[1] += dt
+        rec[2] = max(rec[2], dt)
+
+
+def count(name, n=1):
+    """Bump a plain counter (reported as items with no calls); a no-op unless enabled."""
+    if _State.mode is not None:
+        _State.stats.setdefault(name, [0, 0, 0, 0])[3] += n
+
+
+def stats():
+    """phase -> {calls, total_s, mean_us, max_us, items} for every phase seen so far."""
+    return {
+        phase: {
+            "calls": calls,
+            "total_s": total / 1e9,
+            "mean_us": total / 1e3 / calls if calls else 0.0,
+            "max_us": mx / 1e3,
+            "items": items,
+        }
+        for phase, (calls, total, mx, items) in _State.stats.items()
+        if calls or items
+    }
+
+
+def export(out_dir="outputs", prefix="profile", top=40):
+    """
+    Write <prefix>_phases.json/.csv, plus <prefix>.pstats and <prefix>_cprofile.txt for
+    cProfile or <prefix>_samples.csv for the sampler. Returns the written paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, prefix)
+    rows = stats()
+    paths = [base + "_phases.json", base + "_phases.csv"]
+    with open(paths[0], "w") as f:
+        json.dump({"mode": _State.last_mode, "phases": rows}, f, indent=2)
+    with open(paths[1], "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["phase", "calls", "total_s", "mean_us", "max_us", "items"])
+        for phase, r in sorted(rows.items(), key=lambda kv: -kv[1]["total_s"]):
+            w.writerow([phase, r["calls"], r["total_s"], r["mean_us"], r["max_us"], r["items"]])
+    if _State.profiler is not None:
+        _State.profiler.dump_stats(base + ".pstats")
+        buf = io.StringIO()
+        pstats.Stats(_State.profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+        with open(base + "_cprofile.txt", "w") as f:
+            f.write(buf.getvalue())
+        paths += [base + ".pstats", base + "_cprofile.txt"]
+    if _State.sampler is not None:
+        s = _State.sampler
+        with open(base + "_samples.csv", "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["function", "leaf", "inclusive", "inclusive_frac"])
+            for key, inc in sorted(s.inclusive.items(), key=lambda kv: -kv[1]):
+                w.writerow([key, s.leaf.get(key, 0), inc, inc / max(1, s.samples)])
+        paths.append(base + "_samples.csv")
+    return paths
+
+
+def from_env(prefix="profile"):
+    """
+    Enable instrumentation if DREAM_PROFILE is set (1/timers, cprofile or sample) and
+    export to DREAM_PROFILE_DIR (default outputs/) at interpreter exit. Returns the mode.
+    """
+    mode = os.environ.get(ENV_VAR, "").strip().lower()
+    if mode in ("", "0", "off", "false"):
+        return None
+    mode = "timers" if mode in ("1", "on", "true") else mode
+    enable(mode)
+    out_dir = os.environ.get(DIR_VAR, "outputs")
+
+    def _finish():
+        disable()
+        for p in export(out_dir, prefix):
+            print(f"profile: wrote {p}", file=sys.stderr)
+    atexit.register(_finish)
+    return mode
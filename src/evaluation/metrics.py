@@ -1,27 +1,118 @@
 import numpy as np
-import pandas as pd
+
+from .sink import in_memory, iter_chunks
+from .sketch import DDSketch
+
+SUMMARY_COLS = ["lat_p50","lat_p95","lat_p99","rho_tau_est","idle_budget","dream_cpu_secs","reward"]
+MEDIAN_ACCURACY = 1e-3  # relative error of streamed medians (in-memory history is exact)
+
+class _ExactMedian:
+    """np.nanmedian over the chunks seen; for in-memory history, which is one chunk anyway."""
+    def __init__(self):
+        self.parts = []
+
+    def add(self, x):
+        self.parts.append(np.asarray(x, dtype=float))
+
+    def value(self):
+        return float(np.nanmedian(np.concatenate(self.parts))) if self.parts else np.nan
+
+class _StreamingMedian:
+    """NaN-skipping median over chunks: DDSketches of the values >= 0 and of minus the negative ones."""
+    def __init__(self):
+        self.pos = DDSketch(MEDIAN_ACCURACY, max_buckets=1 << 14)
+        self.neg = DDSketch(MEDIAN_ACCURACY, max_buckets=1 << 14)
+
+    def add(self, x):
+        x = x[~np.isnan(x)]
+        self.pos.add_batch(x[x >= 0])
+        self.neg.add_batch(-x[x < 0])
+
+    def _kth(self, k):
+        n_neg = self.neg.count
+        if k < n_neg:  # the k-th smallest x is the (n_neg-1-k)-th smallest of -x
+            return -self.neg.quantile((n_neg - 1 - k) / max(n_neg - 1, 1))
+        return self.pos.quantile((k - n_neg) / max(self.pos.count - 1, 1))
+
+    def value(self):
+        n = self.neg.count + self.pos.count
+        if not n:
+            return np.nan
+        return 0.5 * (self._kth((n - 1) // 2) + self._kth(n // 2))  # middle pair averaged, as pandas does
+
+def _median_of(source):
+    return _ExactMedian() if in_memory(source) else _StreamingMedian()
+
+def _median(source, col):
+    med = _median_of(source)
+    for ch in iter_chunks(source, [col]):
+        med.add(np.asarray(ch[col], dtype=float))
+    return med.value()
 
 def summarize(history):
-    df = pd.DataFrame(history)
-    cols = ["lat_p50","lat_p95","lat_p99","rho_tau_est","idle_budget","dream_cpu_secs","reward"]
-    summary = df[cols].describe().loc[["mean","50%","max","min"]]
-    return df, summary
+    """
+    (df, summary) for an in-memory list of records. A MetricsSink, sink directory or CSV
+    is summarized by streaming over its chunks instead and df is None.
+    """
+    if isinstance(history, (list, tuple)):
+        import pandas as pd  # loaded on first use so headless runs start fast
+        df = pd.DataFrame(history)
+        summary = df[SUMMARY_COLS].describe().loc[["mean","50%","max","min"]]
+        return df, summary
+    return None, summarize_stream(history)
+
+def summarize_stream(source, cols=SUMMARY_COLS):
+    # same rows as DataFrame.describe(), all NaN-skipping and accumulated per chunk in
+    # bounded memory; the median of stored history is a sketch estimate within
+    # MEDIAN_ACCURACY (relative), that of a DataFrame or record list is exact
+    n = np.zeros(len(cols))
+    total = np.zeros(len(cols))
+    hi = np.full(len(cols), -np.inf)
+    lo = np.full(len(cols), np.inf)
+    meds = [_median_of(source) for _ in cols]
+    for ch in iter_chunks(source, cols):
+        for j, c in enumerate(cols):
+            meds[j].add(ch[c])
+            x = ch[c][~np.isnan(ch[c])]
+            if len(x):
+                n[j] += len(x)
+                total[j] += x.sum()
+                hi[j] = max(hi[j], x.max())
+                lo[j] = min(lo[j], x.min())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, total / n, np.nan)
+    med = [m.value() for m in meds]
+    hi[n == 0] = np.nan
+    lo[n == 0] = np.nan
+    import pandas as pd
+    return pd.DataFrame([mean, med, hi, lo], index=["mean","50%","max","min"], columns=cols)
 
 def mttr_proxy(df):
-    # naive: spikes in lat_p95 considered incidents; measure decay length back to median
-    lat = df["lat_p95"].values
-    med = np.nanmedian(lat)
+    # naive: spikes in lat_p95 considered incidents; measure decay length back to median.
+    # df may be a DataFrame or any sink source; two streaming passes: the median, then
+    # runs counted chunk by chunk, carrying a run that reaches the end of a chunk.
+    med = _median(df, "lat_p95")
     thr = med * 1.5
     mttrs = []
-    i = 0
-    n = len(lat)
-    while i < n:
-        if lat[i] > thr:
-            start = i
-            while i < n and lat[i] > thr:
-                i += 1
-            end = i
-            mttrs.append(end - start)
-        else:
-            i += 1
+    carry = 0
+    for ch in iter_chunks(df, ["lat_p95"]):
+        above = ch["lat_p95"] > thr
+        if not above.any():
+            if carry:
+                mttrs.append(carry)
+            carry = 0
+            continue
+        d = np.diff(np.concatenate(([0], above.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(d == 1), np.flatnonzero(d == -1)
+        lens = (ends - starts).tolist()
+        if starts[0] == 0:
+            lens[0] += carry
+        elif carry:
+            mttrs.append(carry)
+        carry = 0
+        if ends[-1] == len(above):
+            carry = lens.pop()
+        mttrs.extend(lens)
+    if carry:
+        mttrs.append(carry)
     return float(np.mean(mttrs)) if mttrs else 0.0
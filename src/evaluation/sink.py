@@ -0,0 +1,187 @@
+import csv
+import glob
+import json
+import os
+
+import numpy as np
+
+
+class MetricsSink:
+    """
+    Append-only columnar metrics store for long runs.
+
+    Records (flat dicts of numbers) go into preallocated per-column NumPy buffers of
+    `chunk` rows; a full buffer is flushed as one chunk, so memory stays at one chunk no
+    matter how long the run is and a crash loses at most the unflushed rows. The schema
+    (column names and dtypes) is fixed by the first record or by `columns`; an integer
+    column that later receives a non-integral value is widened to float64.
+
+    fmt="npz": `path` is a directory holding schema.json and chunk_000000.npz, ...;
+               each chunk is written to a temp file and renamed into place.
+    fmt="csv": `path` is one CSV file; each flush appends its rows.
+    Reopening an existing path appends after what is already there unless overwrite.
+    """
+    def __init__(self, path: str, columns=None, chunk: int=4096, fmt: str=None, overwrite: bool=False):
+        self.path = path
+        self.fmt = fmt or ("csv" if path.endswith(".csv") else "npz")
+        assert self.fmt in ("npz", "csv")
+        if overwrite:
+            stale = _chunk_files(path) + [os.path.join(path, "schema.json")] if os.path.isdir(path) else [path]
+            for f in stale:
+                if os.path.exists(f):
+                    os.remove(f)
+        self.chunk = chunk
+        self.columns = None
+        self._buf = None
+        self._n = 0
+        self.rows_flushed = 0
+        self._next_chunk = 0
+        if self.fmt == "npz":
+            os.makedirs(path, exist_ok=True)
+            self._next_chunk = len(_chunk_files(path))
+            schema = os.path.join(path, "schema.json")
+            if os.path.exists(schema):
+                with open(schema) as f:
+                    columns = json.load(f)["columns"]
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.fmt == "csv" and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline="") as f:
+                rows = csv.reader(f)
+                names, first = next(rows), next(rows, [])
+            columns = {c: "int64" if v.lstrip("-").isdigit() else "float64"
+                       for c, v in zip(names, first or ["nan"] * len(names))}
+        if columns is not None:
+            self._set_schema(columns)
+
+    def _set_schema(self, columns):
+        if not isinstance(columns, dict):
+            columns = {c: "float64" for c in columns}
+        self.columns = {c: np.dtype(t).str for c, t in columns.items()}
+        self._buf = {c: np.empty(self.chunk, dtype=t) for c, t in self.columns.items()}
+        if self.fmt == "npz":
+            with open(os.path.join(self.path, "schema.json"), "w") as f:
+                json.dump({"columns": self.columns, "chunk": self.chunk}, f)
+
+    def _widen(self, c):
+        self.columns[c] = np.dtype(np.float64).str
+        self._buf[c] = self._buf[c].astype(np.float64)
+        if self.fmt == "npz":
+            with open(os.path.join(self.path, "schema.json"), "w") as f:
+                json.dump({"columns": self.columns, "chunk": self.chunk}, f)
+        return self._buf[c]
+
+    def append(self, record: dict):
+        if self.columns is None:
+            self._set_schema({c: np.int64 if isinstance(v, (bool, int, np.integer)) else np.float64
+                              for c, v in record.items()})
+        i = self._n
+        for c, buf in self._buf.items():
+            v = record.get(c, np.nan)
+            if buf.dtype.kind == "i" and not float(v).is_integer():
+                buf = self._widen(c)  # an int column got a float (or a missing value)
+            buf[i] = v
+        self._n = i + 1
+        if self._n == self.chunk:
+            self.flush()
+
+    def extend(self, records):
+        for r in records:
+            self.append(r)
+
+    def flush(self):
+        n = self._n
+        if not n:
+            return
+        cols = {c: buf[:n] for c, buf in self._buf.items()}
+        if self.fmt == "npz":
+            final = os.path.join(self.path, f"chunk_{self._next_chunk:06d}.npz")
+            tmp = final + ".tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, **cols)
+            os.replace(tmp, final)
+            self._next_chunk += 1
+        else:
+            header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            # plain csv keeps pandas off the write path; NaN is written as an empty field
+            text = [["" if v != v else v for v in col.tolist()] for col in cols.values()]
+            with open(self.path, "a", newline="") as f:
+                w = csv.writer(f)
+                if header:
+                    w.writerow(cols)
+                w.writerows(zip(*text))
+        self.rows_flushed += n
+        self._n = 0
+
+    def close(self):
+        self.flush()
+
+    def __len__(self):
+        return self.rows_flushed + self._n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def chunks(self, columns=None):
+        """Flush, then iterate the stored chunks (see iter_chunks)."""
+        self.flush()
+        return iter_chunks(self.path, columns)
+
+
+def _chunk_files(path):
+    return sorted(glob.glob(os.path.join(path, "chunk_*.npz")))
+
+
+def in_memory(source):
+    """True for history already in memory (a DataFrame or a list of record dicts)."""
+    return isinstance(source, (list, tuple)) or (hasattr(source, "columns") and hasattr(source, "to_numpy"))
+
+
+def iter_chunks(source, columns=None, chunk: int=4096):
+    """
+    Yield {column: array} per stored chunk of a sink directory or CSV (only the requested
+    columns are read). A MetricsSink is flushed first; a DataFrame or a list of record
+    dicts is yielded as one chunk, so the streaming summaries also take in-memory history.
+    """
+    if isinstance(source, MetricsSink):
+        yield from source.chunks(columns)
+        return
+    if hasattr(source, "columns") and hasattr(source, "to_numpy"):  # a DataFrame
+        yield {c: source[c].to_numpy() for c in (columns or source.columns)}
+        return
+    if isinstance(source, (list, tuple)):
+        keys = columns or (list(source[0]) if source else [])
+        yield {c: np.array([r.get(c, np.nan) for r in source], dtype=float) for c in keys}
+        return
+    if os.path.isdir(source):
+        for fname in _chunk_files(source):
+            with np.load(fname) as z:
+                yield {c: z[c] for c in (columns or z.files)}
+        return
+    if not os.path.exists(source):  # a CSV sink that has not flushed yet
+        return
+    with open(source, newline="") as f:
+        rows = csv.reader(f)
+        names = next(rows, [])
+        pick = [names.index(c) for c in (columns or names)]
+        while True:
+            block = [r for _, r in zip(range(chunk), rows)]
+            if not block:
+                return
+            yield {names[j]: np.array([float(r[j]) if r[j] else np.nan for r in block]) for j in pick}
+
+
+def read_column(source, name):
+    """One column over all chunks, concatenated."""
+    parts = [ch[name] for ch in iter_chunks(source, [name])]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def load(source):
+    """Every chunk as one DataFrame (for small runs and plotting)."""
+    import pandas as pd
+    frames = [pd.DataFrame(ch) for ch in iter_chunks(source)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,219 @@
+import math
+from collections import deque
+
+import numpy as np
+
+
+class DDSketch:
+    """
+    Streaming quantile sketch with relative-error guarantees (DDSketch).
+    Values land in logarithmic buckets of ratio γ = (1+α)/(1-α), so any quantile is
+    returned within a factor α of the true value. Inserts are O(1), memory is capped at
+    max_buckets (the lowest buckets are collapsed first), and sketches with the same α
+    merge exactly by adding bucket counts.
+    """
+    def __init__(self, relative_accuracy: float=0.01, max_buckets: int=2048, min_value: float=1e-9):
+        assert 0 < relative_accuracy < 1
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.max_buckets = max_buckets
+        self.min_value = min_value  # values at or below this are counted as zero
+        self._inv_log_gamma = 1.0 / math.log(self.gamma)
+        self._counts = np.zeros(0, dtype=np.int64)  # dense bucket counts for keys offset..
+        self._offset = 0
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def _ensure(self, lo, hi):
+        n = len(self._counts)
+        if n == 0:
+            self._offset = lo
+            self._counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        elif lo < self._offset or hi >= self._offset + n:
+            # grow with slack so a drifting distribution does not reallocate every insert
+            new_lo = min(lo, self._offset - (32 if lo < self._offset else 0))
+            new_hi = max(hi, self._offset + n - 1 + (32 if hi >= self._offset + n else 0))
+            counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            counts[self._offset - new_lo:self._offset - new_lo + n] = self._counts
+            self._counts = counts
+            self._offset = new_lo
+        excess = len(self._counts) - self.max_buckets
+        if excess > 0:
+            self._counts[excess] += self._counts[:excess].sum()
+            self._counts = self._counts[excess:].copy()
+            self._offset += excess
+
+    def add(self, x: float):
+        self.count += 1
+        self.sum += x
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if x <= self.min_value:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(x) * self._inv_log_gamma)
+        i = key - self._offset
+        if not 0 <= i < len(self._counts):
+            self._ensure(key, key)
+            i = key - self._offset
+        self._counts[max(i, 0)] += 1
+
+    def add_batch(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        if xs.size == 0:
+            return
+        self.count += xs.size
+        self.sum += float(xs.sum())
+        self.min = min(self.min, float(xs.min()))
+        self.max = max(self.max, float(xs.max()))
+        pos = xs > self.min_value
+        self.zero_count += int(xs.size - pos.sum())
+        if not pos.any():
+            return
+        keys = np.ceil(np.log(xs[pos]) * self._inv_log_gamma).astype(np.int64)
+        self._ensure(int(keys.min()), int(keys.max()))
+        idx = np.maximum(keys - self._offset, 0)
+        self._counts += np.bincount(idx, minlength=len(self._counts))
+
+    def merge(self, other: "DDSketch"):
+        assert other.gamma == self.gamma, "can only merge sketches with the same accuracy"
+        if other.count == 0:
+            return self
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        if len(other._counts):
+            self._ensure(other._offset, other._offset + len(other._counts) - 1)
+            start = max(other._offset - self._offset, 0)
+            folded = other._counts
+            if other._offset < self._offset:  # our low end was collapsed; fold theirs too
+                cut = self._offset - other._offset
+                folded = np.concatenate(([other._counts[:cut + 1].sum()], other._counts[cut + 1:]))
+            self._counts[start:start + len(folded)] += folded
+        return self
+
+    def quantiles(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        ranks = qs * (self.count - 1)
+        cum = np.cumsum(self._counts)
+        idx = np.searchsorted(cum, ranks - self.zero_count, side="right")
+        idx = np.minimum(idx, max(len(cum) - 1, 0))
+        vals = 2.0 * self.gamma ** (self._offset + idx) / (self.gamma + 1.0)
+        vals = np.where(ranks < self.zero_count, 0.0, vals)
+        return np.clip(vals, self.min, self.max)
+
+    def quantile(self, q: float):
+        return float(self.quantiles([q])[0])
+
+
+class ExactQuantiles:
+    """
+    Unbounded reference implementation with the same interface as DDSketch
+    (keeps every value; use it to validate sketches, not for long runs).
+    """
+    def __init__(self):
+        self._chunks = []
+        self.count = 0
+        self.sum = 0.0
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def add(self, x: float):
+        self.add_batch([x])
+
+    def add_batch(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        self._chunks.append(xs)
+        self.count += xs.size
+        self.sum += float(xs.sum())
+
+    def merge(self, other: "ExactQuantiles"):
+        self._chunks.extend(other._chunks)
+        self.count += other.count
+        self.sum += other.sum
+        return self
+
+    def quantiles(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        return np.percentile(np.concatenate(self._chunks), qs * 100)
+
+    def quantile(self, q: float):
+        return float(self.quantiles([q])[0])
+
+
+class SlidingWindowSketch:
+    """
+    Quantiles over the last `window` seconds of simulated time. The window is split into
+    `slices` sub-sketches that are retired as time moves on, so memory stays bounded and
+    the window edge is accurate to window/slices.
+    """
+    def __init__(self, window: float=60.0, slices: int=6, factory=DDSketch):
+        assert window > 0 and slices > 0
+        self.window = window
+        self.slices = slices
+        self.factory = factory
+        self._slice_len = window / slices
+        self._ring = deque()  # (slice_index, sketch), oldest first
+
+    @property
+    def span(self):
+        """Longest lookback that merged(t, since=t - span) still reads in full."""
+        return self.window - self._slice_len
+
+    def _retire(self, idx):
+        while self._ring and self._ring[0][0] <= idx - self.slices:
+            self._ring.popleft()
+
+    def _current(self, t):
+        idx = int(t // self._slice_len)
+        if not self._ring or self._ring[-1][0] != idx:
+            self._retire(idx)
+            self._ring.append((idx, self.factory()))
+        return self._ring[-1][1]
+
+    def add(self, x: float, t: float):
+        self._current(t).add(x)
+
+    def add_batch(self, xs, t):
+        """t: one time for the whole batch, or each value's own (non-decreasing) time."""
+        if np.ndim(t) == 0:
+            self._current(t).add_batch(xs)
+            return
+        xs, t = np.asarray(xs, dtype=float), np.asarray(t, dtype=float)
+        idx = np.floor(t / self._slice_len).astype(np.int64)
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(idx)) + 1, [len(xs)]))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi > lo:
+                self._current(t[lo]).add_batch(xs[lo:hi])
+
+    def merged(self, t: float=None, since: float=None):
+        """
+        One sketch covering the live window (ending at t if given), or only its slices
+        from `since` on (accurate to one slice).
+        """
+        if t is not None:
+            self._retire(int(t // self._slice_len))
+        first = -np.inf if since is None else int(since // self._slice_len)
+        out = self.factory()
+        for idx, sk in self._ring:
+            if idx >= first:
+                out.merge(sk)
+        return out
+
+    def quantiles(self, qs, t: float=None, since: float=None):
+        return self.merged(t, since).quantiles(qs)
@@ -0,0 +1,215 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import random
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+DEFAULT_DIR = "outputs/cache"
+DEFAULT_MAX_BYTES = 512 * 2**20
+
+_CODE_VERSION = None
+_RNG_TYPES = (random.Random, np.random.Generator)
+_PLAIN_TYPES = (bool, int, float, str, bytes, type(None), np.ndarray, np.generic)
+
+
+def code_version():
+    """sha256 over the source of the src/ package, so any code change invalidates old entries."""
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        h = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(root, "**", "*.py"), recursive=True)):
+            h.update(os.path.relpath(path, root).encode())
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _CODE_VERSION = h.hexdigest()
+    return _CODE_VERSION
+
+
+def _jsonable(x):
+    if isinstance(x, np.ndarray):
+        return {"ndarray": hashlib.sha256(np.ascontiguousarray(x).tobytes()).hexdigest(),
+                "shape": x.shape, "dtype": x.dtype.str}
+    if isinstance(x, np.generic):
+        return x.item()
+    if isinstance(x, np.random.SeedSequence):
+        return {"entropy": x.entropy, "spawn_key": list(x.spawn_key)}
+    if callable(getattr(x, "key", None)):  # e.g. a ServiceDistribution
+        return {"class": type(x).__name__, "key": x.key()}
+    # a repr may carry an address or a salted hash, which would never hit again
+    raise TypeError(f"cannot build a stable cache key from a {type(x).__name__}; "
+                    "use plain values, arrays or objects with a key() method")
+
+
+def cache_key(**parts):
+    """Stable hex key of the given parts plus the code version; TypeError on parts it cannot key."""
+    blob = json.dumps({**parts, "code": code_version()}, sort_keys=True, default=_jsonable)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def fingerprint(obj):
+    """
+    Class name plus the public attributes of an agent or env, nested objects included.
+    RNGs are left out: run_experiment reseeds them from the seed that is part of the key.
+    Values cache_key cannot key (functions, say) make it raise rather than be skipped.
+    """
+    attrs = {}
+    for k, v in sorted(vars(obj).items()):
+        if k.startswith("_") or isinstance(v, _RNG_TYPES) or v is random:
+            continue
+        if hasattr(v, "__dict__") and not callable(v) and not callable(getattr(v, "key", None)):
+            v = fingerprint(v)
+        attrs[k] = v
+    return {"class": type(obj).__name__, "attrs": attrs}
+
+
+def _plain(v):
+    if isinstance(v, (list, tuple)):
+        return all(map(_plain, v))
+    if isinstance(v, dict):
+        return all(_plain(k) and _plain(x) for k, x in v.items())
+    return isinstance(v, _PLAIN_TYPES)
+
+
+def pack_state(**objs):
+    """
+    Post-run state of each object as one uint8 array for ResultCache.put: its plain
+    attributes (scalars, arrays, containers of those) and the states of its RNGs.
+    """
+    state = {}
+    for name, obj in objs.items():
+        attrs, rngs = {}, {}
+        for k, v in vars(obj).items():
+            if isinstance(v, random.Random):
+                rngs[k] = v.getstate()
+            elif isinstance(v, np.random.Generator):
+                rngs[k] = v.bit_generator.state
+            elif _plain(v):
+                attrs[k] = v
+        state[name] = (attrs, rngs)
+    return np.frombuffer(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+
+def unpack_state(blob, **objs):
+    """Put the state saved by pack_state back onto the objects; RNGs are restored in place."""
+    state = pickle.loads(np.asarray(blob).tobytes())
+    for name, obj in objs.items():
+        attrs, rngs = state[name]
+        for k, v in attrs.items():
+            setattr(obj, k, v)
+        for k, v in rngs.items():
+            rng = getattr(obj, k)
+            if isinstance(rng, random.Random):
+                rng.setstate(v)
+            else:
+                rng.bit_generator.state = v
+
+
+class ResultCache:
+    """
+    Content-addressed result store on disk. An entry is a directory named by its key
+    holding one .npy per array plus meta.json (JSON-able extras such as scalar results).
+    Hits are returned as read-only memory maps. Entries are written to a temp directory
+    and renamed into place, so readers never see a partial entry; reading an entry bumps
+    its meta.json mtime, and put() evicts least-recently-used entries beyond max_bytes.
+    put() keeps a running total of the bytes stored, so the directory is only rescanned
+    when that total passes the cap; writes by other processes show up at the next scan.
+    """
+    def __init__(self, root: str=DEFAULT_DIR, max_bytes: int=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = None  # running size of the cache; None until the first scan
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._dir(key), "meta.json"))
+
+    def get(self, key):
+        """(arrays, meta) for a stored key, arrays memory-mapped; None on a miss."""
+        d = self._dir(key)
+        meta_path = os.path.join(d, "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(d, name + ".npy"), mmap_mode="r") for name in meta["arrays"]}
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays, meta.get("extra", {})
+
+    def put(self, key, arrays=None, extra=None):
+        arrays = {k: np.asarray(v) for k, v in (arrays or {}).items()}
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), arr, allow_pickle=False)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"arrays": list(arrays), "extra": extra or {}, "created": time.time()}, f)
+        size = sum(f.stat().st_size for f in os.scandir(tmp))
+        try:
+            os.rename(tmp, self._dir(key))
+        except OSError:  # another writer got there first; same key, same content
+            shutil.rmtree(tmp, ignore_errors=True)
+            size = 0
+        if self._bytes is None:
+            self._bytes = self.size_bytes()
+        else:
+            self._bytes += size
+        if self._bytes > self.max_bytes:
+            self.evict(keep=key)
+
+    def entries(self):
+        """[(last_used, bytes, key)] for every complete entry."""
+        out = []
+        for e in os.scandir(self.root):
+            meta = os.path.join(e.path, "meta.json")
+            if not e.is_dir() or e.name.startswith(".") or not os.path.exists(meta):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(e.path))
+            out.append((os.stat(meta).st_mtime, size, e.name))
+        return out
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._dir(key), ignore_errors=True)
+            total -= size
+        self._bytes = total
+
+    def clear(self):
+        for _, _, key in self.entries():
+            shutil.rmtree(self._dir(key), ignore_errors=True)
+        self._bytes = 0
+
+
+def default_cache():
+    """
+    Cache used by the scripts and the CLI: DREAM_CACHE_DIR (default outputs/cache) capped
+    at DREAM_CACHE_MAX_MB (default 512); None when DREAM_CACHE is 0/off.
+    """
+    if os.environ.get("DREAM_CACHE", "").strip().lower() in ("0", "off", "false"):
+        return None
+    max_mb = float(os.environ.get("DREAM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20))
+    return ResultCache(os.environ.get("DREAM_CACHE_DIR", DEFAULT_DIR), int(max_mb * 2**20))
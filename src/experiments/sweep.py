@@ -0,0 +1,155 @@
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ..simulator.env import DreamEnv
+from ..simulator.q_agent import QLearningAgent
+from ..simulator.queue_model import SpeculativeServer
+from ..simulator.utils import compute_metrics, compute_mttr
+
+
+def grid(**axes):
+    """Cartesian product of parameter axes: grid(mu=[1.0], lam=[0.2, 0.5]) -> list of dicts."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def cell_key(params, replicate):
+    """Stable identifier of one sweep cell, used to resume interrupted sweeps."""
+    return json.dumps({"params": params, "replicate": replicate}, sort_keys=True)
+
+
+def cell_seed(root_seed, params, replicate):
+    """
+    Independent stream for a cell. Derived from the cell's parameters rather than spawned
+    in submission order, so a resumed or reordered sweep hands every cell the same stream.
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).digest()
+    return np.random.SeedSequence(root_seed, spawn_key=(int.from_bytes(digest[:8], "little"), replicate))
+
+
+def server_cell(params, seed_seq):
+    """Run a SpeculativeServer for params["horizon"] seconds and return its final metrics."""
+    params = dict(params)
+    horizon = params.pop("horizon", 1000.0)
+    dt = params.pop("dt", 1.0)
+    server = SpeculativeServer(seed=seed_seq, **params)
+    for _ in range(int(round(horizon / dt))):
+        server.step(dt)
+    return server.metrics()
+
+
+def dream_env_cell(params, seed_seq):
+    """Train a QLearningAgent on a DreamEnv and return averages over the final episodes."""
+    params = dict(params)
+    episodes = params.pop("episodes", 200)
+    tail = params.pop("tail", max(1, episodes // 10))
+    env_seed, agent_seed = (int(x) for x in seed_seq.generate_state(2))
+    env = DreamEnv(seed=env_seed, **params)
+    agent = QLearningAgent(env.action_space, env, seed=agent_seed)
+
+    rewards, throughputs, drops, mttrs = [], [], [], []
+    for _ in range(episodes):
+        state = env.reset()
+        done = False
+        ep_reward = 0
+        while not done:
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            agent.learn(state, action, reward, next_state)
+            ep_reward += reward
+            state = next_state
+        agent.decay_epsilon()
+        info = compute_metrics(env)
+        rewards.append(ep_reward)
+        throughputs.append(info["throughput"])
+        drops.append(info["drop_rate"])
+        mttrs.append(compute_mttr(env))
+
+    return {
+        "reward": float(np.mean(rewards[-tail:])),
+        "throughput": float(np.mean(throughputs[-tail:])),
+        "drop_rate": float(np.mean(drops[-tail:])),
+        "mttr": float(np.mean(mttrs[-tail:])),
+    }
+
+
+def load_results(out_path):
+    """Records already written to a sweep's JSONL file (empty if it does not exist)."""
+    if not os.path.exists(out_path):
+        return []
+    records = []
+    with open(out_path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn line from an interrupted write
+    return records
+
+
+def run_sweep(cell_fn, params_grid, out_path, replicates=1, root_seed=0, workers=None, cache=None):
+    """
+    Run cell_fn(params, seed_seq) for every (params, replicate) pair across a process pool.
+    Each finished cell is appended to out_path as one JSON line, so an interrupted sweep
+    resumes by skipping cells already on disk. Returns every record, old and new.
+    cell_fn must be a module-level function so it can be pickled to the workers.
+    With a cache (experiments.cache.ResultCache), cells computed by any earlier sweep with
+    the same cell function, params, seed and code version are taken from it instead.
+    """
+    done = {cell_key(r["params"], r["replicate"]): r for r in load_results(out_path)}
+    todo = [(params, rep)
+            for params in params_grid
+            for rep in range(replicates)
+            if cell_key(params, rep) not in done]
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    records = list(done.values())
+    with open(out_path, "a+") as f:
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":
+                f.write("\n")  # terminate a torn line left by an interrupted run
+        def write(params, rep, result):
+            rec = {"params": params, "replicate": rep, "result": result}
+            f.write(json.dumps(rec) + "\n")
+            f.flush()
+            records.append(rec)
+
+        keys = {}
+        if cache is not None:
+            from .cache import cache_key
+            cell_name = f"{cell_fn.__module__}.{cell_fn.__qualname__}"
+            for params, rep in list(todo):
+                key = cache_key(kind="sweep_cell", cell=cell_name, params=params,
+                                seed=cell_seed(root_seed, params, rep))
+                hit = cache.get(key)
+                if hit is not None:
+                    write(params, rep, hit[1]["result"])
+                    todo.remove((params, rep))
+                else:
+                    keys[cell_key(params, rep)] = key
+
+        def finish(params, rep, result):
+            write(params, rep, result)
+            if cache is not None:
+                cache.put(keys[cell_key(params, rep)], extra={"result": result})
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for params, rep in todo:
+                finish(params, rep, cell_fn(params, cell_seed(root_seed, params, rep)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(cell_fn, params, cell_seed(root_seed, params, rep)): (params, rep)
+                           for params, rep in todo}
+                for fut in as_completed(futures):
+                    params, rep = futures[fut]
+                    finish(params, rep, fut.result())
+    return records
@@ -1,5 +1,17 @@
+import heapq
+import math
+
 import numpy as np
 
+# Every bandit here takes select() -> int, select(n) -> int array of n picks made with the
+# current estimates, and update(a, r) with scalars or equal-length arrays; batched updates
+# are applied as if the pairs arrived in order.
+
+
+def _as_batch(actions, rewards):
+    return np.atleast_1d(np.asarray(actions, dtype=np.int64)), np.atleast_1d(np.asarray(rewards, dtype=float))
+
+
 class EpsilonGreedyBandit:
     def __init__(self, n_actions: int, eps: float=0.1, seed: int=0):
         self.n = n_actions
@@ -8,13 +20,175 @@ class EpsilonGreedyBandit:
         self.counts = np.zeros(self.n, dtype=int)
         self.values = np.zeros(self.n, dtype=float)
 
-    def select(self):
-        if self.rng.random() < self.eps:
-            return int(self.rng.integers(self.n))
-        return int(np.argmax(self.values))
+    def select(self, n: int=None):
+        if n is None:
+            if self.rng.random() < self.eps:
+                return int(self.rng.integers(self.n))
+            return int(np.argmax(self.values))
+        explore = self.rng.random(n) < self.eps
+        return np.where(explore, self.rng.integers(self.n, size=n), int(np.argmax(self.values)))
+
+    def update(self, a, reward):
+        if np.ndim(a) == 0:
+            self.counts[a] += 1
+            n = self.counts[a]
+            q = self.values[a]
+            self.values[a] = q + (reward - q)/n
+            return
+        a, reward = _as_batch(a, reward)
+        k = np.bincount(a, minlength=self.n)
+        s = np.bincount(a, weights=reward, minlength=self.n)
+        self.counts += k
+        hit = k > 0
+        self.values[hit] += (s[hit] - k[hit] * self.values[hit]) / self.counts[hit]
+
+
+def _ucb_picks(values, counts, total, c, n, rng):
+    """
+    n UCB picks from one set of estimates: untried arms first, then each pick adds a
+    virtual count to its arm (a heap keeps the next-best index), so a batch spreads over
+    near-tied arms roughly the way n sequential picks would. Ties (among untried arms or
+    equal bounds) are broken by a random ranking of the arms drawn from rng.
+    """
+    rank = rng.permutation(len(values))
+    untried = np.flatnonzero(counts <= 0)
+    untried = untried[np.argsort(rank[untried])][:n]
+    picks = untried.tolist()
+    counts = counts.astype(float)
+    counts[untried] = 1.0
+    if len(picks) == n:
+        return np.array(picks, dtype=np.int64)
+    scale = c * math.sqrt(math.log(max(total + n, 2.0)))
+    values, counts, rank = values.tolist(), counts.tolist(), rank.tolist()
+    heap = [(-(v + scale / math.sqrt(k)), r, a) for a, (v, k, r) in enumerate(zip(values, counts, rank))]
+    heapq.heapify(heap)
+    for _ in range(n - len(picks)):
+        _, r, a = heapq.heappop(heap)
+        picks.append(a)
+        counts[a] += 1
+        heapq.heappush(heap, (-(values[a] + scale / math.sqrt(counts[a])), r, a))
+    return np.array(picks, dtype=np.int64)
+
+
+class UCB1Bandit:
+    """UCB1: argmax of mean + c * sqrt(ln t / n_a); each arm is tried once first. Ties break at random."""
+    def __init__(self, n_actions: int, c: float=np.sqrt(2.0), seed: int=0):
+        self.n = n_actions
+        self.c = c
+        self.rng = np.random.default_rng(seed)
+        self.counts = np.zeros(self.n, dtype=int)
+        self.values = np.zeros(self.n, dtype=float)
+
+    def select(self, n: int=None):
+        picks = _ucb_picks(self.values, self.counts, self.counts.sum(), self.c, 1 if n is None else n, self.rng)
+        return int(picks[0]) if n is None else picks
+
+    def update(self, a, reward):
+        a, reward = _as_batch(a, reward)
+        k = np.bincount(a, minlength=self.n)
+        s = np.bincount(a, weights=reward, minlength=self.n)
+        self.counts += k
+        hit = k > 0
+        self.values[hit] += (s[hit] - k[hit] * self.values[hit]) / self.counts[hit]
+
+
+class ThompsonBandit:
+    """
+    Beta-Bernoulli Thompson sampling for rewards in [0, 1]: a fractional reward r adds
+    r to α and 1-r to β. select(n) draws one posterior sample per pick in one call.
+    """
+    def __init__(self, n_actions: int, prior: float=1.0, seed: int=0):
+        self.n = n_actions
+        self.rng = np.random.default_rng(seed)
+        self.alpha = np.full(self.n, prior)
+        self.beta = np.full(self.n, prior)
+
+    @property
+    def values(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    def select(self, n: int=None):
+        theta = self.rng.beta(self.alpha, self.beta, size=(1 if n is None else n, self.n))
+        picks = np.argmax(theta, axis=1)
+        return int(picks[0]) if n is None else picks
+
+    def update(self, a, reward):
+        a, reward = _as_batch(a, reward)
+        reward = np.clip(reward, 0.0, 1.0)
+        self.alpha += np.bincount(a, weights=reward, minlength=self.n)
+        self.beta += np.bincount(a, weights=1.0 - reward, minlength=self.n)
+
+
+class DiscountedUCBBandit:
+    """
+    Discounted UCB for drifting rewards: every update multiplies all sums and counts by
+    gamma, so an observation k updates old weighs gamma^k and stale arms are re-explored.
+    """
+    def __init__(self, n_actions: int, gamma: float=0.99, c: float=np.sqrt(2.0), seed: int=0):
+        assert 0 < gamma <= 1
+        self.n = n_actions
+        self.gamma = gamma
+        self.c = c
+        self.rng = np.random.default_rng(seed)
+        self.weights = np.zeros(self.n)  # discounted counts
+        self.sums = np.zeros(self.n)     # discounted reward sums
+
+    @property
+    def values(self):
+        return np.divide(self.sums, self.weights, out=np.zeros(self.n), where=self.weights > 0)
+
+    def select(self, n: int=None):
+        picks = _ucb_picks(self.values, self.weights, self.weights.sum(), self.c, 1 if n is None else n, self.rng)
+        return int(picks[0]) if n is None else picks
+
+    def update(self, a, reward):
+        a, reward = _as_batch(a, reward)
+        m = len(a)
+        w = self.gamma ** np.arange(m - 1, -1, -1)
+        decay = self.gamma ** m
+        self.weights = decay * self.weights + np.bincount(a, weights=w, minlength=self.n)
+        self.sums = decay * self.sums + np.bincount(a, weights=w * reward, minlength=self.n)
+
+
+class SlidingWindowUCBBandit:
+    """
+    UCB over only the last `window` observations, kept in a preallocated ring; per-arm
+    counts and sums are maintained incrementally as observations enter and leave.
+    """
+    def __init__(self, n_actions: int, window: int=1000, c: float=np.sqrt(2.0), seed: int=0):
+        self.n = n_actions
+        self.window = window
+        self.c = c
+        self.rng = np.random.default_rng(seed)
+        self._actions = np.zeros(window, dtype=np.int64)
+        self._rewards = np.zeros(window)
+        self._next = 0
+        self._size = 0
+        self.counts = np.zeros(self.n, dtype=np.int64)
+        self.sums = np.zeros(self.n)
+
+    @property
+    def values(self):
+        return np.divide(self.sums, self.counts, out=np.zeros(self.n), where=self.counts > 0)
+
+    def select(self, n: int=None):
+        picks = _ucb_picks(self.values, self.counts, self._size, self.c, 1 if n is None else n, self.rng)
+        return int(picks[0]) if n is None else picks
 
-    def update(self, a: int, reward: float):
-        self.counts[a] += 1
-        n = self.counts[a]
-        q = self.values[a]
-        self.values[a] = q + (reward - q)/n
+    def update(self, a, reward):
+        a, reward = _as_batch(a, reward)
+        if len(a) > self.window:
+            a, reward = a[-self.window:], reward[-self.window:]
+        m = len(a)
+        idx = (self._next + np.arange(m)) % self.window
+        n_evict = max(0, self._size + m - self.window)
+        if n_evict:
+            old = (self._next - self._size + np.arange(n_evict)) % self.window
+            self.counts -= np.bincount(self._actions[old], minlength=self.n)
+            self.sums -= np.bincount(self._actions[old], weights=self._rewards[old], minlength=self.n)
+        self._actions[idx] = a
+        self._rewards[idx] = reward
+        self.counts += np.bincount(a, minlength=self.n)
+        self.sums += np.bincount(a, weights=reward, minlength=self.n)
+        self._next = (self._next + m) % self.window
+        self._size = min(self.window, self._size + m)
@@ -0,0 +1,56 @@
+import numpy as np
+
+DREAM_FEATURES = ("bias", "rho_tau", "log_q_len", "log_time_since_fault")
+
+
+def dream_features(server):
+    """Context for dream selection: [1, ρ_τ, log(1+q_len), log(1+seconds since the last fault)]."""
+    last_fault = server.failures[-1] if server.failures else 0.0
+    return np.array([1.0, server.estimate_rho_tau(), np.log1p(server.q_len),
+                     np.log1p(max(0.0, server.time - last_fault))])
+
+
+class LinUCBBandit:
+    """
+    Disjoint LinUCB: per arm a ridge regression of reward on the context x, scored as
+    x·θ_a + alpha * sqrt(x' A_a^{-1} x). A, A^{-1} and b live in preallocated (k, d, d)
+    and (k, d) arrays. select(X) scores a whole (n, d) batch of contexts with einsum;
+    update() folds a batch in per touched arm and re-inverts only those arms.
+    """
+    contextual = True
+
+    def __init__(self, n_actions: int, n_features: int=len(DREAM_FEATURES), alpha: float=1.0,
+                 ridge: float=1.0, seed: int=0):
+        self.n = n_actions
+        self.d = n_features
+        self.alpha = alpha
+        self.rng = np.random.default_rng(seed)
+        self.A = np.tile(ridge * np.eye(n_features), (n_actions, 1, 1))
+        self.A_inv = np.tile(np.eye(n_features) / ridge, (n_actions, 1, 1))
+        self.b = np.zeros((n_actions, n_features))
+        self.counts = np.zeros(n_actions, dtype=np.int64)
+
+    @property
+    def theta(self):
+        return np.einsum("kij,kj->ki", self.A_inv, self.b)
+
+    def scores(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        mean = X @ self.theta.T
+        width = np.sqrt(np.maximum(np.einsum("ni,kij,nj->nk", X, self.A_inv, X), 0.0))
+        return mean + self.alpha * width
+
+    def select(self, X):
+        """One action per context row; a single 1-D context returns an int."""
+        picks = np.argmax(self.scores(X), axis=1)
+        return int(picks[0]) if np.ndim(X) == 1 else picks
+
+    def update(self, a, reward, X):
+        a = np.atleast_1d(np.asarray(a, dtype=np.int64))
+        reward = np.atleast_1d(np.asarray(reward, dtype=float))
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        np.add.at(self.A, a, np.einsum("ni,nj->nij", X, X))
+        np.add.at(self.b, a, reward[:, None] * X)
+        self.counts += np.bincount(a, minlength=self.n)
+        touched = np.unique(a)
+        self.A_inv[touched] = np.linalg.inv(self.A[touched])
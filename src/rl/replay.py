@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity experience-replay buffer backed by one preallocated structured array.
+    Once full, the oldest transitions are overwritten. sample() returns the field arrays
+    in the order QLearningAgent.learn_batch expects.
+    """
+    def __init__(self, capacity: int, obs_dim: int=2, seed: int=0):
+        self.dtype = np.dtype([
+            ("state", np.float32, (obs_dim,)),
+            ("action", np.int64),
+            ("reward", np.float64),
+            ("next_state", np.float32, (obs_dim,)),
+        ])
+        self.data = np.zeros(capacity, dtype=self.dtype)
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add_batch(self, states, actions, rewards, next_states):
+        n = len(actions)
+        if n > self.capacity:  # only the newest transitions would survive anyway
+            states, actions, rewards, next_states = (x[-self.capacity:] for x in (states, actions, rewards, next_states))
+            n = self.capacity
+        idx = (self._next + np.arange(n)) % self.capacity
+        self.data["state"][idx] = states
+        self.data["action"][idx] = actions
+        self.data["reward"][idx] = rewards
+        self.data["next_state"][idx] = next_states
+        self._next = (self._next + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def add(self, state, action, reward, next_state):
+        self.add_batch([state], [action], [reward], [next_state])
+
+    def sample(self, batch_size: int):
+        idx = self.rng.integers(self._size, size=batch_size)
+        batch = self.data[idx]
+        return batch["state"], batch["action"], batch["reward"], batch["next_state"]
@@ -1,2 +1,49 @@
+import time
+
+_ROUND_OFF = 1e-12  # tokens; settled charges leave float dust that must not read as a deficit
+
+
 def idle_budget(beta: float, rho_tau: float) -> float:
     return max(0.0, beta * (1.0 - min(0.999, rho_tau)))
+
+
+class TokenBucket:
+    """
+    Admission control for background work. Tokens are CPU-seconds: they accrue at `rate`
+    per second (e.g. idle_budget * cores) up to `capacity`, admission takes an estimated
+    cost up front and charge() settles the difference once the real cost is known, so the
+    balance may go negative (debt) after an overrun.
+    """
+    def __init__(self, rate: float=0.0, capacity: float=0.05, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self._last = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + self.rate * (now - self._last))
+        self._last = now
+
+    def set_rate(self, rate: float):
+        self._refill()  # tokens earned so far accrue at the old rate
+        self.rate = rate
+
+    def try_take(self, amount: float) -> bool:
+        self._refill()
+        if self.tokens + _ROUND_OFF >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def charge(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available at the current rate (inf if none accrue)."""
+        self._refill()
+        if self.tokens + _ROUND_OFF >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
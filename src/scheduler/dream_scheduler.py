@@ -1,25 +1,207 @@
-from ..simulator.env import DreamEnv
+import time
+
+import numpy as np
+
 from ..rl.bandit import EpsilonGreedyBandit
+from ..rl.contextual import dream_features
+from ..simulator.faults import SCENARIOS
+from ..simulator.queue_model import SpeculativeServer
+from .executor import DreamExecutor
+
 
 class DreamScheduler:
     """
-    Ties together the environment and RL policy.
-    At each step:
-      - Observe state
-      - Select a dream (bandit)
-      - Step env; rewards reflect benefit-cost tradeoff
+    Runs fault-scenario dreams on the idle capacity of a SpeculativeServer.
+    At each tick:
+      - Step the foreground server by dt
+      - Spread the dream time the server granted (idle_budget, capped by actual idle
+        time) over the idle gaps of the tick in proportion to their length, cut it into
+        slices and hand them to a bounded pool of dream workers; a free worker gets a new
+        FaultScenario picked by the bandit
+      - When an arrival ends an idle gap, preempt every running dream at that moment
+        (strict priority), before the next gap's share is handed out
+    A dream costs scenario.duration * dream_cost CPU seconds (dream_cost is the CPU needed
+    to re-simulate one second of the fault). Finishing it pays its
+    severity to the bandit; a preempted dream pays 0, so the bandit learns which
+    rehearsals fit into the idle gaps the workload actually leaves.
+
+    With a DreamExecutor the dreams run for real instead: whenever the server granted
+    dream time, free executor workers get a bandit-chosen scenario replayed against a
+    snapshot of the server, and foreground work that arrived during the tick preempts
+    them through the executor. Per-scenario CPU seconds are then the workers' measured CPU time.
+
+    Any bandit from src/rl can be passed as `agent` (default: ε-greedy). A contextual one
+    (agent.contextual, e.g. LinUCBBandit) picks from dream_features(server) and is paid
+    against the context seen when the dream was started.
     """
-    def __init__(self, env: DreamEnv, eps=0.1):
-        self.env = env
-        self.agent = EpsilonGreedyBandit(n_actions=env.K, eps=eps)
-
-    def run(self, episodes=50, dt=1.0):
-        history = []
-        state = self.env.reset()
-        for t in range(episodes):
-            a = self.agent.select()
-            next_state, reward, done, metrics = self.env.step(a, dt=dt)
+    def __init__(self, server: SpeculativeServer, scenarios=SCENARIOS, eps=0.1, n_workers=2,
+                 slice_secs=0.05, dream_cost=0.1, seed=0, executor: DreamExecutor=None, agent=None):
+        assert n_workers > 0 and slice_secs > 0
+        self.server = server
+        self.scenarios = list(scenarios)
+        self.agent = agent if agent is not None else EpsilonGreedyBandit(n_actions=len(self.scenarios), eps=eps, seed=seed)
+        self.contextual = getattr(self.agent, "contextual", False)
+        self.slice_secs = slice_secs
+        self.dream_cost = dream_cost
+        self.executor = executor
+        self.rng = np.random.default_rng(seed)  # seeds for real dreams
+
+        # worker slots: None or [scenario_index, remaining_cpu_secs, context]
+        self.workers = [None] * n_workers
+
+        # accounting
+        k = len(self.scenarios)
+        self.cpu_secs = np.zeros(k)
+        self.started = np.zeros(k, dtype=int)
+        self.completed = np.zeros(k, dtype=int)
+        self.preemptions = np.zeros(k, dtype=int)
+        self.overhead_secs = 0.0
+        self.ticks = 0
+
+    def _select(self):
+        if self.contextual:
+            ctx = dream_features(self.server)
+            return self.agent.select(ctx), ctx
+        return self.agent.select(), None
+
+    def _pay(self, a, ctx, reward):
+        if self.contextual:
+            self.agent.update(a, reward, ctx)
+        else:
             self.agent.update(a, reward)
-            history.append({**metrics, "action": a, "reward": reward})
-            state = next_state
+
+    def _preempt_all(self):
+        n = 0
+        for w, dream in enumerate(self.workers):
+            if dream is not None:
+                a = dream[0]
+                self.preemptions[a] += 1
+                self._pay(a, dream[2], 0.0)
+                self.workers[w] = None
+                n += 1
+        return n
+
+    def _pack(self, dream_time):
+        """Hand out dream_time in slices, round-robin over the worker slots."""
+        reward, action, w = 0.0, -1, 0
+        while dream_time > 1e-12:
+            if self.workers[w] is None:
+                action, ctx = self._select()
+                self.workers[w] = [action, self.scenarios[action].duration * self.dream_cost, ctx]
+                self.started[action] += 1
+            a, remaining, ctx = self.workers[w]
+            used = min(self.slice_secs, dream_time, remaining)
+            self.cpu_secs[a] += used
+            dream_time -= used
+            if remaining - used <= 1e-12:
+                r = self.scenarios[a].severity
+                self._pay(a, ctx, r)
+                self.completed[a] += 1
+                reward += r
+                self.workers[w] = None
+            else:
+                self.workers[w][1] = remaining - used
+            w = (w + 1) % len(self.workers)
+        return reward, action
+
+    def _pack_gaps(self):
+        """Run the tick's dream time gap by gap; an arrival closing a gap preempts the dreams."""
+        gaps = self.server.last_idle_gaps
+        idle = sum(end - start for start, end in gaps)
+        share = self.server.last_dream_time / idle if idle > 0 else 0.0
+        reward, action, preempted = 0.0, -1, 0
+        for start, end in gaps:
+            r, a = self._pack(share * (end - start))
+            reward += r
+            action = a if a >= 0 else action
+            if end < self.server.time:  # foreground work arrived
+                preempted += self._preempt_all()
+        if self.server.q_len > 0:
+            preempted += self._preempt_all()
+        return reward, action, preempted
+
+    def _arrived(self):
+        gaps = self.server.last_idle_gaps
+        return self.server.q_len > 0 or any(end < self.server.time for _, end in gaps)
+
+    def _dispatch(self):
+        """Executor mode: collect finished dreams, then preempt or admit new ones."""
+        reward, action, preempted = 0.0, -1, 0
+        for (a, ctx), res in self.executor.poll():
+            if res is not None:
+                self.cpu_secs[a] += res["cpu_secs"]
+            if res is None or res["cancelled"]:
+                self._pay(a, ctx, 0.0)
+                continue
+            r = self.scenarios[a].severity
+            self._pay(a, ctx, r)
+            self.completed[a] += 1
+            reward += r
+
+        if self._arrived():
+            if self.executor.busy():
+                tags = self.executor.running_tags()
+                self.executor.preempt()
+                for a, _ in tags:
+                    self.preemptions[a] += 1
+                preempted = len(tags)
+        elif self.server.last_dream_time > 0:
+            snap = self.server.snapshot()  # every new dream branches from this one state
+            for _ in range(self.executor.free_slots()):
+                action, ctx = self._select()
+                self.executor.submit(snap, self.scenarios[action], tag=(action, ctx),
+                                     seed=int(self.rng.integers(2**63)))
+                self.started[action] += 1
+        return reward, action, preempted
+
+    def tick(self, dt=1.0):
+        t_fg = time.perf_counter()
+        self.server.step(dt)
+        t0 = time.perf_counter()
+        if self.executor is not None:
+            self.executor.record_foreground_step(t0 - t_fg)
+            reward, action, preempted = self._dispatch()
+        else:
+            reward, action, preempted = self._pack_gaps()
+        self.ticks += 1
+        self.overhead_secs += time.perf_counter() - t0
+        running = (len(self.executor.running_tags()) if self.executor is not None
+                   else sum(d is not None for d in self.workers))
+        return {"action": action, "reward": reward, "preempted": preempted, "running": running}
+
+    def run(self, episodes=50, dt=1.0, sink=None):
+        """
+        Run `episodes` scheduler ticks; returns one row of server metrics per tick, or
+        streams the rows into `sink` (a MetricsSink) and returns the flushed sink.
+        """
+        history = [] if sink is None else sink
+        for _ in range(episodes):
+            out = self.tick(dt)
+            history.append({**self.server.metrics(), **out})
+        if sink is not None:
+            sink.flush()
         return history
+
+    def _values(self):
+        if self.contextual:  # expected reward in the current context
+            return self.agent.theta @ dream_features(self.server)
+        return self.agent.values
+
+    def report(self):
+        """Per-scenario CPU seconds, starts, completions and preemptions, plus overhead."""
+        values = self._values()
+        return {
+            "scenarios": {
+                sc.name: {
+                    "cpu_secs": float(self.cpu_secs[i]),
+                    "started": int(self.started[i]),
+                    "completed": int(self.completed[i]),
+                    "preemptions": int(self.preemptions[i]),
+                    "value": float(values[i]),
+                }
+                for i, sc in enumerate(self.scenarios)
+            },
+            "overhead_secs": self.overhead_secs,
+            "overhead_per_tick_us": 1e6 * self.overhead_secs / max(1, self.ticks),
+            **({"interference": self.executor.interference()} if self.executor is not None else {}),
+        }
@@ -0,0 +1,204 @@
+import multiprocessing as mp
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+
+from ..evaluation.sketch import DDSketch
+from ..simulator.fault_engine import FaultSchedule
+from ..simulator.queue_model import ServerSnapshot, SpeculativeServer
+
+# Worker-process globals, installed by _init_worker
+_EPOCH = None
+
+
+def _init_worker(epoch, nice, pids):
+    """
+    Report this worker's pid, then drop it to the idle scheduling class (or at least the
+    lowest nice level).
+    """
+    global _EPOCH
+    _EPOCH = epoch
+    pids.put(os.getpid())
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(nice)
+    except (AttributeError, OSError):
+        pass
+
+
+class Dream:
+    """
+    One what-if re-simulation: fork the snapshotted server and inject `scenario` now
+    through the fault engine, then advance it one substep per step() until the fault's
+    incident has recovered or horizon_factor * duration has passed. run_dream drives one
+    to the end in a worker process; the live gateway slices one into the event loop.
+    """
+    def __init__(self, snapshot: ServerSnapshot, scenario, seed=None, horizon_factor=10.0, substeps=200):
+        t_cpu = time.process_time()
+        self.scenario = scenario
+        self.server = SpeculativeServer.from_snapshot(snapshot, seed=seed)
+        self.server.apply_faults(FaultSchedule.from_events([(self.server.time, scenario)]))
+        self.peak_q = self.server.q_len
+        self.dt = scenario.duration * horizon_factor / substeps
+        self.remaining = substeps
+        self.recovered = False
+        self.cpu_secs = time.process_time() - t_cpu
+
+    @property
+    def done(self):
+        return self.recovered or self.remaining <= 0
+
+    def step(self):
+        t_cpu = time.process_time()
+        server = self.server
+        server.run_until(server.time + self.dt)
+        self.peak_q = max(self.peak_q, server.q_len)
+        self.remaining -= 1
+        self.recovered = bool(server.recoveries)
+        self.cpu_secs += time.process_time() - t_cpu
+
+    def result(self, cancelled=False):
+        server = self.server
+        return {
+            "scenario": self.scenario.name,
+            "cancelled": cancelled,
+            "peak_q": int(self.peak_q),
+            "lat_p99": server.latency.quantile(0.99),
+            "recovery_time": server.mttr() if server.recoveries else None,
+            "cpu_secs": self.cpu_secs,
+        }
+
+
+def run_dream(snapshot: ServerSnapshot, scenario, epoch, seed=None, horizon_factor=10.0, substeps=200):
+    """
+    Run a Dream to the end in a worker. The epoch token is checked between substeps;
+    a bumped epoch means "foreground work arrived, stop now".
+    """
+    dream = Dream(snapshot, scenario, seed, horizon_factor, substeps)
+    while not dream.done:
+        if _EPOCH is not None and _EPOCH.value != epoch:
+            return dream.result(cancelled=True)
+        dream.step()
+    return dream.result()
+
+
+class DreamExecutor:
+    """
+    Runs dreams for real on a low-priority process pool.
+    preempt() bumps a shared epoch that every dream polls at safe points; it then waits
+    up to preempt_timeout seconds for running dreams to stop and, if they overrun,
+    terminates the pool's workers (each reports its pid when it starts).
+
+    Interference is a proxy: record_foreground_step() takes the wall time of one
+    foreground server.step, split by whether dreams were running, and interference()
+    reports how much the dreams' CPU contention added to its p99. The simulated request
+    latencies themselves are not affected by real dreams, so they cannot show it.
+    """
+    def __init__(self, workers=1, nice=19, preempt_timeout=0.05, horizon_factor=10.0, substeps=200):
+        self.workers = workers
+        self.nice = nice
+        self.preempt_timeout = preempt_timeout
+        self.horizon_factor = horizon_factor
+        self.substeps = substeps
+        self._epoch = mp.Value("l", 0)
+        self._pid_queue = mp.SimpleQueue()  # workers put their pid here on start-up
+        self._pids = set()
+        self._pool = self._new_pool()
+        self._running = {}  # future -> tag
+
+        self.preemptions = 0
+        self.overruns = 0
+        self.preempt_latency = DDSketch()
+        self.fg_step_dreaming = DDSketch()  # foreground step wall times, seconds
+        self.fg_step_quiet = DDSketch()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self._epoch, self.nice, self._pid_queue))
+
+    def _worker_pids(self):
+        """Pids of the workers started so far (a worker reports before its first dream)."""
+        while not self._pid_queue.empty():
+            self._pids.add(self._pid_queue.get())
+        return set(self._pids)
+
+    def free_slots(self):
+        return self.workers - len(self._running)
+
+    def busy(self):
+        return bool(self._running)
+
+    def running_tags(self):
+        return list(self._running.values())
+
+    def submit(self, snapshot: ServerSnapshot, scenario, tag=None, seed=None):
+        fut = self._pool.submit(run_dream, snapshot, scenario, self._epoch.value, seed,
+                                self.horizon_factor, self.substeps)
+        self._running[fut] = tag
+        return fut
+
+    def poll(self):
+        """Collect finished dreams as (tag, result) pairs; result is None if the dream was lost."""
+        out = []
+        for fut in [f for f in self._running if f.done()]:
+            tag = self._running.pop(fut)
+            out.append((tag, None if fut.cancelled() or fut.exception() else fut.result()))
+        return out
+
+    def cancel_all(self):
+        """Signal every dream to stop without waiting; results still arrive through poll()."""
+        with self._epoch.get_lock():
+            self._epoch.value += 1
+        for fut in self._running:
+            fut.cancel()  # dreams still waiting for a worker never start
+
+    def preempt(self):
+        """Stop every dream now. Returns the measured preemption latency in seconds."""
+        if not self._running:
+            return 0.0
+        t0 = time.perf_counter()
+        self.cancel_all()
+        _, not_done = wait(list(self._running), timeout=self.preempt_timeout)
+        if not_done:
+            # a dream missed its safe point: enforce the bound by killing the pool
+            self.overruns += 1
+            for pid in self._worker_pids():
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:  # already gone
+                    pass
+            self._pids.clear()
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = self._new_pool()
+        latency = time.perf_counter() - t0
+        self.preemptions += 1
+        self.preempt_latency.add(latency)
+        return latency
+
+    def record_foreground_step(self, seconds, dreaming=None):
+        """Record the wall time of one foreground step, tagged by whether dreams were running."""
+        dreaming = self.busy() if dreaming is None else dreaming
+        (self.fg_step_dreaming if dreaming else self.fg_step_quiet).add(seconds)
+
+    def interference(self):
+        """p99 foreground step wall time with and without dreams running (a contention proxy)."""
+        p_dream = self.fg_step_dreaming.quantile(0.99)
+        p_quiet = self.fg_step_quiet.quantile(0.99)
+        return {
+            "fg_step_p99_dreaming": p_dream,
+            "fg_step_p99_quiet": p_quiet,
+            "added_step_p99": p_dream - p_quiet if not (np.isnan(p_dream) or np.isnan(p_quiet)) else np.nan,
+            "preemptions": self.preemptions,
+            "preempt_p99": self.preempt_latency.quantile(0.99),
+            "overruns": self.overruns,
+        }
+
+    def shutdown(self):
+        self.preempt()
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,276 @@
+import asyncio
+import collections
+import time
+
+import numpy as np
+
+from ..evaluation.sketch import DDSketch
+from ..rl.bandit import EpsilonGreedyBandit
+from ..simulator.faults import SCENARIOS
+from ..simulator.queue_model import SpeculativeServer
+from .budget import TokenBucket, idle_budget
+from .executor import Dream, DreamExecutor
+
+
+class LiveGateway:
+    """
+    Live (wall-clock) version of the idle-budget policy on one asyncio event loop.
+
+    Foreground: an open-loop Poisson load generator (rate lam per second) submits
+    requests to a pool of `workers` coroutines; a request holds its worker for an
+    exponential service time (mean_service seconds, awaited like a backend call).
+    Latency is measured from the request's scheduled arrival, so event-loop lag counts.
+
+    Every `tick` the busy fraction of the workers over the last `window` seconds gives
+    the measured utilization ρ, and scheduler.budget.idle_budget(beta, ρ) sets the refill
+    rate of a TokenBucket of dream CPU-seconds. Dreams (bandit-chosen FaultScenarios
+    replayed against a snapshot of a SpeculativeServer model of this workload) run only
+    while no foreground request is in flight, and only on tokens:
+      mode="coroutine": the dream is stepped inside the event loop in slices of
+                        dream_slice seconds, each paid for from the bucket; an arrival
+                        drops the dream at the next slice boundary.
+      mode="process":   dreams go to a DreamExecutor (idle-priority processes); admission
+                        reserves the mean past dream cost and settles the measured CPU on
+                        completion; an arrival signals cancel_all() without blocking.
+
+    Dream setup (advancing the model, snapshotting it and, in coroutine mode, forking
+    the dream) is paid for from the bucket too.
+
+    compare(duration) runs the same arrival sequence without and with dreaming and
+    reports foreground p50/p99 for both, alongside the model's predicted ρ and budget.
+    All timing goes through `clock` (also the bucket's), so a test can run the gateway
+    on an event loop with virtual time by passing that loop's time().
+    """
+    def __init__(self, lam=40.0, mean_service=0.02, workers=2, beta=0.2, window=1.0, tick=0.05,
+                 burst=0.05, dream_slice=0.002, mode="coroutine", executor: DreamExecutor=None,
+                 scenarios=SCENARIOS, eps=0.1, seed=0, clock=time.perf_counter):
+        assert mode in ("coroutine", "process")
+        self.lam = lam
+        self.mean_service = mean_service
+        self.workers = workers
+        self.beta = beta
+        self.window = window
+        self.tick = tick
+        self.burst = burst
+        self.dream_slice = dream_slice
+        self.mode = mode
+        self.executor = executor
+        self.scenarios = list(scenarios)
+        self.eps = eps
+        self.seed = seed
+        self.clock = clock
+
+    def model(self):
+        """Per-worker SpeculativeServer of the workload; its ρ_τ and budget are the predictions."""
+        mu = 1.0 / self.mean_service
+        return SpeculativeServer(mu=mu, lam=self.lam / self.workers, tau=100.0 / mu, beta=self.beta, seed=self.seed)
+
+    def _reset(self, dreaming):
+        self.rng = np.random.default_rng(self.seed)
+        self.bandit = EpsilonGreedyBandit(len(self.scenarios), eps=self.eps, seed=self.seed)
+        self.latency = DDSketch()
+        self.arrival_lag = DDSketch()
+        self.bucket = TokenBucket(0.0, self.burst, clock=self.clock)
+        self.dreaming = dreaming
+        self._model = self.model()
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._busy = 0
+        self._busy_secs = 0.0
+        self._busy_mark = self.clock()
+        self._samples = collections.deque()
+        self._dream = None        # coroutine mode: (Dream, scenario index)
+        self._reserved = {}       # process mode: tag -> reserved tokens
+        self._signalled = set()   # process mode: tags already told to stop
+        self._dream_cost = self.dream_slice * 10
+        self._budgets = []
+        self.requests = 0
+        self.dream_cpu_secs = 0.0
+        self.dreams_started = 0
+        self.dreams_completed = 0
+        self.preemptions = 0
+
+    # --- utilization and budget ----------------------------------------------------
+
+    def _account(self):
+        now = self.clock()
+        self._busy_secs += self._busy * (now - self._busy_mark)
+        self._busy_mark = now
+        return now
+
+    async def _monitor(self):
+        while True:
+            now = self._account()
+            self._samples.append((now, self._busy_secs))
+            while now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            t0, b0 = self._samples[0]
+            rho = (self._busy_secs - b0) / ((now - t0) * self.workers) if now > t0 else 0.0
+            budget = idle_budget(self.beta, rho)
+            cores = self.executor.workers if self.mode == "process" else 1
+            self.bucket.set_rate(budget * cores)
+            self._budgets.append(budget)
+            await asyncio.sleep(self.tick)
+
+    # --- foreground ------------------------------------------------------------------
+
+    async def _generate(self, queue, duration):
+        n = self.rng.poisson(self.lam * duration)
+        arrivals = np.sort(self.rng.uniform(0.0, duration, n))
+        services = self.rng.exponential(self.mean_service, n)
+        t0 = self.clock()
+        for at, s in zip(arrivals, services):
+            delay = t0 + at - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.arrival_lag.add(max(0.0, self.clock() - (t0 + at)))
+            self._inflight += 1
+            self._idle.clear()
+            self._preempt()
+            queue.put_nowait((t0 + at, s))
+
+    async def _worker(self, queue):
+        while True:
+            arrival, service = await queue.get()
+            self._account()
+            self._busy += 1
+            await asyncio.sleep(service)
+            self._account()
+            self._busy -= 1
+            self.latency.add(self.clock() - arrival)
+            self.requests += 1
+            self._inflight -= 1
+            if not self._inflight:
+                self._idle.set()
+            queue.task_done()
+
+    # --- dreams ------------------------------------------------------------------------
+
+    def _start_dream(self):
+        a = int(self.bandit.select())
+        self._model.run_until(self._model.time + self.tick)  # keep the model's clock moving
+        self.dreams_started += 1
+        return a, self._model.snapshot(), int(self.rng.integers(2**63))
+
+    def _preempt(self):
+        if self.mode == "coroutine":
+            if self._dream is not None:
+                self.bandit.update(self._dream[1], 0.0)
+                self._dream = None
+                self.preemptions += 1
+        else:
+            new = self._reserved.keys() - self._signalled
+            if new:
+                self.executor.cancel_all()
+                self.preemptions += len(new)
+                self._signalled |= new
+
+    async def _dream_coroutines(self):
+        while True:
+            await self._idle.wait()
+            if not self.bucket.try_take(self.dream_slice):
+                await asyncio.sleep(min(self.tick, self.bucket.wait_time(self.dream_slice)))
+                continue
+            t0 = self.clock()
+            if self._dream is None:  # setup is part of the slice it happens in
+                a, snap, seed = self._start_dream()
+                self._dream = (Dream(snap, self.scenarios[a], seed), a)
+            dream, a = self._dream
+            while self.clock() - t0 < self.dream_slice and not dream.done:
+                dream.step()
+            used = self.clock() - t0
+            self.bucket.charge(used - self.dream_slice)
+            self.dream_cpu_secs += used
+            if dream.done:
+                self.bandit.update(a, self.scenarios[a].severity)
+                self.dreams_completed += 1
+                self._dream = None
+            await asyncio.sleep(0)  # let arrivals in between slices
+
+    async def _dream_processes(self):
+        ex = self.executor
+        while True:
+            for tag, res in ex.poll():
+                reserved = self._reserved.pop(tag)
+                self._signalled.discard(tag)
+                cost = res["cpu_secs"] if res is not None else reserved
+                self.bucket.charge(cost - reserved)
+                self.dream_cpu_secs += cost
+                done = res is not None and not res["cancelled"]
+                self.bandit.update(tag[0], self.scenarios[tag[0]].severity if done else 0.0)
+                if done:
+                    self.dreams_completed += 1
+                    self._dream_cost += 0.2 * (cost - self._dream_cost)
+            if self._idle.is_set() and ex.free_slots() > 0 and self.bucket.try_take(self._dream_cost):
+                t0 = self.clock()
+                a, snap, seed = self._start_dream()
+                setup = self.clock() - t0  # in the loop; the worker's own cost settles on completion
+                self.bucket.charge(setup)
+                self.dream_cpu_secs += setup
+                tag = (a, self.dreams_started)
+                self._reserved[tag] = self._dream_cost
+                ex.submit(snap, self.scenarios[a], tag=tag, seed=seed)
+                continue
+            await asyncio.sleep(self.tick / 5)
+
+    # --- runs ----------------------------------------------------------------------------
+
+    async def run(self, duration: float, dreaming: bool=True):
+        self._reset(dreaming)
+        queue = asyncio.Queue()
+        tasks = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._monitor()))
+        if dreaming:
+            dreamer = self._dream_coroutines if self.mode == "coroutine" else self._dream_processes
+            tasks.append(asyncio.create_task(dreamer()))
+        t0 = self.clock()
+        await self._generate(queue, duration)
+        await queue.join()
+        wall = self.clock() - t0
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.mode == "process" and self._reserved:
+            self.executor.preempt()
+            for tag, res in self.executor.poll():
+                self.dream_cpu_secs += res["cpu_secs"] if res is not None else 0.0
+            self._reserved.clear()
+        self._account()
+        return self.report(wall)
+
+    def report(self, wall):
+        p = self.latency.quantiles([0.50, 0.99])
+        return {
+            "dreaming": self.dreaming,
+            "mode": self.mode,
+            "wall_secs": wall,
+            "requests": self.requests,
+            "fg_p50": float(p[0]),
+            "fg_p99": float(p[1]),
+            "fg_mean": float(self.latency.mean),
+            "arrival_lag_p99": float(self.arrival_lag.quantile(0.99)),
+            "rho_measured": self._busy_secs / (wall * self.workers),
+            "budget_mean": float(np.mean(self._budgets)) if self._budgets else 0.0,
+            "rho_predicted": float(self._model.estimate_rho_tau()),
+            "budget_predicted": float(self._model.idle_budget()),
+            "dream_cpu_secs": self.dream_cpu_secs,
+            "dream_cpu_frac": self.dream_cpu_secs / wall,
+            "dreams_started": self.dreams_started,
+            "dreams_completed": self.dreams_completed,
+            "preemptions": self.preemptions,
+        }
+
+    def measure(self, duration: float, dreaming: bool=True):
+        return asyncio.run(self.run(duration, dreaming))
+
+    def compare(self, duration: float):
+        """Same seed (so the same arrivals and service times) without, then with, dreaming."""
+        quiet = self.measure(duration, dreaming=False)
+        dream = self.measure(duration, dreaming=True)
+        return {
+            "quiet": quiet,
+            "dreaming": dream,
+            "added_p50": dream["fg_p50"] - quiet["fg_p50"],
+            "added_p99": dream["fg_p99"] - quiet["fg_p99"],
+        }
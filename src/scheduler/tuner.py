@@ -0,0 +1,146 @@
+import json
+
+import numpy as np
+
+from ..rl.bandit import EpsilonGreedyBandit
+from ..simulator.queue_model import RHO_CLAMP, SpeculativeServer
+
+
+class TauTuner:
+    """
+    Online controller for a SpeculativeServer's τ and β, one decision per window.
+
+    τ is chosen by an EpsilonGreedyBandit over a grid of τ buckets whose reward is the
+    window's measured p99 (negated, in units of the mean service time). Before each
+    decision the analytic model filters the grid: with
+        ρ_τ   = λ E[S_τ]                          (foreground utilization)
+        ρ_cpu = λ (2 E[S_τ] - E[min(S, τ)])       (plus CPU burnt by duplicates)
+    a bucket is feasible if ρ_τ <= rho_target and the best β it allows,
+        β = min(beta_max, (rho_target - ρ_cpu) / (1 - ρ_cpu)),
+    still leaves a dream budget β (1 - ρ_cpu) >= budget_floor. β is set to that value:
+    the most dream CPU that keeps the total load under the target. A window whose measured
+    busy fraction overshoots rho_target is penalized, which catches model mismatch.
+
+    Exploration is bounded: every feasible bucket is tried once, then ε decays as
+    eps / (1 + k / n_buckets), and after max_windows the tuner freezes on the best
+    bucket. Every decision is appended to `log` (and to log_path as JSONL if given).
+
+    A window's p99 is read from the server's sliding latency window, so `window` may not
+    exceed what it holds in full (latency_window.span); by default it is exactly that.
+    A new τ takes effect from the next job to enter service: the job in service at the
+    window boundary keeps the speculation timeout it started with.
+    """
+    def __init__(self, server: SpeculativeServer, taus=None, rho_target: float=0.8,
+                 budget_floor: float=0.02, beta_max: float=0.5, window: float=None, tick: float=1.0,
+                 eps: float=0.2, max_windows: int=50, overshoot_penalty: float=10.0,
+                 seed: int=0, log_path: str=None):
+        self.server = server
+        mean_s = server.service.mean()
+        self.taus = np.asarray(taus if taus is not None else mean_s * np.array([0.25, 0.5, 1, 2, 4, 8]), dtype=float)
+        self.rho_target = rho_target
+        self.budget_floor = budget_floor
+        self.beta_max = beta_max
+        span = server.latency_window.span
+        if window is not None and window > span:
+            raise ValueError(f"window {window} exceeds the {span} s the server's latency window "
+                             "holds in full; pass a shorter window or a wider latency_window")
+        self.window = window if window is not None else span
+        self.tick = tick
+        self.eps = eps
+        self.max_windows = max_windows
+        self.overshoot_penalty = overshoot_penalty
+        self.log_path = log_path
+        self.bandit = EpsilonGreedyBandit(len(self.taus), eps=eps, seed=seed)
+        self.windows = 0
+        self.frozen = None  # bucket index once converged
+        self.log = []
+        self._moments = {}  # (service key, τ) -> (E[S_τ], E[min(S, τ)])
+
+    def model(self, tau):
+        """(ρ_τ, ρ_cpu, β, budget) for bucket τ under the server's current λ and service model."""
+        svc, lam = self.server.service, self.server.lam
+        key = (svc.key(), float(tau))
+        hit = self._moments.get(key)
+        if hit is None:  # quadrature for non-exponential services: once per bucket and model
+            if len(self._moments) >= 256:
+                self._moments.clear()
+            hit = self._moments[key] = (float(svc.expected_service_tau(tau)), float(svc.expected_truncated(tau)))
+        e_tau, e_trunc = hit
+        rho = min(RHO_CLAMP, lam * e_tau)
+        rho_cpu = min(RHO_CLAMP, lam * (2.0 * e_tau - e_trunc))
+        beta = min(self.beta_max, max(0.0, (self.rho_target - rho_cpu) / (1.0 - rho_cpu)))
+        return rho, rho_cpu, beta, beta * (1.0 - rho_cpu)
+
+    def feasible(self):
+        """Boolean mask over taus plus the model row for each bucket."""
+        rows = [self.model(t) for t in self.taus]
+        mask = np.array([r[0] <= self.rho_target and r[3] >= self.budget_floor for r in rows])
+        return mask, rows
+
+    def _choose(self, mask):
+        idx = np.flatnonzero(mask)
+        if self.frozen is not None and mask[self.frozen]:
+            return self.frozen, "frozen"
+        untried = idx[self.bandit.counts[idx] == 0]
+        if len(untried):
+            return int(untried[0]), "sweep"
+        eps = self.eps / (1.0 + self.windows / len(self.taus))
+        if self.bandit.rng.random() < eps:
+            return int(self.bandit.rng.choice(idx)), "explore"
+        return int(idx[np.argmax(self.bandit.values[idx])]), "exploit"
+
+    def step_window(self):
+        """Pick τ/β, run one window of foreground ticks, score it and log the decision."""
+        server = self.server
+        mask, rows = self.feasible()
+        if not mask.any():  # nothing satisfies the constraints: fall back to the least loaded bucket
+            a, how = int(np.argmin([r[1] for r in rows])), "fallback"
+        else:
+            a, how = self._choose(mask)
+        rho, rho_cpu, beta, budget = rows[a]
+        server.tau, server.beta = float(self.taus[a]), beta
+
+        t0, busy0, dream0 = server.time, server.busy_total(), server.dream_cpu_secs
+        while server.time < t0 + self.window - 1e-9:
+            server.step(min(self.tick, t0 + self.window - server.time))
+        busy = float(server.busy_total() - busy0) / self.window
+        p99 = float(server.latency_window.quantiles([0.99], server.time, since=t0)[0])
+
+        reward = None
+        if not np.isnan(p99):
+            reward = -p99 / server.service.mean()
+            if busy > self.rho_target:
+                reward -= self.overshoot_penalty * (busy - self.rho_target)
+            self.bandit.update(a, reward)
+        self.windows += 1
+        if self.frozen is None and self.windows >= self.max_windows and mask.any():
+            idx = np.flatnonzero(mask)
+            self.frozen = int(idx[np.argmax(self.bandit.values[idx])])
+
+        entry = {
+            "window": self.windows, "time": server.time, "tau": server.tau, "beta": beta,
+            "decision": how, "feasible": int(mask.sum()), "rho_model": rho, "rho_cpu_model": rho_cpu,
+            "budget_model": budget, "busy_measured": busy, "p99": p99, "reward": reward,
+            "dream_cpu_secs": float(server.dream_cpu_secs - dream0),
+        }
+        self.log.append(entry)
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def run(self, windows: int):
+        for _ in range(windows):
+            self.step_window()
+        return self.log
+
+    @property
+    def converged(self):
+        return self.frozen is not None
+
+    def best(self):
+        """(τ, β) the tuner currently considers best among feasible buckets."""
+        mask, rows = self.feasible()
+        idx = np.flatnonzero(mask) if mask.any() else np.arange(len(self.taus))
+        a = self.frozen if self.frozen is not None else int(idx[np.argmax(self.bandit.values[idx])])
+        return float(self.taus[a]), rows[a][2]
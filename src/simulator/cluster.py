@@ -0,0 +1,388 @@
+import heapq
+
+import numpy as np
+
+from ..evaluation.sketch import DDSketch
+from .distributions import Exponential, ServiceDistribution
+from .events import ARRIVAL, COMPLETION, SPEC_TIMEOUT, EventQueue
+from .queue_model import RHO_CLAMP
+
+DISPATCH_POLICIES = ("rr", "jsq", "p2c")
+
+# duplicate state of a job
+DUP_NONE, DUP_QUEUED, DUP_RUNNING, DUP_CANCELLED = 0, 1, 2, 3
+
+
+class SpeculativeCluster:
+    """
+    M/M/c-style cluster of n_servers FIFO replicas with SpeculativeServer semantics:
+    a job dispatched to a replica that is still running τ after it started gets a
+    duplicate on a *different* replica (chosen by the same dispatch policy); the first
+    copy to finish completes the job and the other copy is cancelled, freeing its replica
+    or leaving the queue. Dispatch is round-robin ("rr"), join-shortest-queue ("jsq") or
+    power-of-two-choices ("p2c").
+
+    All state is array-backed: per-replica queues are linked lists threaded through one
+    shared pool of queue nodes (with a free list), and jobs live in a ring-indexed job
+    table, so thousands of replicas cost a few arrays rather than thousands of Python
+    objects and memory grows with the jobs queued, not with the longest queue times n.
+    JSQ reads the least-loaded replica off a lazily cleaned heap of (load, replica).
+
+    The idle budget is per replica as in SpeculativeServer (β·(1-ρ), ρ counting the
+    capacity duplicates consume; memoized), but the cluster-wide dream CPU is capped at
+    dream_quota cores, mirroring k8s/manifests/resourcequota.yaml.
+    """
+    def __init__(self, n_servers: int, mu: float, lam: float, tau: float, beta: float=0.2,
+                 dispatch: str="jsq", dream_quota: float=1.0, seed: int=0,
+                 service: ServiceDistribution=None, draw_chunk: int=1024, latency_sketch=DDSketch):
+        assert n_servers >= 2 and mu > 0 and lam >= 0 and tau >= 0
+        assert dispatch in DISPATCH_POLICIES
+        self.n = n_servers
+        self.mu = mu
+        self.lam = lam  # total arrival rate
+        self.tau = tau
+        self.beta = beta
+        self.dispatch = dispatch
+        self.dream_quota = dream_quota
+        self.service = (service or Exponential(1.0)).with_mean(1.0 / mu)
+        self.rng = np.random.default_rng(seed)
+        self.draw_chunk = draw_chunk
+        self._rho_cache = {}
+        self.time = 0.0
+        self.events = EventQueue()
+
+        # per-replica state
+        n = n_servers
+        self.load = np.zeros(n, dtype=np.int64)          # live copies queued or in service
+        self.cur = np.full(n, -1, dtype=np.int64)        # job id in service, -1 if idle
+        self.cur_dup = np.zeros(n, dtype=bool)           # is the copy in service a duplicate
+        self.token = np.zeros(n, dtype=np.int64)         # stale-event guard
+        self.busy_since = np.zeros(n)
+        self.busy_time = np.zeros(n)
+        self._qhead = np.full(n, -1, dtype=np.int64)     # first / last queue node, -1 if empty
+        self._qtail = np.full(n, -1, dtype=np.int64)
+        self._qsize = np.zeros(n, dtype=np.int64)
+        self._qentry = np.zeros(0, dtype=np.int64)       # node pool, entries: 2 * job_id + is_duplicate
+        self._qnext = np.zeros(0, dtype=np.int64)        # next node in the same queue, or in the free list
+        self._qfree = -1
+        self._grow_nodes(1024)
+        self._rr = -1
+        self._heap = [(0, i) for i in range(n)] if dispatch == "jsq" else None  # may hold stale entries
+
+        # job table, indexed by job_id & mask
+        self._next_id = 0
+        self._alloc_table(1024)
+
+        # draws: interarrival (unit exponential), service, duplicate service, p2c picks
+        self._draws = np.empty((3, 0))
+        self._draw_idx = 0
+        self._picks = np.empty((0, 2), dtype=np.int64)
+        self._pick_idx = 0
+        self._next_arrival = None
+
+        # accounting
+        self.latency = latency_sketch()
+        self.completions = 0
+        self.speculations = 0
+        self.dup_wins = 0
+        self.cancelled_running = 0  # losing copies stopped mid-service
+        self.dream_cpu_secs = 0.0
+        self.dream_events = 0
+        self.last_dream_time = 0.0
+        self.last_dream_alloc = np.zeros(n)
+        self.quota_capped = 0
+
+    # --- job table ---------------------------------------------------------------
+
+    def _alloc_table(self, cap):
+        self._mask = cap - 1
+        self.j_id = np.full(cap, -1, dtype=np.int64)
+        self.j_arrival = np.zeros(cap)
+        self.j_s = np.zeros(cap)
+        self.j_s2 = np.zeros(cap)
+        self.j_home = np.zeros(cap, dtype=np.int64)
+        self.j_dup_server = np.zeros(cap, dtype=np.int64)
+        self.j_dup_state = np.zeros(cap, dtype=np.int8)
+
+    def _new_job(self, arrival, s, s2):
+        jid = self._next_id
+        slot = jid & self._mask
+        if self.j_id[slot] >= 0:  # an old job is still live in this slot: double the table
+            old = (self.j_id, self.j_arrival, self.j_s, self.j_s2, self.j_home, self.j_dup_server, self.j_dup_state)
+            live = old[0] >= 0
+            self._alloc_table(2 * (self._mask + 1))
+            new_slots = old[0][live] & self._mask
+            for dst, src in zip((self.j_id, self.j_arrival, self.j_s, self.j_s2, self.j_home,
+                                 self.j_dup_server, self.j_dup_state), old):
+                dst[new_slots] = src[live]
+            slot = jid & self._mask
+        self._next_id += 1
+        self.j_id[slot] = jid
+        self.j_arrival[slot] = arrival
+        self.j_s[slot] = s
+        self.j_s2[slot] = s2
+        self.j_dup_state[slot] = DUP_NONE
+        return jid
+
+    # --- per-replica FIFO queues ---------------------------------------------------
+
+    def _grow_nodes(self, extra):
+        """Add `extra` nodes to the pool and put them on the free list."""
+        cap = len(self._qentry)
+        self._qentry = np.concatenate((self._qentry, np.zeros(extra, dtype=np.int64)))
+        nxt = np.arange(cap + 1, cap + extra + 1, dtype=np.int64)
+        nxt[-1] = self._qfree
+        self._qnext = np.concatenate((self._qnext, nxt))
+        self._qfree = cap
+
+    def _push(self, i, entry):
+        if self._qfree < 0:
+            self._grow_nodes(len(self._qentry))  # double the pool: total queued jobs, not per replica
+        node = self._qfree
+        self._qfree = int(self._qnext[node])
+        self._qentry[node] = entry
+        self._qnext[node] = -1
+        if self._qtail[i] < 0:
+            self._qhead[i] = node
+        else:
+            self._qnext[self._qtail[i]] = node
+        self._qtail[i] = node
+        self._qsize[i] += 1
+
+    def _pop(self, i):
+        node = int(self._qhead[i])
+        entry = int(self._qentry[node])
+        self._qhead[i] = self._qnext[node]
+        if self._qhead[i] < 0:
+            self._qtail[i] = -1
+        self._qnext[node] = self._qfree
+        self._qfree = node
+        self._qsize[i] -= 1
+        return entry
+
+    def _add_load(self, i, d):
+        load = int(self.load[i]) + d
+        self.load[i] = load
+        if self._heap is not None:
+            heapq.heappush(self._heap, (load, i))
+            if len(self._heap) > 4 * self.n + 1024:  # drop the stale entries
+                self._heap = list(zip(self.load.tolist(), range(self.n)))
+                heapq.heapify(self._heap)
+
+    # --- dispatch ----------------------------------------------------------------
+
+    def _pick2(self):
+        if self._pick_idx >= len(self._picks):
+            self._picks = self.rng.integers(self.n, size=(self.draw_chunk, 2))
+            self._pick_idx = 0
+        a, b = self._picks[self._pick_idx]
+        self._pick_idx += 1
+        return int(a), int(b)
+
+    def _choose(self, exclude=-1):
+        """Replica for a new copy under the dispatch policy, never `exclude`."""
+        if self.dispatch == "rr":
+            self._rr = (self._rr + 1) % self.n
+            if self._rr == exclude:
+                self._rr = (self._rr + 1) % self.n
+            return self._rr
+        if self.dispatch == "jsq":
+            # lowest (load, index) first, as np.argmin would pick; O(log n) per load change
+            heap, load, held = self._heap, self.load, []
+            while True:
+                l, i = heap[0]
+                if l != load[i]:
+                    heapq.heappop(heap)  # stale
+                elif i == exclude:
+                    held.append(heapq.heappop(heap))
+                else:
+                    break
+            for entry in held:
+                heapq.heappush(heap, entry)
+            return i
+        a, b = self._pick2()
+        if exclude >= 0:  # draw from the other n-1 replicas
+            a, b = (a % (self.n - 1), b % (self.n - 1))
+            a, b = a + (a >= exclude), b + (b >= exclude)
+        return a if self.load[a] <= self.load[b] else b
+
+    # --- discrete-event core -------------------------------------------------------
+
+    def _schedule_arrival(self, now):
+        if self.lam <= 0:
+            self._next_arrival = None
+            return
+        if self._draw_idx >= self._draws.shape[1]:
+            k = self.draw_chunk
+            self._draws = np.vstack((self.rng.standard_exponential((1, k)),
+                                     self.service.sample(self.rng, 2 * k).reshape(2, k)))
+            self._draw_idx = 0
+        u = self._draws[:, self._draw_idx]
+        self._draw_idx += 1
+        self._next_arrival = (now + u[0] / self.lam, u[1], u[2])
+        self.events.push(self._next_arrival[0], ARRIVAL)
+
+    def _enqueue(self, i, jid, dup, now):
+        self._add_load(i, 1)
+        if self.cur[i] < 0:
+            self._start(i, jid, dup, now)
+        else:
+            self._push(i, 2 * jid + dup)
+
+    def _start(self, i, jid, dup, now):
+        slot = jid & self._mask
+        self.cur[i] = jid
+        self.cur_dup[i] = dup
+        self.busy_since[i] = now
+        self.token[i] += 1
+        tok = (i, int(self.token[i]))
+        if dup:
+            self.j_dup_state[slot] = DUP_RUNNING
+            self.events.push(now + self.j_s2[slot], COMPLETION, tok)
+            return
+        s = self.j_s[slot]
+        if s > self.tau:
+            self.events.push(now + self.tau, SPEC_TIMEOUT, tok)
+        self.events.push(now + s, COMPLETION, tok)
+
+    def _start_next(self, i, now):
+        while self._qsize[i]:
+            jid, dup = divmod(self._pop(i), 2)
+            slot = jid & self._mask
+            if dup and (self.j_id[slot] != jid or self.j_dup_state[slot] != DUP_QUEUED):
+                continue  # cancelled duplicate, already subtracted from load
+            self._start(i, jid, bool(dup), now)
+            return
+
+    def _free(self, i, now):
+        self.busy_time[i] += now - self.busy_since[i]
+        self.cur[i] = -1
+        self._add_load(i, -1)
+        self.token[i] += 1
+
+    def _complete(self, i, now):
+        jid, dup = int(self.cur[i]), bool(self.cur_dup[i])
+        slot = jid & self._mask
+        self.latency.add(now - self.j_arrival[slot])
+        self.completions += 1
+        self.dup_wins += dup
+        self._free(i, now)
+        # cancel the losing copy
+        if dup:
+            home = int(self.j_home[slot])
+            self._free(home, now)
+            self.cancelled_running += 1
+            self._start_next(home, now)
+        elif self.j_dup_state[slot] == DUP_QUEUED:
+            self._add_load(int(self.j_dup_server[slot]), -1)
+        elif self.j_dup_state[slot] == DUP_RUNNING:
+            j = int(self.j_dup_server[slot])
+            self._free(j, now)
+            self.cancelled_running += 1
+            self._start_next(j, now)
+        self.j_dup_state[slot] = DUP_CANCELLED
+        self.j_id[slot] = -1
+        self._start_next(i, now)
+
+    def _handle(self, now, kind, payload):
+        if kind == ARRIVAL:
+            _, s, s2 = self._next_arrival
+            jid = self._new_job(now, s, s2)
+            i = self._choose()
+            self.j_home[jid & self._mask] = i
+            self._schedule_arrival(now)
+            self._enqueue(i, jid, False, now)
+            return
+        i, tok = payload
+        if tok != self.token[i]:
+            return
+        if kind == SPEC_TIMEOUT:
+            jid = int(self.cur[i])
+            slot = jid & self._mask
+            j = self._choose(exclude=i)
+            self.j_dup_server[slot] = j
+            self.j_dup_state[slot] = DUP_QUEUED
+            self.speculations += 1
+            self._enqueue(j, jid, True, now)
+        else:
+            self._complete(i, now)
+
+    def run_until(self, t_end: float):
+        if self._next_arrival is None:
+            self._schedule_arrival(self.time)
+        events = self.events
+        while events.peek_time() <= t_end:
+            now, kind, payload = events.pop()
+            self.time = now
+            self._handle(now, kind, payload)
+        self.time = t_end
+
+    # --- utilization and dream budget ------------------------------------------------
+
+    def estimate_rho(self):
+        """
+        Per-replica utilization including duplicate work: each job costs E[S_τ] on its
+        home replica plus E[S_τ] - E[min(S, τ)] for the duplicate (queueing ignored).
+        """
+        key = (self.service.key(), self.tau, self.lam, self.n)
+        rho = self._rho_cache.get(key)
+        if rho is None:
+            e_tau = self.service.expected_service_tau(self.tau)
+            work = 2.0 * e_tau - self.service.expected_truncated(self.tau)
+            rho = self._rho_cache[key] = min(RHO_CLAMP, self.lam * work / self.n)
+        return rho
+
+    def idle_budget(self):
+        """Cluster dream CPU rate (cores): per-replica β·(1-ρ), capped at dream_quota."""
+        return min(self.dream_quota, self.n * max(0.0, self.beta * (1.0 - self.estimate_rho())))
+
+    def _busy_totals(self, t):
+        running = self.cur >= 0
+        return self.busy_time + np.where(running, t - self.busy_since, 0.0)
+
+    def step(self, dt: float):
+        """
+        Advance by dt, then grant dreams on each replica's idle time (bounded by its
+        β·(1-ρ) share); if the sum exceeds dream_quota·dt, every grant is scaled down.
+        """
+        t0 = self.time
+        busy0 = self._busy_totals(t0)
+        self.run_until(t0 + dt)
+        idle = np.maximum(0.0, dt - (self._busy_totals(self.time) - busy0))
+        per_replica = max(0.0, self.beta * (1.0 - self.estimate_rho())) * dt
+        alloc = np.minimum(idle, per_replica)
+        total = float(alloc.sum())
+        cap = self.dream_quota * dt
+        if total > cap:
+            alloc *= cap / total
+            total = cap
+            self.quota_capped += 1
+        self.last_dream_alloc = alloc
+        self.last_dream_time = total
+        if total > 0:
+            self.dream_cpu_secs += total
+            self.dream_events += 1
+
+    @property
+    def q_len(self):
+        return int(self.load.sum())
+
+    def metrics(self):
+        p = self.latency.quantiles([0.50, 0.95, 0.99])
+        return {
+            "time": self.time,
+            "completions": self.completions,
+            "speculations": self.speculations,
+            "dup_wins": self.dup_wins,
+            "cancelled_running": self.cancelled_running,
+            "q_len": self.q_len,
+            "max_load": int(self.load.max()),
+            "lat_p50": float(p[0]),
+            "lat_p95": float(p[1]),
+            "lat_p99": float(p[2]),
+            "rho_est": float(self.estimate_rho()),
+            "idle_budget": float(self.idle_budget()),
+            "dream_cpu_secs": float(self.dream_cpu_secs),
+            "dream_events": int(self.dream_events),
+            "quota_capped": int(self.quota_capped),
+        }
@@ -0,0 +1,265 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# scipy is imported lazily: only numerical E[S_τ] needs it, and it is slow to import
+
+
+class ServiceDistribution(ABC):
+    """
+    Service-time distribution for SpeculativeServer. Subclasses provide a vectorized
+    sample(rng, n), the survival function sf(x), mean(), scaled(factor) (all durations
+    multiplied by factor) and key() for memoization. expected_truncated(tau) is
+    E[min(S, τ)] and expected_service_tau(tau) is
+    E[S_τ] = E[min(S, τ)] + E[min(S-τ, S'); S > τ] = ∫_0^τ F̄ + ∫_0^∞ F̄(τ+x) F̄(x) dx,
+    integrated numerically here; subclasses with a closed form override it. The five
+    primitives are abstract, so an incomplete subclass fails when it is instantiated.
+    """
+    name = "base"
+
+    @abstractmethod
+    def sample(self, rng, n):
+        ...
+
+    @abstractmethod
+    def sf(self, x):
+        ...
+
+    @abstractmethod
+    def mean(self):
+        ...
+
+    @abstractmethod
+    def scaled(self, factor):
+        ...
+
+    @abstractmethod
+    def key(self):
+        ...
+
+    def with_mean(self, m):
+        return self.scaled(m / self.mean())
+
+    def expected_truncated(self, tau):
+        """E[min(S, τ)] = ∫_0^τ F̄."""
+        from scipy import integrate
+        return integrate.quad(self.sf, 0.0, tau, limit=200)[0] if tau > 0 else 0.0
+
+    def expected_service_tau(self, tau):
+        from scipy import integrate
+        tail = integrate.quad(lambda x: self.sf(tau + x) * self.sf(x), 0.0, np.inf, limit=200)[0]
+        return self.expected_truncated(tau) + tail
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.key()[1:]}"
+
+
+class Exponential(ServiceDistribution):
+    name = "exponential"
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+
+    def sample(self, rng, n):
+        return rng.standard_exponential(n) / self.rate
+
+    def sf(self, x):
+        return np.exp(-self.rate * np.maximum(x, 0.0))
+
+    def mean(self):
+        return 1.0 / self.rate
+
+    def scaled(self, factor):
+        return Exponential(self.rate / factor)
+
+    def with_mean(self, m):
+        return Exponential(1.0 / m)
+
+    def key(self):
+        return (self.name, self.rate)
+
+    def expected_truncated(self, tau):
+        return (1.0 - np.exp(-self.rate * tau)) / self.rate
+
+    def expected_service_tau(self, tau):
+        """(1 - e^{-μτ}/2)/μ: the residual is again Exp(μ) and min of two Exp(μ) is Exp(2μ)."""
+        return (1.0 - 0.5 * np.exp(-self.rate * tau)) / self.rate
+
+
+class LogNormal(ServiceDistribution):
+    """S = exp(N(log_mean, sigma^2))."""
+    name = "lognormal"
+
+    def __init__(self, log_mean=0.0, sigma=1.0):
+        self.log_mean = log_mean
+        self.sigma = sigma
+
+    def sample(self, rng, n):
+        return rng.lognormal(self.log_mean, self.sigma, n)
+
+    def sf(self, x):
+        from scipy.special import ndtr
+        x = np.asarray(x, dtype=float)
+        z = (np.log(np.maximum(x, 1e-300)) - self.log_mean) / self.sigma
+        return np.where(x > 0, ndtr(-z), 1.0)
+
+    def mean(self):
+        return float(np.exp(self.log_mean + 0.5 * self.sigma ** 2))
+
+    def scaled(self, factor):
+        return LogNormal(self.log_mean + np.log(factor), self.sigma)
+
+    def key(self):
+        return (self.name, self.log_mean, self.sigma)
+
+
+class Pareto(ServiceDistribution):
+    """Classic Pareto: P(S > x) = (xm / x)^alpha for x >= xm; needs alpha > 1 for a finite mean."""
+    name = "pareto"
+
+    def __init__(self, alpha=2.5, xm=1.0):
+        assert alpha > 1 and xm > 0
+        self.alpha = alpha
+        self.xm = xm
+
+    def sample(self, rng, n):
+        return self.xm * (1.0 + rng.pareto(self.alpha, n))
+
+    def sf(self, x):
+        x = np.asarray(x, dtype=float)
+        return np.where(x < self.xm, 1.0, (self.xm / np.maximum(x, self.xm)) ** self.alpha)
+
+    def mean(self):
+        return self.alpha * self.xm / (self.alpha - 1.0)
+
+    def scaled(self, factor):
+        return Pareto(self.alpha, self.xm * factor)
+
+    def key(self):
+        return (self.name, self.alpha, self.xm)
+
+    def expected_truncated(self, tau):
+        a, xm = self.alpha, self.xm
+        return tau if tau <= xm else xm + xm ** a * (tau ** (1 - a) - xm ** (1 - a)) / (1 - a)
+
+    def expected_service_tau(self, tau):
+        from scipy import integrate
+        xm = self.xm
+        head = self.expected_truncated(tau)
+        # the product of survivals has kinks at xm - tau and xm: integrate piecewise
+        points = sorted({p for p in (xm - tau, xm) if p > 0})
+        f = lambda x: float(self.sf(tau + x) * self.sf(x))
+        edges = [0.0] + points
+        tail = sum(integrate.quad(f, lo, hi)[0] for lo, hi in zip(edges[:-1], edges[1:]))
+        tail += integrate.quad(f, edges[-1], np.inf, limit=200)[0]
+        return head + tail
+
+
+class Bimodal(ServiceDistribution):
+    """Mixture of two exponentials: mean `fast` with probability p, else mean `slow`."""
+    name = "bimodal"
+
+    def __init__(self, p=0.9, fast=0.5, slow=5.0):
+        assert 0 <= p <= 1
+        self.p = p
+        self.fast = fast
+        self.slow = slow
+
+    def sample(self, rng, n):
+        scale = np.where(rng.random(n) < self.p, self.fast, self.slow)
+        return scale * rng.standard_exponential(n)
+
+    def sf(self, x):
+        x = np.maximum(x, 0.0)
+        return self.p * np.exp(-x / self.fast) + (1 - self.p) * np.exp(-x / self.slow)
+
+    def mean(self):
+        return self.p * self.fast + (1 - self.p) * self.slow
+
+    def scaled(self, factor):
+        return Bimodal(self.p, self.fast * factor, self.slow * factor)
+
+    def key(self):
+        return (self.name, self.p, self.fast, self.slow)
+
+    def expected_truncated(self, tau):
+        w = np.array([self.p, 1 - self.p])
+        m = np.array([self.fast, self.slow])
+        return float(np.sum(w * m * (1.0 - np.exp(-tau / m))))
+
+    def expected_service_tau(self, tau):
+        """Closed form: sums of exponential integrals over the 2x2 component pairs."""
+        w = np.array([self.p, 1 - self.p])
+        m = np.array([self.fast, self.slow])
+        head = self.expected_truncated(tau)
+        rates = 1.0 / m
+        tail = float(np.sum(np.outer(w * np.exp(-tau * rates), w) / (rates[:, None] + rates[None, :])))
+        return head + tail
+
+
+class Empirical(ServiceDistribution):
+    """
+    Discrete distribution over observed durations (optionally weighted). E[S_τ] is exact:
+    both terms are integrals of step functions, evaluated with one sort.
+    """
+    name = "empirical"
+
+    def __init__(self, values, weights=None):
+        values = np.asarray(values, dtype=float)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        order = np.argsort(values)
+        self.values = values[order]
+        self.weights = weights[order] / weights.sum()
+        self._cdf = np.cumsum(self.weights)
+        # a content digest, not hash(): that is salted per process and would break cache keys and sweep seeds
+        digest = hashlib.sha1(self.values.tobytes() + self.weights.tobytes()).hexdigest()
+        self._key = (self.name, len(values), digest)
+
+    @classmethod
+    def from_histogram(cls, edges, counts):
+        edges = np.asarray(edges, dtype=float)
+        return cls(0.5 * (edges[:-1] + edges[1:]), counts)
+
+    @classmethod
+    def from_trace(cls, service, max_samples=1 << 20, seed=0):
+        """Subsample (without loading it whole) a possibly memory-mapped column of durations."""
+        n = len(service)
+        if n <= max_samples:
+            return cls(np.asarray(service))
+        idx = np.sort(np.random.default_rng(seed).choice(n, max_samples, replace=False))
+        return cls(np.asarray(service[idx]))
+
+    def sample(self, rng, n):
+        idx = np.searchsorted(self._cdf, rng.random(n), side="right")
+        return self.values[np.minimum(idx, len(self.values) - 1)]
+
+    def sf(self, x):
+        return 1.0 - np.concatenate(([0.0], self._cdf))[np.searchsorted(self.values, x, side="right")]
+
+    def mean(self):
+        return float(np.dot(self.weights, self.values))
+
+    def scaled(self, factor):
+        return Empirical(self.values * factor, self.weights)
+
+    def key(self):
+        return self._key
+
+    @staticmethod
+    def _expected_min(a, wa, b, wb):
+        """E[min(X, Y)] for independent discrete X ~ (a, wa), Y ~ (b, wb), values >= 0."""
+        xs = np.unique(np.concatenate(([0.0], a, b)))
+        oa, ob = np.argsort(a), np.argsort(b)
+        ca = np.concatenate(([0.0], np.cumsum(wa[oa])))
+        cb = np.concatenate(([0.0], np.cumsum(wb[ob])))
+        sa = 1.0 - ca[np.searchsorted(a[oa], xs[:-1], side="right")]
+        sb = 1.0 - cb[np.searchsorted(b[ob], xs[:-1], side="right")]
+        return float(np.sum(sa * sb * np.diff(xs)))
+
+    def expected_truncated(self, tau):
+        return float(np.dot(self.weights, np.minimum(self.values, tau)))
+
+    def expected_service_tau(self, tau):
+        v, w = self.values, self.weights
+        return self.expected_truncated(tau) + self._expected_min(np.maximum(v - tau, 0.0), w, v, w)
@@ -0,0 +1,92 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+# DreamEnv as an explicit MDP. State s = 2 * queue_len + server_up, actions {0: idle, 1: add job}.
+# One env step: an add to a full queue is dropped (-1); an up server fails with fail_prob and
+# a down one (including one that just failed) is repaired with repair_prob; if the server
+# ends the step up and the queue is non-empty, one job is processed (+1).
+
+
+def transition_model(max_queue: int=10, fail_prob: float=0.05, repair_prob: float=0.2):
+    """
+    Sparse per-action transition matrices P[a] (S x S, CSR, two entries per row) and the
+    expected one-step rewards R (A x S) of DreamEnv with these parameters.
+    """
+    q = np.repeat(np.arange(max_queue + 1), 2)
+    up = np.tile([0, 1], max_queue + 1)
+    n = len(q)
+    p_up = np.where(up == 1, (1 - fail_prob) + fail_prob * repair_prob, repair_prob)
+    P, R = [], np.zeros((2, n))
+    for a in (0, 1):
+        q1 = np.minimum(q + a, max_queue)
+        dropped = (a == 1) & (q == max_queue)
+        s_up = 2 * np.maximum(q1 - 1, 0) + 1
+        s_down = 2 * q1
+        rows = np.concatenate((np.arange(n), np.arange(n)))
+        P.append(sp.csr_matrix((np.concatenate((p_up, 1 - p_up)), (rows, np.concatenate((s_up, s_down)))),
+                               shape=(n, n)))
+        R[a] = p_up * (q1 > 0) - dropped
+    return P, R
+
+
+def value_iteration(P, R, gamma: float=0.95, tol: float=1e-10, max_iter: int=100000):
+    """Q (A x S) by synchronous value iteration; stops when the sup-norm update is below tol."""
+    V = np.zeros(R.shape[1])
+    for it in range(1, max_iter + 1):
+        Q = R + gamma * np.vstack([Pa @ V for Pa in P])
+        V_new = Q.max(axis=0)
+        if np.max(np.abs(V_new - V)) < tol * (1 - gamma) / (2 * gamma):
+            return Q, it
+        V = V_new
+    return Q, max_iter
+
+
+def policy_iteration(P, R, gamma: float=0.95, max_iter: int=1000):
+    """Q (A x S) by policy iteration: exact sparse solves of (I - γ P_π) V = R_π until the policy is stable."""
+    n = R.shape[1]
+    idx = np.arange(n)
+    policy = np.zeros(n, dtype=np.int64)
+    eye = sp.identity(n, format="csr")
+    for it in range(1, max_iter + 1):
+        P_pi = _policy_matrix(P, policy)
+        V = spsolve((eye - gamma * P_pi).tocsc(), R[policy, idx])
+        Q = R + gamma * np.vstack([Pa @ V for Pa in P])
+        new = np.argmax(Q, axis=0)
+        # keep the current action on ties so the loop terminates
+        new = np.where(Q[new, idx] > Q[policy, idx] + 1e-12, new, policy)
+        if np.array_equal(new, policy):
+            return Q, it
+        policy = new
+    return Q, max_iter
+
+
+def _policy_matrix(P, policy):
+    """P_π: row s taken from P[policy[s]], built by masking whole matrices."""
+    out = None
+    for a, Pa in enumerate(P):
+        mask = sp.diags((policy == a).astype(float))
+        out = mask @ Pa if out is None else out + mask @ Pa
+    return out.tocsr()
+
+
+def solve_q_table(env, gamma: float=0.95, method: str="policy", **kwargs):
+    """
+    Optimal Q-table for a DreamEnv, in QLearningAgent.q_table layout
+    (max_queue + 1, 2, n_actions) = [queue_len, server_up, action].
+    """
+    P, R = transition_model(env.max_queue, env.fail_prob, env.repair_prob)
+    solver = {"policy": policy_iteration, "value": value_iteration}[method]
+    Q, _ = solver(P, R, gamma, **kwargs)
+    return Q.T.reshape(env.max_queue + 1, 2, len(P))
+
+
+class DPAgent:
+    """Greedy policy of the exact DP solution: the optimal baseline for DreamEnv."""
+
+    def __init__(self, action_space, env, discount_factor=0.95, method="policy"):
+        self.action_space = action_space
+        self.q_table = solve_q_table(env, discount_factor, method)
+
+    def act(self, state):
+        return int(np.argmax(self.q_table[int(state[0]), int(state[1])]))
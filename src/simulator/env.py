@@ -10,10 +10,12 @@ class DreamEnv:
     Rewards: throughput - drops - penalty for downtime
     """
 
-    def __init__(self, max_queue=10, fail_prob=0.05, repair_prob=0.2):
+    def __init__(self, max_queue=10, fail_prob=0.05, repair_prob=0.2, seed=None):
         self.max_queue = max_queue
         self.fail_prob = fail_prob
         self.repair_prob = repair_prob
+        # Private RNG when seeded (e.g. sweep workers); otherwise the global `random` module
+        self.random = random.Random(seed) if seed is not None else random
 
         # Define action and observation spaces
         self.action_space = [0, 1]      # two discrete actions
@@ -35,6 +37,38 @@ class DreamEnv:
         self.downtime_start_step = None
         return self._get_obs()
 
+    def snapshot(self):
+        """
+        Compact copy of the live state (counters, clock, RNG state). The downtime history
+        is not included, so snapshots stay small however long the env has been running.
+        """
+        return {
+            "params": {"max_queue": self.max_queue, "fail_prob": self.fail_prob, "repair_prob": self.repair_prob},
+            "queue_len": self.queue_len,
+            "server_up": self.server_up,
+            "jobs_processed": self.jobs_processed,
+            "jobs_dropped": self.jobs_dropped,
+            "steps": self.steps,
+            "downtime_start_step": self.downtime_start_step,
+            "rng_state": self.random.getstate(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snap, seed=None):
+        """
+        Branch a new env from a snapshot. seed=None continues the original random stream;
+        a seed gives an independent future. The downtime history starts empty.
+        """
+        env = cls(seed=0 if seed is None else seed, **snap["params"])
+        if seed is None:
+            env.random.setstate(snap["rng_state"])
+        for k in ("queue_len", "server_up", "jobs_processed", "jobs_dropped", "steps", "downtime_start_step"):
+            setattr(env, k, snap[k])
+        return env
+
+    def fork(self, seed=None):
+        return self.from_snapshot(self.snapshot(), seed)
+
     def _get_obs(self):
         return np.array([self.queue_len, int(self.server_up)], dtype=np.float32)
 
@@ -58,11 +92,11 @@ class DreamEnv:
         prev_server_status = self.server_up
 
         # Server may fail randomly
-        if self.server_up and random.random() < self.fail_prob:
+        if self.server_up and self.random.random() < self.fail_prob:
             self.server_up = False
         
         # Server may recover randomly
-        if not self.server_up and random.random() < self.repair_prob:
+        if not self.server_up and self.random.random() < self.repair_prob:
             self.server_up = True
 
         # Check for status changes and update downtime tracking
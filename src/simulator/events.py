@@ -0,0 +1,50 @@
+import heapq
+
+# Event kinds for the discrete-event core of SpeculativeServer
+ARRIVAL = 0
+SERVICE_START = 1
+SPEC_TIMEOUT = 2
+COMPLETION = 3
+DUP_COMPLETION = 4
+FAILURE = 5
+
+EVENT_NAMES = {
+    ARRIVAL: "arrival",
+    SERVICE_START: "service_start",
+    SPEC_TIMEOUT: "speculation_timeout",
+    COMPLETION: "completion",
+    DUP_COMPLETION: "duplicate_completion",
+    FAILURE: "failure",
+}
+
+
+class EventQueue:
+    """
+    Min-heap of (time, seq, kind, payload). The sequence number breaks ties so
+    events scheduled for the same instant fire in the order they were pushed.
+    """
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+
+    def push(self, time: float, kind: int, payload=None):
+        heapq.heappush(self._heap, (time, self._seq, kind, payload))
+        self._seq += 1
+
+    def pop(self):
+        time, _, kind, payload = heapq.heappop(self._heap)
+        return time, kind, payload
+
+    def retain(self, keep):
+        """Drop every event for which keep(kind, payload) is false; order is unchanged."""
+        self._heap = [e for e in self._heap if keep(e[2], e[3])]
+        heapq.heapify(self._heap)
+
+    def times_of(self, kind: int):
+        return sorted(t for t, _, k, _ in self._heap if k == kind)
+
+    def peek_time(self):
+        return self._heap[0][0] if self._heap else float("inf")
+
+    def __len__(self):
+        return len(self._heap)
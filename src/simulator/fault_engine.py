@@ -0,0 +1,124 @@
+import numpy as np
+
+from .faults import FaultScenario
+
+# How each fault kind hits the server: (rate it modulates, kills the in-service attempt)
+FAULT_KINDS = {
+    "node_crash": ("mu", True),
+    "bandwidth_drop": ("mu", False),
+    "gc_pause": ("mu", False),
+    "load_spike": ("lam", False),
+}
+LOAD_SPIKE_GAIN = 2.0  # a severity-1 load spike triples the arrival rate
+
+
+def rate_factor(scenario: FaultScenario):
+    """Multiplier the scenario applies to its target rate while active."""
+    target, _ = FAULT_KINDS[scenario.kind]
+    if target == "mu":
+        return max(0.0, 1.0 - scenario.severity)
+    return 1.0 + LOAD_SPIKE_GAIN * scenario.severity
+
+
+class RateProfile:
+    """
+    Piecewise-constant rate multiplier m(t) for t >= 0: values[i] holds on
+    [breakpoints[i], breakpoints[i+1]), and the last value must be positive.
+    Point values, integrals and inverse integrals are O(log n) searchsorted lookups
+    over precomputed cumulative work.
+    """
+    def __init__(self, breakpoints, values):
+        self.bp = np.concatenate(([0.0], np.asarray(breakpoints, dtype=float)))
+        self.values = np.asarray(values, dtype=float)
+        assert len(self.values) == len(self.bp) and self.values[-1] > 0
+        self.cum = np.concatenate(([0.0], np.cumsum(self.values[:-1] * np.diff(self.bp))))
+
+    def _segment(self, t):
+        return max(0, int(np.searchsorted(self.bp, t, side="right")) - 1)
+
+    def value(self, t):
+        return float(self.values[self._segment(t)])
+
+    def integral_to(self, t):
+        """∫_0^t m."""
+        i = self._segment(t)
+        return float(self.cum[i] + self.values[i] * (max(t, 0.0) - self.bp[i]))
+
+    def integral(self, t0, t1):
+        return self.integral_to(t1) - self.integral_to(t0)
+
+    def advance(self, t0, work):
+        """Earliest t >= t0 with ∫_t0^t m = work (inf for infinite work)."""
+        if work == np.inf:
+            return np.inf
+        target = self.integral_to(t0) + work
+        i = int(np.searchsorted(self.cum, target, side="left")) - 1
+        if i < 0:
+            return t0
+        return max(t0, float(self.bp[i] + (target - self.cum[i]) / self.values[i]))
+
+
+class FaultSchedule:
+    """
+    A precomputed set of fault intervals: starts/ends/scenarios sorted by start time,
+    folded into two RateProfiles (service-rate and arrival-rate multipliers, products
+    where faults overlap) and a per-segment "any fault active" flag. active() and
+    overlaps() are O(log n) via searchsorted, so callers never scan the schedule per tick.
+    """
+    def __init__(self, starts, scenarios):
+        starts = np.asarray(starts, dtype=float)
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.scenarios = [scenarios[i] for i in order]
+        self.ends = self.starts + np.array([sc.duration for sc in self.scenarios], dtype=float)
+
+        bp = np.unique(np.clip(np.concatenate((self.starts, self.ends)), 0.0, None))
+        bp = bp[bp > 0]
+        n_seg = len(bp) + 1
+        mu_v, lam_v = np.ones(n_seg), np.ones(n_seg)
+        active = np.zeros(n_seg, dtype=bool)
+        edges = np.concatenate(([0.0], bp))
+        lo = np.searchsorted(edges, self.starts, side="right") - 1
+        hi = np.searchsorted(edges, self.ends, side="left")
+        for sc, i, j in zip(self.scenarios, np.maximum(lo, 0), hi):
+            target, _ = FAULT_KINDS[sc.kind]
+            (mu_v if target == "mu" else lam_v)[i:j] *= rate_factor(sc)
+            active[i:j] = True
+        self.mu = RateProfile(bp, mu_v)
+        self.lam = RateProfile(bp, lam_v)
+        self._active = active
+        self._active_cum = np.cumsum(active)
+
+    @classmethod
+    def from_events(cls, events):
+        """Build from (start_time, FaultScenario) pairs."""
+        events = list(events)
+        return cls([t for t, _ in events], [sc for _, sc in events])
+
+    @classmethod
+    def poisson(cls, scenarios, rate, horizon, seed=None):
+        """Faults arrive as a Poisson process of `rate` over [0, horizon), scenario picked uniformly."""
+        rng = np.random.default_rng(seed)
+        n = rng.poisson(rate * horizon)
+        starts = np.sort(rng.uniform(0.0, horizon, n))
+        picks = rng.integers(len(scenarios), size=n)
+        return cls(starts, [scenarios[i] for i in picks])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def active(self, t):
+        """Is any fault active at time t."""
+        return bool(self._active[self.mu._segment(t)])
+
+    def overlaps(self, t0, t1):
+        """Is any fault active somewhere in [t0, t1]."""
+        i0, i1 = self.mu._segment(t0), self.mu._segment(t1)
+        return bool(self._active_cum[i1] - (self._active_cum[i0 - 1] if i0 else 0) > 0)
+
+    def next_index(self, t):
+        """Index of the first fault starting at or after t."""
+        return int(np.searchsorted(self.starts, t, side="left"))
+
+    def kills(self, i):
+        return FAULT_KINDS[self.scenarios[i].kind][1]
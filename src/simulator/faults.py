@@ -4,12 +4,13 @@ from dataclasses import dataclass
 class FaultScenario:
     name: str
     duration: float  # seconds
-    severity: float  # scale 0..1 (affects mu or lam in a higher-fidelity model)
+    severity: float  # scale 0..1 (how hard the fault hits mu or lam, see fault_engine)
+    kind: str = "node_crash"  # node_crash | bandwidth_drop | gc_pause | load_spike
 
 # Minimal placeholder library of "dreams"
 SCENARIOS = [
-    FaultScenario("node_crash_short", duration=1.0, severity=0.7),
-    FaultScenario("bandwidth_drop", duration=2.0, severity=0.4),
-    FaultScenario("gc_pause", duration=0.5, severity=0.5),
-    FaultScenario("load_spike", duration=1.5, severity=0.9),
+    FaultScenario("node_crash_short", duration=1.0, severity=0.7, kind="node_crash"),
+    FaultScenario("bandwidth_drop", duration=2.0, severity=0.4, kind="bandwidth_drop"),
+    FaultScenario("gc_pause", duration=0.5, severity=0.5, kind="gc_pause"),
+    FaultScenario("load_spike", duration=1.5, severity=0.9, kind="load_spike"),
 ]
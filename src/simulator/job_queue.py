@@ -0,0 +1,100 @@
+import numpy as np
+
+
+class JobQueue:
+    """
+    FIFO ring buffer of waiting jobs, stored column-wise in one float64 array:
+    row 0 = arrival time, row 1 = original service, row 2 = duplicate service.
+    Appends and pops at either end are O(1); bulk reads/drops are vectorized.
+    share()/from_buffer() give copy-on-write views: several queues may read one buffer,
+    and the first to write takes a private copy.
+    """
+    ARRIVAL, SERVICE, DUPLICATE = 0, 1, 2
+
+    def __init__(self, capacity: int=1024):
+        self._buf = np.empty((3, max(1, capacity)))
+        self._head = 0
+        self._size = 0
+        self._shared = False
+
+    @classmethod
+    def from_buffer(cls, buf, head, size):
+        q = cls.__new__(cls)
+        q._buf, q._head, q._size, q._shared = buf, head, size, True
+        return q
+
+    def share(self):
+        """(buffer, head, size) for from_buffer(); this queue copies before its next write."""
+        self._shared = True
+        return self._buf, self._head, self._size
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return self._buf.shape[1]
+
+    def _indices(self, start, n):
+        return (self._head + start + np.arange(n)) % self.capacity
+
+    def _reserve(self, extra):
+        need = self._size + extra
+        if need <= self.capacity:
+            if self._shared:
+                self._buf = self._buf.copy()
+                self._shared = False
+            return
+        buf = np.empty((3, max(2 * self.capacity, need)))
+        buf[:, :self._size] = self._buf[:, self._indices(0, self._size)]
+        self._buf = buf
+        self._head = 0
+        self._shared = False
+
+    def append(self, arrival, service, duplicate):
+        self._reserve(1)
+        i = (self._head + self._size) % self.capacity
+        self._buf[:, i] = (arrival, service, duplicate)
+        self._size += 1
+
+    def appendleft(self, arrival, service, duplicate):
+        self._reserve(1)
+        self._head = (self._head - 1) % self.capacity
+        self._buf[:, self._head] = (arrival, service, duplicate)
+        self._size += 1
+
+    def extend(self, arrivals, services, duplicates):
+        n = len(arrivals)
+        if n == 0:
+            return
+        self._reserve(n)
+        idx = self._indices(self._size, n)
+        self._buf[0, idx] = arrivals
+        self._buf[1, idx] = services
+        self._buf[2, idx] = duplicates
+        self._size += n
+
+    def popleft(self):
+        if not self._size:
+            raise IndexError("pop from an empty JobQueue")
+        job = self._buf[:, self._head].tolist()
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        return job
+
+    def head(self, n):
+        """First n jobs as a (3, n) array (a view when they are contiguous; do not mutate)."""
+        n = min(n, self._size)
+        if self._head + n <= self.capacity:
+            return self._buf[:, self._head:self._head + n]
+        return self._buf[:, self._indices(0, n)]
+
+    def drop(self, n):
+        """Discard the first n jobs."""
+        n = min(n, self._size)
+        self._head = (self._head + n) % self.capacity
+        self._size -= n
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
@@ -7,7 +7,7 @@ class QLearningAgent:
     It learns a Q-table to map states to optimal actions.
     """
 
-    def __init__(self, action_space, env, learning_rate=0.1, discount_factor=0.95, epsilon=1.0, epsilon_decay_rate=0.995, min_epsilon=0.01):
+    def __init__(self, action_space, env, learning_rate=0.1, discount_factor=0.95, epsilon=1.0, epsilon_decay_rate=0.995, min_epsilon=0.01, seed=None, q_table=None):
         """
         Initializes the Q-learning agent with hyperparameters.
 
@@ -19,6 +19,9 @@ class QLearningAgent:
             epsilon (float): The initial exploration rate (epsilon).
             epsilon_decay_rate (float): The rate at which epsilon decays.
             min_epsilon (float): The minimum value for epsilon.
+            seed (int): Seed for a private RNG; the global `random` module is used if None.
+            q_table (np.array): Initial Q-table to warm-start from (copied), e.g.
+                dp_solver.solve_q_table(env); zeros if None.
         """
         self.action_space = action_space
         self.learning_rate = learning_rate
@@ -26,12 +29,16 @@ class QLearningAgent:
         self.epsilon = epsilon
         self.epsilon_decay_rate = epsilon_decay_rate
         self.min_epsilon = min_epsilon
+        self.random = random.Random(seed) if seed is not None else random
+        self.np_rng = np.random.default_rng(seed)  # used by the batched methods
 
         # The state is [queue_length, server_status].
         # queue_length can go from 0 to env.max_queue.
         # server_status is 0 (down) or 1 (up).
         # The Q-table shape will be (max_queue + 1, 2, number_of_actions)
         self.q_table = np.zeros((env.max_queue + 1, 2, len(action_space)))
+        if q_table is not None:
+            self.q_table[...] = q_table
 
     def act(self, state):
         """
@@ -47,9 +54,9 @@ class QLearningAgent:
         queue_len, server_status = int(state[0]), int(state[1])
 
         # Epsilon-greedy exploration vs. exploitation
-        if random.random() < self.epsilon:
+        if self.random.random() < self.epsilon:
             # Exploration: choose a random action
-            return random.choice(self.action_space)
+            return self.random.choice(self.action_space)
         else:
             # Exploitation: choose the best action from the Q-table
             # The action is the index of the max Q-value
@@ -81,8 +88,73 @@ class QLearningAgent:
         # Update the Q-table
         self.q_table[queue_len, server_status, action] = new_q
 
+    def act_batch(self, states):
+        """
+        Epsilon-greedy actions for a batch of states (e.g. from VecDreamEnv).
+
+        Args:
+            states (np.array): Array of shape (N, 2) with [queue_length, server_status] rows.
+
+        Returns:
+            np.array: The chosen actions, shape (N,).
+        """
+        states = np.asarray(states)
+        queue_len, server_status = states[:, 0].astype(int), states[:, 1].astype(int)
+        actions = np.asarray(self.action_space)
+
+        # A single uniform draw decides both whether to explore and which action to try:
+        # u < epsilon explores, and u / epsilon is again uniform on [0, 1).
+        u = self.np_rng.random(len(states))
+        explore = u < self.epsilon
+        greedy = np.argmax(self.q_table[queue_len, server_status], axis=1)
+        random_idx = (u / max(self.epsilon, 1e-12) * len(actions)).astype(int)
+        return actions[np.where(explore, np.minimum(random_idx, len(actions) - 1), greedy)]
+
+    def learn_batch(self, states, actions, rewards, next_states):
+        """
+        Applies the Bellman update to a batch of transitions at once. TD errors are computed
+        from the current Q-table and accumulated per (state, action) with np.add.at. A pair
+        seen k times moves towards its mean target by 1 - (1 - alpha)^k, which is exactly
+        what k sequential updates with a shared target would do, so large minibatches with
+        many repeats stay stable.
+
+        Args:
+            states (np.array): Shape (N, 2).
+            actions (np.array): Shape (N,).
+            rewards (np.array): Shape (N,).
+            next_states (np.array): Shape (N, 2).
+        """
+        states, next_states = np.asarray(states), np.asarray(next_states)
+        queue_len, server_status = states[:, 0].astype(int), states[:, 1].astype(int)
+        next_queue_len, next_server_status = next_states[:, 0].astype(int), next_states[:, 1].astype(int)
+        actions = np.asarray(actions, dtype=int)
+
+        current_q = self.q_table[queue_len, server_status, actions]
+        max_next_q = self.q_table[next_queue_len, next_server_status].max(axis=1)
+        td = np.asarray(rewards) + self.discount_factor * max_next_q - current_q
+
+        flat = np.ravel_multi_index((queue_len, server_status, actions), self.q_table.shape)
+        td_sum = np.zeros(self.q_table.size)
+        counts = np.zeros(self.q_table.size)
+        np.add.at(td_sum, flat, td)
+        np.add.at(counts, flat, 1.0)
+        hit = np.flatnonzero(counts)
+        step = 1.0 - (1.0 - self.learning_rate) ** counts[hit]
+        self.q_table[np.unravel_index(hit, self.q_table.shape)] += step * td_sum[hit] / counts[hit]
+
+    def learn_from_replay(self, buffer, batch_size):
+        """
+        Samples a minibatch from an experience-replay buffer and learns from it.
+
+        Args:
+            buffer (ReplayBuffer): Source of stored transitions.
+            batch_size (int): Number of transitions to sample.
+        """
+        if len(buffer):
+            self.learn_batch(*buffer.sample(batch_size))
+
     def decay_epsilon(self):
         """
         Decays the epsilon value to reduce exploration over time.
         """
-        self.epsilon = max(self.min_epsilon, self.epsilon * self.epsilon_decay_rate)
\ No newline at end of file
+        self.epsilon = max(self.min_epsilon, self.epsilon * self.epsilon_decay_rate)
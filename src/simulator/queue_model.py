@@ -1,113 +1,735 @@
+from bisect import insort
+from collections import deque
+from dataclasses import dataclass
+from statistics import NormalDist
+
 import numpy as np
 
+from ..evaluation.sketch import DDSketch, SlidingWindowSketch
+from .events import (ARRIVAL, COMPLETION, DUP_COMPLETION, FAILURE, SERVICE_START,
+                     SPEC_TIMEOUT, EventQueue)
+from .distributions import Exponential, ServiceDistribution
+from .fault_engine import FaultSchedule
+from .job_queue import JobQueue
+
+# ρ_τ is clamped just below 1 so the idle budget never collapses to exactly zero
+RHO_CLAMP = 0.999
+
+
+@dataclass(frozen=True)
+class ServerSnapshot:
+    """
+    Compact, picklable state of a SpeculativeServer: parameters, clock, queue contents
+    (a copy-on-write buffer shared with the live server), the in-service job, pending
+    arrival/failures, RNG state and accounting counters. Latency history is left out,
+    so the size depends on the backlog, not on how long the run has been going.
+    """
+    params: dict
+    time: float
+    queue: tuple           # (buffer, head, size) for JobQueue.from_buffer
+    job: tuple             # in-service job or None
+    busy_since: float
+    next_arrival: tuple    # pending arrival or None
+    draws: np.ndarray      # buffered unit exponentials (never written in place)
+    draw_idx: int
+    rng_state: dict
+    failure_times: tuple   # pending injected failures
+    counters: dict
+    faults: object = None  # FaultSchedule or None
+    workload: object = None  # TraceWorkload cursor or None
+
+
 class SpeculativeServer:
     """
     Single-server queue with speculative timeout τ. 
-    Service times ~ Exp(mu). Speculation modeled as: if service exceeds τ, a duplicate is launched;
+    Service times ~ Exp(mu) by default, or any ServiceDistribution (see distributions)
+    rescaled to mean 1/mu, so mu stays the service rate. Speculation modeled as: if service exceeds τ, a duplicate is launched;
     effective completion is min(original residual, new sample). This changes the effective service distribution.
     We track utilization ρ_τ and compute an idle budget b = β * max(0, 1 - ρ_τ).
     This is a simplified model for research scaffolding.
+
+    The foreground is a discrete-event simulation: arrivals, service starts, speculation
+    timeouts, (duplicate) completions and failures sit in a heap and the clock jumps
+    straight to the next one, so latencies are true per-job sojourn times. They are kept
+    in streaming quantile sketches (cumulative and sliding-window), not a growing list.
+    step(dt)/metrics() are thin adapters over run_until() for tick-driven callers.
+    When a window is expected to hold at least batch_threshold events, it is drained
+    at once with a vectorized Lindley recursion over the ring-buffered queue.
+
+    E[S_τ] comes from the distribution (closed form, exact, or numerical integration)
+    and is memoized on (service, tau); ρ_τ just scales it by lam. Pass rho_mode="mc"
+    to force the Monte Carlo estimator.
+
+    A FaultSchedule (see fault_engine) modulates mu and lam over time: job completion
+    and arrival times are found by integrating the rate profiles, a node crash also kills
+    the in-service attempt, and every fault or injected failure opens an incident that
+    recovers at the first completion after the fault has ended with the backlog back to
+    its pre-fault size. failures/recoveries hold the paired timestamps; see mttr().
+
+    With a workload (see trace.TraceWorkload; set_workload() swaps it mid-run) arrivals
+    and service times are replayed from a recorded trace instead of being drawn; lam then
+    only feeds ρ_τ and the idle budget (TraceWorkload.rate() is a good value), and
+    load-spike faults have no effect.
+
+    tau may be changed at any time (TauTuner does, between windows); a job takes the τ
+    in force when it enters service, so the one in service keeps its speculation timeout.
     """
-    def __init__(self, mu: float, lam: float, tau: float, beta: float=0.2, seed: int=0):
+    def __init__(self, mu: float, lam: float, tau: float, beta: float=0.2, seed: int=0,
+                 rho_mode: str="auto", rho_samples: int=2000, draw_chunk: int=256,
+                 batch_threshold: int=32, latency_sketch=DDSketch, latency_window: float=60.0,
+                 faults: FaultSchedule=None, workload=None, service: ServiceDistribution=None):
         assert mu > 0 and lam >= 0 and tau >= 0
-        self.mu = mu      # service rate
+        assert rho_mode in ("auto", "analytic", "mc")
+        self._shape = service if service is not None else Exponential(1.0)
+        self._draws = np.empty((3, 0))  # unit-rate exponentials (interarrival), then service draws
+        self._draw_idx = 0
+        self.mu = mu      # service rate; also sets self.service
         self.lam = lam    # arrival rate
         self.tau = tau    # speculation timeout
         self.beta = beta  # idle-budget scaling
         self.rng = np.random.default_rng(seed)
 
+        # ρ_τ engine
+        self.rho_mode = rho_mode
+        self.rho_samples = rho_samples
+        self._rho_cache = {}
+
         # state
-        self.queue = []
+        self.queue = JobQueue()  # waiting jobs: arrival time, original and duplicate service
         self.time = 0.0
-        self.busy_until = 0.0
-        self.latencies = []
+        # per-job sojourn times, kept as bounded-memory streaming sketches
+        self.latency = latency_sketch()
+        self.latency_window = SlidingWindowSketch(latency_window, factory=latency_sketch)
         self.completions = 0
-        self.failures = []  # times of injected failures (for MTTR calc)
-        self.recoveries = []
+        self.speculations = 0  # duplicate launches
+        self.dup_wins = 0      # completions where the duplicate finished first
+        self.failures = []    # fault starts / injected failures (for MTTR calc)
+        self.recoveries = []  # recoveries[i] closes failures[i]
+        self._incidents = deque()  # open incidents: (start, fault_end, backlog_before)
 
         # background (dream) accounting
         self.dream_cpu_secs = 0.0
         self.dream_events = 0
+        self.last_dream_time = 0.0  # dream CPU granted in the most recent step
+        self.last_idle_gaps = []    # (start, end) idle intervals of the most recent step
         self.last_failure_end = None
 
+        # discrete-event core
+        self.events = EventQueue()
+        self.draw_chunk = draw_chunk
+        self.batch_threshold = batch_threshold
+        self._next_arrival = None  # (time, service, duplicate) of the pending arrival
+        self._arrival_id = 0       # bumped when the pending arrival is consumed in bulk
+        self._failure_times = []  # sorted (time, payload) of pending FAILURE events
+        self.faults = None
+        self.workload = workload
+        self._fault_gen = 0       # bumped by apply_faults; older fault events are stale
+        self._job = None  # in service: [arrival, service, duplicate, start, duplicate_launched, tau]
+        self._token = 0   # bumped whenever the in-service attempt changes; stale events are skipped
+        self._busy_since = 0.0
+        self.busy_time = 0.0
+        self._idle_since = 0.0  # start of the current idle period; None while busy
+        self._gaps = None       # idle intervals ended by an arrival, collected during step()
+        if faults is not None:
+            self.apply_faults(faults, replan=False)
+
+    @property
+    def mu(self):
+        return self._mu
+
+    @mu.setter
+    def mu(self, value):
+        """Changing the service rate rescales the distribution and drops buffered draws."""
+        self._mu = value
+        self.service = self._shape.with_mean(1.0 / value)
+        self._draw_idx = self._draws.shape[1]
+
+    def set_service(self, service: ServiceDistribution):
+        """Swap the service-time family (kept at mean 1/mu); buffered draws are discarded."""
+        self._shape = service
+        self.mu = self._mu
+
+    # --- snapshot / fork -------------------------------------------------------
+
+    _COUNTERS = ("completions", "speculations", "dup_wins", "busy_time",
+                 "dream_cpu_secs", "dream_events", "last_dream_time")
+
+    def snapshot(self):
+        """O(1) snapshot; the queue buffer is shared copy-on-write with this server."""
+        return ServerSnapshot(
+            params={"mu": self.mu, "lam": self.lam, "tau": self.tau, "beta": self.beta,
+                    "rho_mode": self.rho_mode, "rho_samples": self.rho_samples,
+                    "draw_chunk": self.draw_chunk, "batch_threshold": self.batch_threshold,
+                    "latency_sketch": self.latency_window.factory,
+                    "latency_window": self.latency_window.window,
+                    "service": self._shape},
+            faults=self.faults,
+            workload=self.workload.fork() if self.workload is not None else None,
+            time=self.time,
+            queue=self.queue.share(),
+            job=tuple(self._job) if self._job is not None else None,
+            busy_since=self._busy_since,
+            next_arrival=self._next_arrival,
+            draws=self._draws,
+            draw_idx=self._draw_idx,
+            rng_state=self.rng.bit_generator.state,
+            failure_times=tuple(t for t, p in self._failure_times if p is None),
+            counters={k: getattr(self, k) for k in self._COUNTERS},
+        )
+
+    @classmethod
+    def from_snapshot(cls, snap: ServerSnapshot, seed=None):
+        """
+        Rebuild a server from a snapshot. With seed=None the fork continues the exact
+        random stream of the original (common random numbers across what-if branches);
+        with a seed it draws a fresh, independent future from the same state.
+        Latency sketches and open incidents start empty.
+        """
+        server = cls(seed=0 if seed is None else seed, **snap.params)
+        server.time = snap.time
+        if snap.faults is not None:
+            server.apply_faults(snap.faults, replan=False)
+        server.queue = JobQueue.from_buffer(*snap.queue)
+        for k, v in snap.counters.items():
+            setattr(server, k, v)
+        server._busy_since = snap.busy_since
+        server._idle_since = None if snap.job is not None else snap.time
+        if snap.workload is not None:
+            server.workload = snap.workload.fork()  # a trace replays the same future either way
+        if seed is None:
+            server.rng.bit_generator.state = snap.rng_state
+            server._draws, server._draw_idx = snap.draws, snap.draw_idx
+        if seed is None or snap.workload is not None:
+            if snap.next_arrival is not None:
+                server._next_arrival = snap.next_arrival
+                server._arrival_id += 1
+                server.events.push(snap.next_arrival[0], ARRIVAL, server._arrival_id)
+        else:
+            server._schedule_arrival(snap.time)  # Poisson arrivals are memoryless
+        if snap.job is not None:
+            server._job = list(snap.job)
+            server._schedule_job(snap.time)
+        for t in snap.failure_times:
+            server.inject_failure(t)
+        return server
+
+    def fork(self, seed=None):
+        """Copy-on-write branch of the live state; see from_snapshot for `seed`."""
+        return self.from_snapshot(self.snapshot(), seed)
+
+    def draw_service_batch(self, n):
+        return self.service.sample(self.rng, n)
+
     def draw_service(self):
-        return self.rng.exponential(1.0/self.mu)
+        return float(self.draw_service_batch(1)[0])
+
+    def _speculate(self, s, s2):
+        """Apply the τ cutoff elementwise: τ + min(s-τ, s2) where s > τ, else s."""
+        spec = s > self.tau
+        eff = np.where(spec, self.tau + np.minimum(s - self.tau, s2), s)
+        return eff, spec
+
+    def effective_service_batch(self, n):
+        """
+        Draw n originals, then n duplicates, and apply speculation in one shot.
+        Returns (effective_service, speculation_mask); the mask marks jobs that
+        launched a duplicate. Draw order is fixed, so results are reproducible per seed.
+        """
+        s = self.draw_service_batch(n)
+        s2 = self.draw_service_batch(n)
+        return self._speculate(s, s2)
 
     def effective_service_with_speculation(self, s):
         """
-        If s <= τ, no speculation. Else, at τ launch a duplicate with fresh Exp(mu).
+        If s <= τ, no speculation. Else, at τ launch a duplicate with a fresh service draw.
         Remaining time of original after τ is (s-τ). Completion is τ + min(s-τ, s2).
         Expected value used for utilization estimate; here we simulate sample-wise.
         """
         if s <= self.tau:
             return s, False
+        eff, _ = self._speculate(np.asarray(s), self.draw_service_batch(1)[0])
+        return float(eff), True
+
+    def expected_service_tau(self):
+        """
+        E[S_τ] = E[min(S, τ)] + P(S > τ) * E[min(S-τ, S')], from the service distribution.
+        For Exp(mu) this is (1 - e^{-μτ})/μ + e^{-μτ}/(2μ), since the residual S-τ is
+        again Exp(mu) and the min of two Exp(mu) is Exp(2mu).
+        """
+        return self.service.expected_service_tau(self.tau)
+
+    def estimate_service_tau_mc(self, samples=None, confidence=0.95):
+        """
+        Monte Carlo estimate of E[S_τ]. Returns (mean, half_width) where half_width is
+        the normal-approximation confidence interval at the given level.
+        """
+        samples = samples or self.rho_samples
+        eff, _ = self.effective_service_batch(samples)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+        half_width = z * eff.std(ddof=1) / np.sqrt(samples) if samples > 1 else np.inf
+        return float(eff.mean()), float(half_width)
+
+    def _service_tau(self, samples=None, mode=None, confidence=0.95):
+        mode = mode or self.rho_mode
+        if mode == "auto":
+            mode = "analytic"
+        if mode == "analytic":
+            key = (self.service.key(), self.tau, mode)
         else:
-            # duplicate
-            s2 = self.draw_service()
-            rem = s - self.tau
-            return self.tau + min(rem, s2), True
-
-    def estimate_rho_tau(self, samples=2000):
-        # Monte Carlo estimate of E[S_tau] to compute utilization ρ_τ = λ E[S_τ]
-        ss = self.rng.exponential(1.0/self.mu, size=samples)
-        eff = []
-        for s in ss:
-            e, _ = self.effective_service_with_speculation(s)
-            eff.append(e)
-        est = float(np.mean(eff))
-        return min(0.999, self.lam * est)
+            key = (self.service.key(), self.tau, mode, samples or self.rho_samples, confidence)
+        hit = self._rho_cache.get(key)
+        if hit is None:
+            if mode == "analytic":
+                hit = (float(self.expected_service_tau()), 0.0)
+            else:
+                hit = self.estimate_service_tau_mc(samples, confidence)
+            if len(self._rho_cache) >= 256:
+                self._rho_cache.clear()
+            self._rho_cache[key] = hit
+        return hit
+
+    def estimate_rho_tau(self, samples=None, mode=None):
+        """
+        Utilization ρ_τ = λ E[S_τ], clamped to RHO_CLAMP. E[S_τ] is memoized, so repeated
+        calls are free until mu, tau or the service distribution changes.
+        """
+        est, _ = self._service_tau(samples, mode)
+        return min(RHO_CLAMP, self.lam * est)
+
+    def rho_tau_ci(self, samples=None, mode=None, confidence=0.95):
+        """(low, high) confidence bounds on ρ_τ; degenerate for the analytic path."""
+        est, hw = self._service_tau(samples, mode, confidence)
+        return (min(RHO_CLAMP, self.lam * max(0.0, est - hw)), min(RHO_CLAMP, self.lam * (est + hw)))
+
+    def invalidate_rho_cache(self):
+        """Drop memoized E[S_τ] values, e.g. after swapping the RNG or the service model."""
+        self._rho_cache.clear()
 
     def idle_budget(self):
         rho = self.estimate_rho_tau()
         return max(0.0, self.beta * (1.0 - rho))
 
+    # --- discrete-event core ---------------------------------------------------
+
+    def _refill_draws(self):
+        """Row 0: unit exponentials for interarrivals; rows 1-2: original and duplicate service."""
+        k = self.draw_chunk
+        self._draws = np.vstack((self.rng.standard_exponential((1, k)),
+                                 self.draw_service_batch(2 * k).reshape(2, k)))
+        self._draw_idx = 0
+
+    def _next_draw(self):
+        if self._draw_idx >= self._draws.shape[1]:
+            self._refill_draws()
+        u = self._draws[:, self._draw_idx]
+        self._draw_idx += 1
+        return u
+
+    def _schedule_arrival(self, now):
+        if self.workload is not None:
+            self._next_arrival = self.workload.pop()
+            if self._next_arrival is not None:
+                self._arrival_id += 1
+                self.events.push(self._next_arrival[0], ARRIVAL, self._arrival_id)
+            return
+        if self.lam <= 0:
+            self._next_arrival = None
+            return
+        u = self._next_draw()
+        t = now + u[0] / self.lam if self.faults is None else self.faults.lam.advance(now, u[0] / self.lam)
+        self._next_arrival = (t, u[1], u[2])
+        self._arrival_id += 1
+        self.events.push(self._next_arrival[0], ARRIVAL, self._arrival_id)
+
+    @property
+    def next_arrival_time(self):
+        """Time of the pending arrival; None if none is scheduled (yet, or ever again)."""
+        return self._next_arrival[0] if self._next_arrival is not None else None
+
+    def set_workload(self, workload):
+        """
+        Replace the arrival process from now on: a TraceWorkload (its timestamps are
+        absolute simulated times, see its `start`) or None for Poisson arrivals at lam.
+        The pending arrival is dropped and the next one comes from the new source.
+        """
+        self.workload = workload
+        self._arrival_id += 1  # the dropped arrival's event is now stale
+        self._next_arrival = None
+        self._schedule_arrival(self.time)
+
+    def _advance(self, t0, work):
+        """Time at which `work` nominal service seconds begun at t0 are done."""
+        return t0 + work if self.faults is None else self.faults.mu.advance(t0, work)
+
+    def _job_plan(self, job):
+        """
+        (spec_time, finish, by_duplicate) for a job: spec_time is when its duplicate
+        launches (None if the original finishes within τ of wall-clock time).
+        """
+        _, s, s2, start, _, tau = job
+        finish = self._advance(start, s)
+        spec_time = start + tau
+        if finish <= spec_time:
+            return None, finish, False
+        dup_finish = self._advance(spec_time, s2)
+        if dup_finish < finish:
+            return spec_time, dup_finish, True
+        return spec_time, finish, False
+
+    def _schedule_job(self, now):
+        """(Re)schedule the next event of the in-service job as seen from time now."""
+        job = self._job
+        spec_time, finish, by_dup = self._job_plan(job)
+        self._token += 1
+        if spec_time is not None and spec_time > now:
+            self.events.push(spec_time, SPEC_TIMEOUT, self._token)
+            return
+        if spec_time is not None and not job[4]:
+            job[4] = True
+            self.speculations += 1
+        self.events.push(finish, DUP_COMPLETION if by_dup else COMPLETION, self._token)
+
+    def _end_idle(self, now):
+        if self._idle_since is not None and self._gaps is not None:
+            self._gaps.append((float(self._idle_since), float(now)))
+        self._idle_since = None
+
+    def _start_service(self, now):
+        self._end_idle(now)
+        arrival, s, s2 = self.queue.popleft()
+        self._job = [arrival, s, s2, now, False, self.tau]
+        self._busy_since = now
+        self._schedule_job(now)
+
+    def _complete(self, now, by_duplicate):
+        lat = now - self._job[0]
+        self.latency.add(lat)
+        self.latency_window.add(lat, now)
+        self.completions += 1
+        self.dup_wins += by_duplicate
+        self.busy_time += now - self._busy_since
+        self._job = None
+        if self._incidents:
+            self._check_recovery(now)
+        if self.queue:
+            self.events.push(now, SERVICE_START)
+        else:
+            self._idle_since = now
+
+    def _check_recovery(self, now):
+        """Close open incidents (oldest first) whose fault is over and whose backlog has drained."""
+        while self._incidents:
+            _, end, backlog = self._incidents[0]
+            if now < end or self.q_len > backlog:
+                return
+            self._incidents.popleft()
+            self.recoveries.append(now)
+            self.last_failure_end = end
+
+    def _fail(self, now, payload=None):
+        """
+        Start of an injected failure (payload None) or of scheduled fault `payload`.
+        Either opens an incident. Failures and node crashes kill the original attempt of
+        the in-service job: a running duplicate survives and finishes the job; otherwise
+        the job restarts from scratch with fresh service draws. Other fault kinds only
+        modulate the rates, which the schedule already accounts for.
+        """
+        self._failure_times.remove((now, payload))
+        self.failures.append(now)
+        end = now
+        if payload is not None:
+            i = payload[1]
+            end = float(self.faults.ends[i])
+            self._push_fault(i + 1)
+        self._incidents.append((now, end, self.q_len))
+        if self._job is None or (payload is not None and not self.faults.kills(payload[1])):
+            return
+        if self._job[4]:
+            self._job[1] = np.inf  # the original never finishes; the duplicate wins
+            self._schedule_job(now)
+            return
+        u = self._next_draw()
+        self.busy_time += now - self._busy_since
+        self.queue.appendleft(self._job[0], u[1], u[2])
+        self._start_service(now)
+
+    def inject_failure(self, at=None):
+        """Schedule a failure of the in-service attempt (default: now)."""
+        t = self.time if at is None else at
+        insort(self._failure_times, (t, None), key=lambda x: x[0])
+        self.events.push(t, FAILURE)
+
+    def _push_fault(self, i):
+        """Schedule the start of fault i of the current schedule, if there is one."""
+        if i < len(self.faults):
+            t = float(self.faults.starts[i])
+            payload = (self._fault_gen, i)
+            insort(self._failure_times, (t, payload), key=lambda x: x[0])
+            self.events.push(t, FAILURE, payload)
+
+    def apply_faults(self, schedule: FaultSchedule, replan=True):
+        """
+        Switch to a new fault schedule from the current time on (None clears it). Faults
+        that started before now are not replayed. With replan, the in-service job and the
+        pending arrival are rescheduled under the new rate profiles.
+        """
+        self._fault_gen += 1
+        self._failure_times = [(t, p) for t, p in self._failure_times if p is None]
+        self.faults = schedule
+        if schedule is not None:
+            self._push_fault(schedule.next_index(self.time))
+        if replan:
+            if self._job is not None:
+                self._schedule_job(self.time)
+            if self._next_arrival is not None:
+                self._schedule_arrival(self.time)
+
+    def _handle(self, now, kind, payload):
+        if kind == ARRIVAL:
+            if payload != self._arrival_id:
+                return
+            self.queue.append(*self._next_arrival)
+            self._schedule_arrival(now)
+            if self._job is None:
+                self.events.push(now, SERVICE_START)
+        elif kind == SERVICE_START:
+            if self._job is None and self.queue:
+                self._start_service(now)
+        elif kind == FAILURE:
+            if payload is None or payload[0] == self._fault_gen:
+                self._fail(now, payload)
+        elif payload == self._token:
+            if kind == SPEC_TIMEOUT:
+                self._schedule_job(now)
+            else:
+                self._complete(now, kind == DUP_COMPLETION)
+
+    def _bulk_arrivals(self, t_end):
+        """
+        Consume the pending arrival and every further arrival up to t_end in one pass.
+        Uses the same draws, in the same order, as the event path.
+        """
+        if self._next_arrival is None:
+            return np.empty((3, 0))
+        if self.workload is not None:
+            if self._next_arrival[0] > t_end:
+                return np.empty((3, 0))
+            jobs = np.hstack((np.array(self._next_arrival).reshape(3, 1), self.workload.pop_until(t_end)))
+            self._schedule_arrival(t_end)
+            return jobs
+        first = self._next_arrival
+        cols = [np.array(first).reshape(3, 1)]
+        t = first[0]
+        while t <= t_end:
+            if self._draw_idx >= self._draws.shape[1]:
+                self._refill_draws()
+            u = self._draws[:, self._draw_idx:]
+            times = np.cumsum(np.concatenate(([t], u[0] / self.lam)))[1:]
+            k = min(int(np.searchsorted(times, t_end, side="right")) + 1, len(times))
+            cols.append(np.vstack((times[:k], u[1, :k], u[2, :k])))
+            self._draw_idx += k
+            t = times[k - 1]
+        jobs = np.hstack(cols)
+        if self.faults is not None and jobs.shape[1] > 1:
+            # the first arrival past t_end may land in a fault: integrate its gap
+            prev, last = jobs[0, -2], jobs[0, -1]
+            jobs[0, -1] = self.faults.lam.advance(prev, last - prev)
+        self._next_arrival = tuple(jobs[:, -1].tolist())
+        self._arrival_id += 1
+        self.events.push(self._next_arrival[0], ARRIVAL, self._arrival_id)
+        return jobs[:, :-1]
+
+    def _recover_in_window(self, job, t_end):
+        """
+        Replay the window's departures against open incidents: the backlog after each
+        departure is (jobs arrived so far) - (departures so far). Called by _drain_window
+        after the window's arrivals are queued and before any state changes.
+        """
+        d0 = self._job_plan(job)[1] if job is not None else self.time
+        if d0 > t_end:
+            return
+        a, s, s2 = self.queue.head(len(self.queue))
+        eff, _ = self._speculate(s, s2)
+        csum = np.cumsum(eff)
+        depart = csum + np.maximum(d0, np.maximum.accumulate(a - (csum - eff)))
+        depart = depart[:int(np.searchsorted(depart, t_end, side="right"))]
+        if job is not None:
+            depart = np.concatenate(([d0], depart))
+        after = (job is not None) + np.searchsorted(a, depart, side="right") - np.arange(1, len(depart) + 1)
+        j = 0
+        while self._incidents and j < len(depart):
+            _, end, backlog = self._incidents[0]
+            hit = np.flatnonzero((depart[j:] >= end) & (after[j:] <= backlog))
+            if not len(hit):
+                return
+            j += int(hit[0])
+            self._incidents.popleft()
+            self.recoveries.append(float(depart[j]))
+            self.last_failure_end = end
+
+    def _drain_window(self, t_end):
+        """
+        Vectorized equivalent of the event loop over (time, t_end] for a FIFO backlog:
+        departures follow the Lindley recursion D_i = max(A_i, D_{i-1}) + E_i, evaluated
+        as cumsum(E) + running max of (A - cumsum(E)).
+        """
+        now = self.time
+        arrivals = self._bulk_arrivals(t_end)
+        self.queue.extend(*arrivals)
+
+        d0 = now
+        job = self._job
+        idle_at_start = job is None
+        if self._incidents:
+            self._recover_in_window(job, t_end)
+        if job is not None:
+            spec_time, d0, by_dup = self._job_plan(job)
+            if d0 > t_end:
+                self.time = t_end
+                self._schedule_job(t_end)
+                return
+            arrival = job[0]
+            self.latency.add(d0 - arrival)
+            self.latency_window.add(d0 - arrival, d0)
+            self.completions += 1
+            self.speculations += spec_time is not None and not job[4]
+            self.dup_wins += by_dup
+            self.busy_time += d0 - self._busy_since
+            self._job = None
+
+        n = len(self.queue)
+        m = min(n, max(64, 2 * int((t_end - now) * self.mu) + 1))
+        while True:
+            a, s, s2 = self.queue.head(m)
+            spec = s > self.tau
+            eff = np.where(spec, self.tau + np.minimum(s - self.tau, s2), s)
+            csum = np.cumsum(eff)
+            depart = csum + np.maximum(d0, np.maximum.accumulate(a - (csum - eff)))
+            starts = depart - eff
+            if m == n or starts[-1] > t_end:
+                break
+            m = min(n, 2 * m)
+
+        k = int(np.searchsorted(depart, t_end, side="right"))
+        started = k + int(k < m and starts[k] <= t_end)
+        if self._gaps is not None and started:
+            free = np.concatenate(([d0], depart[:started - 1]))
+            gap = starts[:started] - free > 1e-9  # cumsum round-off is not an idle gap
+            if idle_at_start and self._idle_since is not None:
+                free[0], gap[0] = self._idle_since, True
+            self._gaps.extend(zip(free[gap].tolist(), starts[:started][gap].tolist()))
+        if started:
+            self._idle_since = None
+        if k:
+            lat = depart[:k] - a[:k]
+            self.latency.add_batch(lat)
+            self.latency_window.add_batch(lat, depart[:k])
+        self.completions += k
+        self.speculations += int(spec[:k].sum())
+        self.dup_wins += int((spec[:k] & (s2[:k] < s[:k] - self.tau)).sum())
+        self.busy_time += float(eff[:k].sum())
+        self.queue.drop(k)
+
+        self.time = t_end
+        if k < m and starts[k] <= t_end:
+            self.queue.drop(1)
+            self._job = [float(a[k]), float(s[k]), float(s2[k]), float(starts[k]), False, self.tau]
+            self._busy_since = self._job[3]
+            self._schedule_job(t_end)
+        else:
+            self._token += 1  # the finished job's pending event is now stale
+            if k:
+                self._idle_since = float(depart[k - 1])
+            elif not idle_at_start:
+                self._idle_since = d0
+        # the window superseded events the loop never popped; keep only live ones
+        self.events.retain(self._is_live)
+
+    def _is_live(self, kind, payload):
+        """Whether a queued event would still do anything when popped (see _handle)."""
+        if kind == ARRIVAL:
+            return payload == self._arrival_id
+        if kind == SERVICE_START:
+            return self._job is None and bool(self.queue)
+        if kind == FAILURE:
+            return payload is None or payload[0] == self._fault_gen
+        return payload == self._token
+
+    def run_until(self, t_end: float):
+        """Process every event up to t_end, jumping the clock from event to event."""
+        if self._next_arrival is None:
+            self._schedule_arrival(self.time)
+        if ((self.lam + self.mu) * (t_end - self.time) >= self.batch_threshold
+                and not (self._failure_times and self._failure_times[0][0] <= t_end)
+                and not (self.faults is not None and self.faults.overlaps(self.time, t_end))):
+            self._drain_window(t_end)
+            return
+        events = self.events
+        while events.peek_time() <= t_end:
+            now, kind, payload = events.pop()
+            self.time = now
+            self._handle(now, kind, payload)
+        self.time = t_end
+
+    def mttr(self):
+        """Mean time from failure/fault start to recovery over closed incidents, 0 if none yet."""
+        n = len(self.recoveries)
+        if not n:
+            return 0.0
+        return float(np.mean(np.subtract(self.recoveries, self.failures[:n])))
+
+    @property
+    def q_len(self):
+        """Jobs in the system: waiting plus the one in service."""
+        return len(self.queue) + (self._job is not None)
+
+    def busy_total(self, t: float=None):
+        """Busy seconds up to t (default: now), counting the in-service job's elapsed time."""
+        t = self.time if t is None else t
+        return self.busy_time + (t - self._busy_since if self._job is not None else 0.0)
+
     def step(self, dt: float, inject_failure=False):
         """
         Advance simulated time by dt. During dt, we process foreground work first.
         Any leftover idle fraction is available to run background dreams, bounded by budget.
         """
-        # Foreground: approximate fluid processing at rate 1 while busy
-        # Generate arrivals in dt (Poisson)
-        arrivals = self.rng.poisson(self.lam * dt)
-        for _ in range(arrivals):
-            s = self.draw_service()
-            eff_s, _ = self.effective_service_with_speculation(s)
-            self.queue.append(eff_s)
-
-        # Process queue
-        proc_time = dt
-        while proc_time > 1e-12 and self.queue:
-            job = self.queue[0]
-            if job <= proc_time:
-                proc_time -= job
-                self.latencies.append(job)
-                self.completions += 1
-                self.queue.pop(0)
-            else:
-                self.queue[0] = job - proc_time
-                proc_time = 0.0
+        t0 = self.time
+        if inject_failure:
+            self.inject_failure(t0)
+        busy0 = self.busy_total(t0)
+        self._gaps = []
+        self.run_until(t0 + dt)
+        if self._idle_since is not None:
+            self._gaps.append((self._idle_since, self.time))
+        self.last_idle_gaps = [(max(a, t0), b) for a, b in self._gaps if b > t0 and b > a]
+        self._gaps = None
 
-        # Background dreams: use remaining proc_time as idle; bounded by budget
-        idle = proc_time
+        # Background dreams: use the server's idle time in the window; bounded by budget
+        idle = max(0.0, dt - (self.busy_total(self.time) - busy0))
         budget = self.idle_budget() * dt  # budget scaled over dt window
         dream_time = min(idle, budget)
+        self.last_dream_time = dream_time
         if dream_time > 0:
             self.dream_cpu_secs += dream_time
             self.dream_events += 1
 
-        self.time += dt
-
     def metrics(self):
-        p = np.percentile(self.latencies, [50, 95, 99]) if self.latencies else [np.nan]*3
+        p = self.latency.quantiles([0.50, 0.95, 0.99])
+        pw = self.latency_window.quantiles([0.99], self.time)
         return {
             "time": self.time,
             "completions": self.completions,
-            "q_len": len(self.queue),
+            "speculations": self.speculations,
+            "dup_wins": self.dup_wins,
+            "q_len": self.q_len,
             "lat_p50": float(p[0]),
             "lat_p95": float(p[1]),
             "lat_p99": float(p[2]),
+            "lat_p99_window": float(pw[0]),
             "rho_tau_est": float(self.estimate_rho_tau()),
             "idle_budget": float(self.idle_budget()),
             "dream_cpu_secs": float(self.dream_cpu_secs),
             "dream_events": int(self.dream_events),
+            "failures": len(self.failures),
+            "mttr": self.mttr(),
         }
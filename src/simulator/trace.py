@@ -0,0 +1,145 @@
+import os
+import time
+
+import numpy as np
+
+COLUMNS = ("arrival", "service", "duplicate")
+
+
+def write_trace(path, arrivals, service, duplicate=None):
+    """Write a columnar trace: one .npy file per column in directory `path`."""
+    os.makedirs(path, exist_ok=True)
+    for name, col in zip(COLUMNS, (arrivals, service, duplicate)):
+        if col is not None:
+            np.save(os.path.join(path, name + ".npy"), np.asarray(col, dtype=np.float64))
+
+
+def synthetic_trace(path, n, lam, mu, chunk=1 << 20, seed=0):
+    """Write an n-row Poisson/exponential trace chunk by chunk, never holding it all in memory."""
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    arr = np.lib.format.open_memmap(os.path.join(path, "arrival.npy"), mode="w+", dtype=np.float64, shape=(n,))
+    svc = np.lib.format.open_memmap(os.path.join(path, "service.npy"), mode="w+", dtype=np.float64, shape=(n,))
+    t = 0.0
+    for lo in range(0, n, chunk):
+        k = min(chunk, n - lo)
+        times = t + np.cumsum(rng.exponential(1.0 / lam, k))
+        arr[lo:lo + k] = times
+        svc[lo:lo + k] = rng.exponential(1.0 / mu, k)
+        t = times[-1]
+    arr.flush()
+    svc.flush()
+
+
+class TraceWorkload:
+    """
+    Arrival source replaying a recorded trace: sorted arrival timestamps plus service
+    durations (and optionally duplicate-attempt durations), read through memory maps
+    one chunk at a time. Without a duplicate column, a duplicate's service time is
+    resampled from the service times of the same chunk. Timestamps are rebased so the
+    first arrival is at `start`.
+
+    SpeculativeServer(workload=...) pulls jobs from it instead of drawing Poisson
+    arrivals; fork() gives an O(1) independent cursor over the same files.
+    """
+    def __init__(self, arrivals, service, duplicate=None, chunk=1 << 16, start=0.0, seed=0):
+        assert len(arrivals) == len(service)
+        self.arrivals = arrivals
+        self.service = service
+        self.duplicate = duplicate
+        self.chunk = chunk
+        self.seed = seed
+        self.offset = start - float(arrivals[0]) if len(arrivals) else 0.0
+        self.pos = 0
+        self._lo = self._hi = 0
+        self._cols = np.empty((3, 0))
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        """
+        Memory-map a trace: a directory of arrival.npy / service.npy [/ duplicate.npy],
+        or a single structured .npy with fields of those names.
+        """
+        if os.path.isdir(path):
+            cols = [os.path.join(path, c + ".npy") for c in COLUMNS]
+            arrivals, service, duplicate = (np.load(p, mmap_mode="r") if os.path.exists(p) else None for p in cols)
+        else:
+            table = np.load(path, mmap_mode="r")
+            arrivals, service = table["arrival"], table["service"]
+            duplicate = table["duplicate"] if "duplicate" in table.dtype.names else None
+        return cls(arrivals, service, duplicate, **kwargs)
+
+    def __len__(self):
+        return len(self.arrivals)
+
+    def remaining(self):
+        return len(self.arrivals) - self.pos
+
+    def rate(self):
+        """Mean arrival rate of the whole trace (jobs per second)."""
+        n = len(self.arrivals)
+        return (n - 1) / float(self.arrivals[-1] - self.arrivals[0]) if n > 1 else 0.0
+
+    def fork(self):
+        other = object.__new__(TraceWorkload)
+        other.__dict__.update(self.__dict__)
+        return other
+
+    def _load(self, pos):
+        """Materialize the chunk containing row pos as a (3, k) array."""
+        lo = pos - pos % self.chunk
+        hi = min(lo + self.chunk, len(self.arrivals))
+        svc = np.asarray(self.service[lo:hi], dtype=np.float64)
+        if self.duplicate is not None:
+            dup = np.asarray(self.duplicate[lo:hi], dtype=np.float64)
+        else:
+            rng = np.random.default_rng([self.seed, lo // self.chunk])  # same draws in every fork
+            dup = svc[rng.integers(hi - lo, size=hi - lo)]
+        self._cols = np.vstack((np.asarray(self.arrivals[lo:hi], dtype=np.float64) + self.offset, svc, dup))
+        self._lo, self._hi = lo, hi
+
+    def pop(self):
+        """Next job as (arrival, service, duplicate), or None once the trace is exhausted."""
+        if self.pos >= len(self.arrivals):
+            return None
+        if not self._lo <= self.pos < self._hi:
+            self._load(self.pos)
+        job = self._cols[:, self.pos - self._lo]
+        self.pos += 1
+        return tuple(job.tolist())
+
+    def pop_until(self, t_end):
+        """Every remaining job arriving at or before t_end, as a (3, k) array."""
+        parts = []
+        while self.pos < len(self.arrivals):
+            if not self._lo <= self.pos < self._hi:
+                self._load(self.pos)
+            cols = self._cols[:, self.pos - self._lo:]
+            k = int(np.searchsorted(cols[0], t_end, side="right"))
+            parts.append(cols[:, :k])
+            self.pos += k
+            if k < cols.shape[1]:
+                break
+        return np.hstack(parts) if parts else np.empty((3, 0))
+
+
+def replay(server, window=10.0, t_end=None, workload=None):
+    """
+    Run a trace-driven server until its workload is exhausted and the backlog has
+    drained (or until t_end), in windows of `window` simulated seconds. A workload, if
+    given, replaces the server's arrival process first (SpeculativeServer.set_workload).
+    Returns replay throughput: simulated events (arrivals + completions) per wall second.
+    """
+    if workload is not None:
+        server.set_workload(workload)
+    workload = server.workload
+    pos0, done0 = workload.pos, server.completions
+    t0 = time.perf_counter()
+    while t_end is None or server.time < t_end:
+        if workload.remaining() == 0 and server.next_arrival_time is None and server.q_len == 0:
+            break
+        server.run_until(server.time + window if t_end is None else min(t_end, server.time + window))
+    wall = time.perf_counter() - t0
+    events = (workload.pos - pos0) + (server.completions - done0)
+    return {"events": events, "wall_secs": wall, "events_per_sec": events / wall if wall > 0 else float("inf"),
+            "sim_time": server.time}
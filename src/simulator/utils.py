@@ -1,3 +1,5 @@
+import random
+
 import numpy as np
 
 def compute_metrics(env: "DreamEnv"):
@@ -25,4 +27,101 @@ def compute_mttr(env: "DreamEnv"):
     """
     if not env.server_down_time:
         return 0  # No downtime occurred in this episode
-    return np.mean(env.server_down_time)
\ No newline at end of file
+    return np.mean(env.server_down_time)
+
+def _reseed(obj, seed):
+    """Fresh streams from `seed` for every RNG attribute, the shared `random` module included."""
+    for k, v in list(vars(obj).items()):
+        if isinstance(v, random.Random) or v is random:
+            setattr(obj, k, random.Random(seed))
+        elif isinstance(v, np.random.Generator):
+            setattr(obj, k, np.random.default_rng(seed))
+
+
+_HISTORIES = ("reward", "throughput", "drop_rate", "mttr")
+
+
+def run_experiment(agent, episodes=500, env=None, sink=None, verbose=True, seed=None, cache=None):
+    """
+    Runs episodes of `agent` on `env` (a default DreamEnv if None), learning and decaying
+    epsilon when the agent supports it. Returns the per-episode rewards, throughputs,
+    drop rates and MTTRs as float arrays, or streams them as rows into `sink` and
+    returns the sink.
+
+    A seed reseeds every RNG of the env and the agent so the run is repeatable. With a
+    seed and a cache (experiments.cache.ResultCache), a run whose agent, env, episodes,
+    seed and code version were seen before is not simulated again: the histories come
+    back as read-only arrays over the cached files and the env and agent are left in their
+    post-run state (plain attributes and RNG states), as if the run had happened.
+    """
+    from .env import DreamEnv
+
+    env = DreamEnv() if env is None else env
+    if seed is not None:
+        _reseed(env, seed)
+        _reseed(agent, seed + 1)
+    key = None
+    if cache is not None and seed is not None:
+        from ..experiments.cache import cache_key, fingerprint, pack_state, unpack_state
+        key = cache_key(kind="run_experiment", agent=fingerprint(agent), env=fingerprint(env),
+                        episodes=episodes, seed=seed)
+        hit = cache.get(key)
+        if hit is not None:
+            arrays, _ = hit
+            unpack_state(arrays["state"], env=env, agent=agent)
+            if verbose:
+                print(f"--- Experiment with {agent.__class__.__name__} loaded from cache ---")
+            return _emit(sink, *(np.asarray(arrays[name]) for name in _HISTORIES))
+
+    rewards, throughputs, drops, mttrs = [], [], [], []
+    if verbose:
+        print(f"--- Running experiment with {agent.__class__.__name__} ---")
+
+    for ep in range(episodes):
+        state = env.reset()
+        done = False
+        ep_reward = 0
+
+        while not done:
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            ep_reward += reward
+
+            if hasattr(agent, 'learn'):
+                agent.learn(state, action, reward, next_state)
+
+            state = next_state
+
+        if hasattr(agent, 'decay_epsilon'):
+            agent.decay_epsilon()
+
+        info = compute_metrics(env)
+        mttr = compute_mttr(env)
+        if sink is not None:
+            sink.append({"episode": ep, "reward": ep_reward, "throughput": info["throughput"],
+                         "drop_rate": info["drop_rate"], "mttr": float(mttr)})
+            if key is None:
+                continue
+        rewards.append(ep_reward)
+        throughputs.append(info["throughput"])
+        drops.append(info["drop_rate"])
+        mttrs.append(mttr)
+
+    if verbose:
+        print(f"--- Experiment with {agent.__class__.__name__} finished. ---")
+    histories = [np.asarray(h, dtype=float) for h in (rewards, throughputs, drops, mttrs)]
+    if key is not None:
+        cache.put(key, dict(zip(_HISTORIES, histories), state=pack_state(env=env, agent=agent)))
+    if sink is not None:
+        sink.flush()
+        return sink
+    return tuple(histories)
+
+
+def _emit(sink, rewards, throughputs, drops, mttrs):
+    if sink is None:
+        return rewards, throughputs, drops, mttrs
+    for ep, row in enumerate(zip(rewards.tolist(), throughputs.tolist(), drops.tolist(), mttrs.tolist())):
+        sink.append(dict(zip(("episode", "reward", "throughput", "drop_rate", "mttr"), (ep, *row))))
+    sink.flush()
+    return sink
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class VecDreamEnv:
+    """
+    N independent copies of DreamEnv stepped together with array operations.
+    Per environment the dynamics match DreamEnv.step: the action may enqueue a job (or
+    drop it when full), the server may fail and then repair within the same step, and a
+    job is served if the server is up. Environments whose episode ends are reset
+    automatically; their final observation and episode stats are returned in `info`.
+    Downtime statistics accumulate across episodes, as DreamEnv.server_down_time does.
+    """
+
+    def __init__(self, num_envs, max_queue=10, fail_prob=0.05, repair_prob=0.2, episode_length=50, seed=None):
+        self.num_envs = num_envs
+        self.max_queue = max_queue
+        self.fail_prob = fail_prob
+        self.repair_prob = repair_prob
+        self.episode_length = episode_length
+        self.rng = np.random.default_rng(seed)
+
+        self.action_space = [0, 1]
+        self.observation_space = (2,)
+
+        self.queue_len = np.zeros(num_envs, dtype=np.int64)
+        self.server_up = np.ones(num_envs, dtype=bool)
+        self.jobs_processed = np.zeros(num_envs, dtype=np.int64)
+        self.jobs_dropped = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.episode_reward = np.zeros(num_envs, dtype=np.int64)
+        self.downtime_start_step = np.full(num_envs, -1, dtype=np.int64)  # -1: server up
+        self.downtime_total = np.zeros(num_envs, dtype=np.int64)
+        self.downtime_count = np.zeros(num_envs, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self):
+        return self._reset(np.ones(self.num_envs, dtype=bool))
+
+    def _reset(self, mask):
+        self.queue_len[mask] = 0
+        self.server_up[mask] = True
+        self.jobs_processed[mask] = 0
+        self.jobs_dropped[mask] = 0
+        self.steps[mask] = 0
+        self.episode_reward[mask] = 0
+        self.downtime_start_step[mask] = -1
+        return self._get_obs()
+
+    def _get_obs(self):
+        return np.stack([self.queue_len, self.server_up], axis=1).astype(np.float32)
+
+    def step(self, actions):
+        """
+        actions: int array of shape (num_envs,), 0 = do nothing, 1 = add one job.
+        Returns (obs, rewards, dones, info) with one row/entry per environment.
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.int64)
+
+        # New job arrives if action == 1; overflow is dropped
+        add = actions == 1
+        dropped = add & (self.queue_len >= self.max_queue)
+        self.queue_len += add & ~dropped
+        self.jobs_dropped += dropped
+        rewards -= dropped
+
+        # Failure, then repair within the same step
+        prev_up = self.server_up.copy()
+        u = self.rng.random((2, self.num_envs))
+        up = prev_up & (u[0] >= self.fail_prob)
+        up |= ~up & (u[1] < self.repair_prob)
+        self.server_up = up
+
+        # Downtime tracking for MTTR
+        failed = prev_up & ~up
+        self.downtime_start_step[failed] = self.steps[failed]
+        recovered = ~prev_up & up & (self.downtime_start_step >= 0)
+        self.downtime_total[recovered] += self.steps[recovered] - self.downtime_start_step[recovered]
+        self.downtime_count += recovered
+        self.downtime_start_step[recovered] = -1
+
+        # Process job if server is up
+        served = up & (self.queue_len > 0)
+        self.queue_len -= served
+        self.jobs_processed += served
+        rewards += served
+
+        self.steps += 1
+        self.episode_reward += rewards
+        dones = self.steps >= self.episode_length
+
+        info = {}
+        if dones.any():
+            info = {
+                "final_obs": self._get_obs()[dones],
+                "episode_reward": self.episode_reward[dones].copy(),
+                "episode_processed": self.jobs_processed[dones].copy(),
+                "episode_dropped": self.jobs_dropped[dones].copy(),
+                "episode_steps": self.steps[dones].copy(),
+            }
+            self._reset(dones)
+        return self._get_obs(), rewards, dones, info
+
+    def mttr(self):
+        """Per-environment mean downtime (steps), 0 where no recovery happened yet."""
+        return np.where(self.downtime_count > 0, self.downtime_total / np.maximum(self.downtime_count, 1), 0.0)
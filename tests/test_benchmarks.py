@@ -0,0 +1,28 @@
+import json
+
+from benchmarks import bench
+
+
+def _result(value, higher):
+    return {"value": value, "unit": "x", "higher_is_better": higher}
+
+
+def test_compare_flags_only_slowdowns_past_threshold():
+    baseline = {"results": {"tput": _result(100.0, True), "lat": _result(10.0, False)}}
+    rows = bench.compare({"tput": _result(70.0, True), "lat": _result(11.0, False)}, baseline, 0.25)
+    by_name = {r[0]: r for r in rows}
+    assert by_name["tput"][4] and abs(by_name["tput"][3] - 0.3) < 1e-12
+    assert not by_name["lat"][4]
+    # faster than the baseline is never a regression
+    rows = bench.compare({"tput": _result(500.0, True), "lat": _result(1.0, False)}, baseline, 0.0)
+    assert not any(r[4] for r in rows)
+
+
+def test_main_gate_exit_status(tmp_path, monkeypatch):
+    monkeypatch.setattr(bench, "BENCHMARKS", {"fake": (lambda: 5.0, "us/call", False)})
+    path = tmp_path / "base.json"
+    assert bench.main(["--repeat", "1", "--save", str(path)]) == 0
+    assert json.loads(path.read_text())["results"]["fake"]["value"] == 5.0
+    assert bench.main(["--repeat", "1", "--compare", str(path)]) == 0
+    monkeypatch.setattr(bench, "BENCHMARKS", {"fake": (lambda: 10.0, "us/call", False)})
+    assert bench.main(["--repeat", "1", "--compare", str(path)]) == 1
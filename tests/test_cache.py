@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.experiments.cache import ResultCache, cache_key
+from src.experiments.sweep import grid, run_sweep, server_cell
+from src.simulator.env import DreamEnv
+from src.simulator.q_agent import QLearningAgent
+from src.simulator.utils import run_experiment
+
+
+def test_put_get_roundtrip_is_memory_mapped(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache_key(params={"lam": 0.5}, seed=1)
+    assert key == cache_key(seed=1, params={"lam": 0.5}) and key != cache_key(params={"lam": 0.5}, seed=2)
+    assert cache.get(key) is None
+    cache.put(key, {"x": np.arange(10.0)}, {"note": "ok"})
+    arrays, extra = cache.get(key)
+    assert isinstance(arrays["x"], np.memmap) and np.array_equal(arrays["x"], np.arange(10.0))
+    assert extra == {"note": "ok"} and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_under_size_cap(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for i in range(3):
+        cache.put(f"k{i}", {"x": np.zeros(1000)})
+        os.utime(os.path.join(str(tmp_path), f"k{i}", "meta.json"), (i, i))
+    cache.get("k0")  # a read makes k0 the most recently used
+    cache.max_bytes = cache.size_bytes() - 1
+    cache.evict()
+    assert "k1" not in cache and "k0" in cache and "k2" in cache
+
+
+def test_put_rescans_only_past_the_size_cap(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), max_bytes=10**9)
+    scans = []
+    entries = ResultCache.entries
+    monkeypatch.setattr(ResultCache, "entries", lambda self: scans.append(1) or entries(self))
+    for i in range(50):
+        cache.put(f"k{i}", {"x": np.zeros(1000)})
+    assert len(scans) == 1  # the first put learns the size, later puts keep a running total
+    cache.max_bytes = cache._bytes - 1
+    cache.put("last", {"x": np.zeros(10)})
+    assert len(scans) == 2 and "k0" not in cache and "last" in cache
+    assert cache._bytes == cache.size_bytes() <= cache.max_bytes
+
+
+def test_run_experiment_hit_leaves_env_and_agent_as_a_real_run(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    def run():
+        env = DreamEnv()
+        agent = QLearningAgent(env.action_space, env)
+        res = run_experiment(agent, 20, env=env, verbose=False, seed=3, cache=cache)
+        return env, agent, res
+
+    e1, a1, r1 = run()
+    e2, a2, r2 = run()
+    assert (cache.hits, cache.misses) == (1, 1)
+    for x, y in zip(r1, r2):  # a miss and a hit return the same kind of array
+        assert type(x) is type(y) is np.ndarray and x.dtype == y.dtype
+        assert np.array_equal(x, y)
+    assert np.array_equal(a1.q_table, a2.q_table) and a1.epsilon == a2.epsilon
+    assert e1.server_down_time == e2.server_down_time and e1.steps == e2.steps
+    # the RNG streams continue where the real run left them
+    assert e1.random.getstate() == e2.random.getstate() and a1.random.getstate() == a2.random.getstate()
+    assert a1.np_rng.bit_generator.state == a2.np_rng.bit_generator.state
+    assert [e1.step(1)[1] for _ in range(50)] == [e2.step(1)[1] for _ in range(50)]
+    assert (e1.queue_len, e1.server_up) == (e2.queue_len, e2.server_up)
+
+
+def test_cache_key_rejects_values_without_a_stable_form():
+    from src.simulator.distributions import Empirical
+    assert cache_key(service=Empirical([1.0, 2.0])) == cache_key(service=Empirical([1.0, 2.0]))
+    with pytest.raises(TypeError):
+        cache_key(params={"fn": lambda x: x})
+    with pytest.raises(TypeError):
+        cache_key(params={"obj": object()})
+
+
+def test_sweep_skips_cached_cells(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    cells = grid(mu=[1.0], lam=[0.3, 0.6], tau=[0.5], horizon=[50.0])
+    first = run_sweep(server_cell, cells, str(tmp_path / "a.jsonl"), replicates=2, workers=1, cache=cache)
+    assert cache.hits == 0
+    again = run_sweep(server_cell, cells, str(tmp_path / "b.jsonl"), replicates=2, workers=1, cache=cache)
+    assert cache.hits == 4
+    assert sorted(map(str, first)) == sorted(map(str, again))
@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from src import cli
+from src.evaluation.sink import read_column
+
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DREAM_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def test_train_and_compare_write_csv(tmp_path):
+    out = str(tmp_path)
+    assert cli.main(["train", "--episodes", "5", "--out-dir", out, "--warm-start"]) == 0
+    assert len(read_column(str(tmp_path / "train_q.csv"), "reward")) == 5
+
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps({"episodes": 3, "max_queue": 4, "compare": {"agents": ["reactive", "dp"]}}))
+    cli.main(["compare", "--config", str(conf), "--out-dir", out, "--episodes", "4"])  # the flag wins
+    assert not (tmp_path / "compare_q.csv").exists()
+    assert np.array_equal(read_column(str(tmp_path / "compare_reactive.csv"), "episode"), np.arange(4))
+    assert (tmp_path / "compare_dp.csv").exists()
+
+
+def test_no_plot_run_skips_heavy_imports(tmp_path):
+    code = ("import sys; from src import cli; "
+            f"cli.main(['train', '--episodes', '2', '--out-dir', {str(tmp_path)!r}]); "
+            "print(sorted(m for m in ('pandas', 'matplotlib', 'scipy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.stdout.strip().splitlines()[-1] == "[]"
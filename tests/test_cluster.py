@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.simulator.cluster import SpeculativeCluster
+
+
+def test_duplicates_run_on_another_replica_and_jobs_are_conserved():
+    c = SpeculativeCluster(4, mu=1.0, lam=3.0, tau=0.5, dispatch="p2c", seed=1)
+    seen = []
+    orig = c._enqueue
+    c._enqueue = lambda i, jid, dup, now: (seen.append((jid, i, dup)), orig(i, jid, dup, now))
+    for _ in range(300):
+        c.step(1.0)
+    home = {jid: i for jid, i, dup in seen if not dup}
+    assert all(home[jid] != i for jid, i, dup in seen if dup)
+    assert c.completions + int((c.j_id >= 0).sum()) == len(home)
+    assert c.speculations > 0 and 0 < c.dup_wins <= c.speculations
+
+
+def test_jsq_beats_round_robin_tail():
+    p99 = {}
+    for policy in ("rr", "jsq"):
+        c = SpeculativeCluster(10, mu=1.0, lam=8.5, tau=2.0, dispatch=policy, seed=0)
+        for _ in range(2000):
+            c.step(1.0)
+        p99[policy] = c.metrics()["lat_p99"]
+    assert p99["jsq"] < p99["rr"]
+
+
+def test_dream_cpu_respects_global_quota():
+    c = SpeculativeCluster(2000, mu=1.0, lam=1000.0, tau=1.0, dream_quota=1.0, seed=0)
+    for _ in range(5):
+        c.step(0.5)
+        assert c.last_dream_time <= 0.5 + 1e-9
+    assert c.idle_budget() == 1.0 and c.quota_capped == 5
+    assert np.isclose(c.last_dream_alloc.sum(), c.last_dream_time)
+
+
+def test_queue_memory_follows_total_jobs_not_longest_queue():
+    c = SpeculativeCluster(2000, mu=1.0, lam=50.0, tau=100.0, dispatch="rr", seed=0)
+    c._choose = lambda exclude=-1: 0 if exclude != 0 else 1  # one hot replica takes every job
+    for _ in range(100):
+        c.step(1.0)
+    assert c.load[0] > 1000
+    assert len(c._qentry) <= 2 * max(1024, int(c._qsize.sum()))
+
+
+def test_jsq_heap_matches_argmin():
+    c = SpeculativeCluster(50, mu=1.0, lam=45.0, tau=0.5, dispatch="jsq", seed=3)
+    for _ in range(20):
+        c.step(1.0)
+        load = c.load.copy()
+        assert c._choose() == int(np.argmin(load))
+        i = int(np.argmin(load))
+        load[i] = np.iinfo(np.int64).max
+        assert c._choose(exclude=i) == int(np.argmin(load))
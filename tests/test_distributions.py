@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from src.simulator.distributions import (Bimodal, Empirical, Exponential, LogNormal, Pareto,
+                                         ServiceDistribution)
+from src.simulator.queue_model import SpeculativeServer
+
+DISTS = [Exponential(2.0), LogNormal(-1.0, 1.2), Pareto(2.2, 0.3), Bimodal(0.8, 0.2, 3.0),
+         Empirical(np.random.default_rng(1).lognormal(0.0, 1.0, 300))]
+
+
+def test_expected_service_tau_matches_sampling():
+    rng = np.random.default_rng(0)
+    tau, n = 0.8, 400_000
+    for d in DISTS:
+        s, s2 = d.sample(rng, n), d.sample(rng, n)
+        eff = np.where(s > tau, tau + np.minimum(s - tau, s2), s)
+        assert abs(d.expected_service_tau(tau) - eff.mean()) < 4 * eff.std() / np.sqrt(n), d
+        assert abs(d.mean() - s.mean()) < 5 * s.std() / np.sqrt(n), d
+
+
+def test_server_rescales_distribution_to_mu():
+    server = SpeculativeServer(mu=2.0, lam=1.0, tau=1.0, service=Pareto(2.5, 1.0))
+    assert np.isclose(server.service.mean(), 0.5)
+    rho = server.estimate_rho_tau()
+    assert rho < server.lam / server.mu  # speculation cuts the heavy tail
+    server.mu = 4.0
+    assert np.isclose(server.service.mean(), 0.25) and server.estimate_rho_tau() < rho
+    server.set_service(Exponential())
+    assert np.isclose(server.estimate_rho_tau(), 1.0 * (1 - 0.5 * np.exp(-4.0)) / 4.0)
+
+
+def test_heavy_tailed_paths_agree():
+    out = []
+    for threshold in (32, 10**9):
+        server = SpeculativeServer(mu=2.0, lam=1.2, tau=1.0, seed=5, batch_threshold=threshold,
+                                   service=LogNormal(0.0, 1.5))
+        server.run_until(2000.0)
+        out.append((server.completions, server.speculations, server.dup_wins))
+    assert out[0] == out[1] and out[0][1] > 0
+
+
+def test_empirical_key_is_stable_across_processes():
+    import os
+    import subprocess
+    import sys
+    code = "from src.simulator.distributions import Empirical; print(repr(Empirical([0.5, 1.0, 2.0], [1, 2, 1])))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    reprs = {subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root,
+                            env={**os.environ, "PYTHONHASHSEED": str(seed)}).stdout for seed in (1, 2)}
+    assert reprs == {repr(Empirical([0.5, 1.0, 2.0], [1, 2, 1])) + "\n"}
+
+
+def test_incomplete_distribution_fails_at_construction():
+    class Uniform(ServiceDistribution):
+        def sample(self, rng, n):
+            return rng.random(n)
+
+        def mean(self):
+            return 0.5
+
+    with pytest.raises(TypeError, match="abstract"):
+        Uniform()
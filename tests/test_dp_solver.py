@@ -0,0 +1,46 @@
+import numpy as np
+
+from src.simulator.dp_solver import DPAgent, policy_iteration, solve_q_table, transition_model, value_iteration
+from src.simulator.env import DreamEnv
+from src.simulator.q_agent import QLearningAgent
+
+
+def test_model_matches_sampled_env_steps():
+    env = DreamEnv(max_queue=3, fail_prob=0.3, repair_prob=0.4, seed=0)
+    P, R = transition_model(3, 0.3, 0.4)
+    n = 4000
+    for q in range(4):
+        for up in (0, 1):
+            for a in (0, 1):
+                counts, total = np.zeros(8), 0.0
+                for _ in range(n):
+                    env.queue_len, env.server_up, env.steps = q, bool(up), 0
+                    obs, r, _, _ = env.step(a)
+                    counts[2 * int(obs[0]) + int(obs[1])] += 1
+                    total += r
+                s = 2 * q + up
+                assert np.abs(counts / n - P[a][s].toarray().ravel()).max() < 0.04
+                assert abs(total / n - R[a, s]) < 0.05
+
+
+def test_value_and_policy_iteration_agree():
+    env = DreamEnv(max_queue=20)
+    P, R = transition_model(env.max_queue, env.fail_prob, env.repair_prob)
+    Qv, _ = value_iteration(P, R, 0.95)
+    Qp, iters = policy_iteration(P, R, 0.95)
+    assert np.abs(Qv - Qp).max() < 1e-8 and iters < 20
+    # Bellman optimality holds for the returned Q
+    V = Qp.max(axis=0)
+    assert np.allclose(Qp, R + 0.95 * np.vstack([Pa @ V for Pa in P]))
+
+    table = solve_q_table(env)
+    agent = QLearningAgent(env.action_space, env, seed=0, q_table=table)
+    assert agent.q_table.shape == table.shape and agent.q_table is not table
+    assert DPAgent(env.action_space, env).act(np.array([0.0, 1.0])) == int(np.argmax(table[0, 1]))
+
+
+def test_large_queue_solves_sparse():
+    env = DreamEnv(max_queue=50000)
+    table = solve_q_table(env)
+    assert table.shape == (50001, 2, 2)
+    assert np.all(np.isfinite(table))
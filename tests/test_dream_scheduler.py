@@ -0,0 +1,33 @@
+from src.evaluation.metrics import summarize
+from src.scheduler.dream_scheduler import DreamScheduler
+from src.simulator.queue_model import SpeculativeServer
+
+
+def test_scheduler_spends_only_granted_idle_time_and_preempts():
+    server = SpeculativeServer(mu=1.0, lam=0.6, tau=0.5, seed=0)
+    sched = DreamScheduler(server, n_workers=2)
+    history = sched.run(episodes=300, dt=1.0)
+    rep = sched.report()["scenarios"]
+    assert abs(sum(r["cpu_secs"] for r in rep.values()) - server.dream_cpu_secs) < 1e-6
+    assert sum(r["completed"] for r in rep.values()) > 0
+    assert sum(r["preemptions"] for r in rep.values()) > 0
+    summarize(history)
+
+
+def test_arrival_mid_tick_preempts_running_dream():
+    import numpy as np
+    from src.simulator.faults import SCENARIOS
+    from src.simulator.trace import TraceWorkload
+
+    # one job arriving at t=4 and served for 1s: idle gaps (0, 4) and (5, 10) in the first tick
+    trace = TraceWorkload(np.array([4.0]), np.array([1.0]), np.array([1.0]), start=4.0)
+    server = SpeculativeServer(mu=1.0, lam=0.1, tau=10.0, seed=0, workload=trace)
+    sched = DreamScheduler(server, scenarios=SCENARIOS[:1], n_workers=1, dream_cost=100.0)
+    out = sched.tick(10.0)
+    assert server.q_len == 0 and server.last_idle_gaps == [(0.0, 4.0), (5.0, 10.0)]
+    share = server.last_dream_time / 9.0
+    # the dream started in the first gap was cut at t=4; a fresh one ran through the second gap
+    assert out["preempted"] == 1 and sched.started[0] == 2
+    full = SCENARIOS[0].duration * sched.dream_cost
+    assert np.isclose(sched.workers[0][1], full - 5.0 * share)
+    assert np.isclose(sched.cpu_secs[0], server.last_dream_time)
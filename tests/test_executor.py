@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import wait
+
+import pytest
+
+from src.scheduler.dream_scheduler import DreamScheduler
+from src.scheduler.executor import DreamExecutor
+from src.simulator.faults import FaultScenario
+from src.simulator.queue_model import SpeculativeServer
+
+
+def test_preempt_stops_running_dream_within_bound():
+    server = SpeculativeServer(mu=1.0, lam=0.9, tau=0.5, seed=0)
+    # the fault outlasts the test, so the dream cannot recover and finish on its own
+    ex = DreamExecutor(workers=1, preempt_timeout=0.5, horizon_factor=10.0, substeps=10**7)
+    try:
+        ex._pool.submit(os.getpid).result(timeout=30)  # block until the worker is up
+        fut = ex.submit(server.snapshot(), FaultScenario("long", duration=1e6, severity=0.9), tag=0)
+        _, not_done = wait([fut], timeout=0.2)  # let it get going without spinning
+        assert not_done and ex.busy()
+        latency = ex.preempt()
+        assert latency < 0.5 and ex.overruns == 0
+        [(tag, res)] = ex.poll()
+        assert tag == 0 and (res is None or res["cancelled"])
+    finally:
+        ex.shutdown()
+
+
+def test_overrunning_dream_is_killed_through_its_reported_pid():
+    server = SpeculativeServer(mu=1.0, lam=0.9, tau=0.5, seed=0)
+    # a single substep simulates 1e7 s event by event: no safe point for a long while
+    ex = DreamExecutor(workers=1, preempt_timeout=0.05, horizon_factor=10.0, substeps=1)
+    try:
+        ex._pool.submit(os.getpid).result(timeout=30)
+        [pid] = ex._worker_pids()
+        fut = ex.submit(server.snapshot(), FaultScenario("long", duration=1e6, severity=0.9), tag=0)
+        _, not_done = wait([fut], timeout=0.2)
+        assert not_done
+        assert ex.preempt() < 5.0 and ex.overruns == 1
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+        assert ex.poll() == [(0, None)]
+        assert ex._pool.submit(os.getpid).result(timeout=30) != pid  # a fresh pool took over
+    finally:
+        ex.shutdown()
+
+def test_scheduler_runs_real_dreams_and_reports_interference():
+    server = SpeculativeServer(mu=1.0, lam=0.3, tau=0.5, seed=0)
+    ex = DreamExecutor(workers=1, substeps=20)
+    try:
+        sched = DreamScheduler(server, executor=ex)
+        sched.run(episodes=200, dt=1.0)
+        rep = sched.report()
+        assert sum(r["started"] for r in rep["scenarios"].values()) > 0
+        fg = rep["interference"]
+        assert ex.fg_step_dreaming.count + ex.fg_step_quiet.count == 200
+        assert "added_step_p99" in fg and fg["fg_step_p99_quiet"] > 0
+    finally:
+        ex.shutdown()
@@ -0,0 +1,47 @@
+import numpy as np
+
+from src.simulator.fault_engine import FaultSchedule, RateProfile
+from src.simulator.faults import SCENARIOS, FaultScenario
+from src.simulator.queue_model import SpeculativeServer
+
+
+def test_rate_profile_integral_and_inverse():
+    p = RateProfile([1.0, 2.0], [1.0, 0.0, 2.0])  # full speed, stalled, double speed
+    assert p.integral(0.0, 3.0) == 3.0
+    assert p.advance(0.5, 1.0) == 2.25   # 0.5 done before the stall, the rest at rate 2
+    assert p.advance(1.2, 0.0) == 1.2
+
+
+def test_schedule_active_lookup():
+    crash = FaultScenario("crash", duration=1.0, severity=0.5, kind="node_crash")
+    spike = FaultScenario("spike", duration=2.0, severity=0.5, kind="load_spike")
+    fs = FaultSchedule.from_events([(5.0, spike), (2.0, crash)])
+    assert list(fs.starts) == [2.0, 5.0] and list(fs.ends) == [3.0, 7.0]
+    assert fs.active(2.5) and not fs.active(3.5) and fs.active(6.9)
+    assert fs.overlaps(3.5, 5.0) and not fs.overlaps(3.1, 4.9)
+    assert fs.mu.value(2.5) == 0.5 and fs.lam.value(6.0) == 2.0 and fs.mu.value(6.0) == 1.0
+
+
+def test_faults_record_recoveries_and_paths_agree():
+    fs = FaultSchedule.poisson(SCENARIOS, rate=0.05, horizon=1000.0, seed=1)
+    out = []
+    for threshold in (32, 10**9):  # vectorized windows vs pure event loop
+        server = SpeculativeServer(mu=2.0, lam=1.2, tau=1.0, seed=3, batch_threshold=threshold, faults=fs)
+        for _ in range(1000):
+            server.step(1.0)
+        out.append((server.completions, server.speculations, server.q_len,
+                    len(server.failures), np.round(server.recoveries, 9).tolist()))
+    assert out[0] == out[1]
+    assert out[0][3] == len(fs) and len(out[0][4]) > 0
+    assert all(r >= f for r, f in zip(server.recoveries, server.failures))
+    assert server.mttr() > 0
+
+
+def test_node_crash_hurts_more_than_no_fault():
+    crash = FaultScenario("crash", duration=20.0, severity=0.9, kind="node_crash")
+    lat = []
+    for faults in (None, FaultSchedule.from_events([(10.0, crash)])):
+        server = SpeculativeServer(mu=2.0, lam=1.0, tau=1.0, seed=0, faults=faults)
+        server.run_until(60.0)
+        lat.append(server.latency.quantile(0.99))
+    assert lat[1] > lat[0]
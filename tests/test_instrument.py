@@ -0,0 +1,52 @@
+import json
+
+from src.evaluation import instrument
+from src.simulator.env import DreamEnv
+from src.simulator.q_agent import QLearningAgent
+from src.simulator.queue_model import SpeculativeServer
+
+
+def test_phase_timers_count_work_and_uninstall(tmp_path):
+    orig_step = SpeculativeServer.step
+    instrument.enable("timers")
+    try:
+        instrument.reset()
+        assert SpeculativeServer.step is not orig_step
+        server = SpeculativeServer(mu=1.0, lam=0.7, tau=1.0, seed=0, batch_threshold=0)
+        for _ in range(50):
+            server.step(10.0)
+        env = DreamEnv(seed=0)
+        agent = QLearningAgent(env.action_space, env, seed=0)
+        state = env.reset()
+        for _ in range(20):
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            agent.learn(state, action, reward, next_state)
+            state = next_state
+        with instrument.section("script.setup"):
+            pass
+    finally:
+        instrument.disable()
+    assert SpeculativeServer.step is orig_step
+
+    stats = instrument.stats()
+    assert stats["server.step"]["calls"] == 50
+    assert stats["server.step"]["items"] == server.completions
+    assert stats["server.drain"]["items"] == server.completions
+    assert stats["server.arrivals"]["items"] >= server.completions
+    assert stats["server.budget"]["calls"] == 50
+    assert stats["env.step"]["calls"] == stats["agent.act"]["calls"] == stats["agent.learn"]["calls"] == 20
+    assert stats["script.setup"]["calls"] == 1
+
+    paths = instrument.export(str(tmp_path), "run")
+    with open(tmp_path / "run_phases.json") as f:
+        assert json.load(f)["phases"]["env.step"]["calls"] == 20
+    assert str(tmp_path / "run_phases.csv") in paths
+
+
+def test_disabled_section_and_count_are_noops():
+    instrument.disable()
+    instrument.reset()
+    with instrument.section("nothing"):
+        instrument.count("nothing")
+    assert "nothing" not in instrument.stats()
@@ -0,0 +1,95 @@
+import asyncio
+
+from src.scheduler import executor
+from src.scheduler.budget import TokenBucket
+from src.scheduler.live import LiveGateway
+
+STEP_COST, SETUP_COST = 0.0005, 0.003  # virtual seconds per dream substep / per dream setup
+SLICE = 0.002
+
+
+class _VirtualSelector:
+    """Wraps the loop's selector: a wait for `timeout` jumps the virtual clock instead."""
+    def __init__(self, loop, selector):
+        self.loop, self.selector = loop, selector
+
+    def select(self, timeout=None):
+        if timeout:
+            self.loop.now += timeout
+        return self.selector.select(0)
+
+    def __getattr__(self, name):
+        return getattr(self.selector, name)
+
+
+class _VirtualTimeLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self._selector = _VirtualSelector(self, self._selector)
+
+    def time(self):
+        return self.now
+
+
+def _costly_dreams(monkeypatch, loop, counts):
+    """Dream work advances the virtual clock: SETUP_COST per dream, STEP_COST per substep."""
+    init, step = executor.Dream.__init__, executor.Dream.step
+
+    def costly_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        loop.now += SETUP_COST
+        counts["setup"] += 1
+
+    def costly_step(self):
+        step(self)
+        loop.now += STEP_COST
+        counts["step"] += 1
+
+    monkeypatch.setattr(executor.Dream, "__init__", costly_init)
+    monkeypatch.setattr(executor.Dream, "step", costly_step)
+
+
+def test_token_bucket_refills_at_rate_and_carries_debt():
+    now = [0.0]
+    bucket = TokenBucket(rate=0.5, capacity=1.0, clock=lambda: now[0])
+    assert bucket.try_take(1.0) and not bucket.try_take(0.1)
+    now[0] = 1.0
+    assert abs(bucket.tokens - 0.0) < 1e-12 and bucket.try_take(0.5)
+    bucket.charge(0.25)  # the work overran its reservation
+    assert abs(bucket.wait_time(0.5) - 1.5) < 1e-12
+    bucket.set_rate(0.0)
+    assert bucket.wait_time(0.5) == float("inf")
+    now[0] = 100.0
+    bucket.set_rate(1.0)
+    now[0] = 200.0
+    assert bucket.try_take(1.0) and not bucket.try_take(0.5)  # capped at capacity
+
+
+def _virtual_runs(monkeypatch, duration=2.0):
+    loop, counts = _VirtualTimeLoop(), {"setup": 0, "step": 0}
+    _costly_dreams(monkeypatch, loop, counts)
+    gw = LiveGateway(lam=40.0, mean_service=0.01, workers=2, beta=0.3, burst=0.02, dream_slice=SLICE,
+                     seed=1, clock=loop.time)
+    try:
+        quiet = loop.run_until_complete(gw.run(duration, dreaming=False))
+        dream = loop.run_until_complete(gw.run(duration, dreaming=True))
+    finally:
+        loop.close()
+        monkeypatch.undo()
+    return quiet, dream, counts
+
+
+def test_gateway_dreams_only_within_budget_on_virtual_time(monkeypatch):
+    quiet, dream, counts = _virtual_runs(monkeypatch)
+    assert quiet["requests"] == dream["requests"] > 0  # same arrival sequence
+    assert quiet["dream_cpu_secs"] == 0 and counts["setup"] == dream["dreams_started"] > 0
+    # every virtual second of dream work, setup included, is accounted and paid for
+    spent = counts["setup"] * SETUP_COST + counts["step"] * STEP_COST
+    assert abs(dream["dream_cpu_secs"] - spent) < 1e-9
+    # within what the bucket can hand out: budget plus burst, plus one slice and one setup of overrun
+    assert dream["dream_cpu_secs"] <= 0.3 * dream["wall_secs"] + 0.02 + SLICE + SETUP_COST + STEP_COST
+    assert dream["dreams_completed"] + dream["preemptions"] <= dream["dreams_started"]
+    assert 0 < quiet["fg_p50"] <= quiet["fg_p99"] and dream["fg_p99"] >= quiet["fg_p99"]
+    # virtual time makes the whole run reproducible
+    assert _virtual_runs(monkeypatch)[1] == dream
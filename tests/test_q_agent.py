@@ -0,0 +1,30 @@
+import numpy as np
+
+from src.rl.replay import ReplayBuffer
+from src.simulator.env import DreamEnv
+from src.simulator.q_agent import QLearningAgent
+from src.simulator.vec_env import VecDreamEnv
+
+
+def test_learn_batch_accumulates_duplicate_transitions():
+    env = DreamEnv()
+    agent = QLearningAgent(env.action_space, env, learning_rate=0.5, discount_factor=0.0)
+    s = np.array([[3, 1], [3, 1]])
+    agent.learn_batch(s, [1, 1], [1.0, 1.0], s)
+    assert agent.q_table[3, 1, 1] == 0.75  # same as two sequential updates
+
+
+def test_batched_training_with_replay_learns_to_add_jobs_when_up():
+    venv = VecDreamEnv(256, seed=0)
+    agent = QLearningAgent(venv.action_space, venv, seed=0)
+    buffer = ReplayBuffer(10000)
+    obs = venv.reset()
+    for _ in range(2000):
+        actions = agent.act_batch(obs)
+        next_obs, rewards, _, _ = venv.step(actions)
+        buffer.add_batch(obs, actions, rewards, next_obs)
+        agent.learn_from_replay(buffer, 256)
+        agent.decay_epsilon()
+        obs = next_obs
+    agent.epsilon = 0.0
+    assert (agent.act_batch(np.array([[0, 1], [2, 1]])) == 1).all()
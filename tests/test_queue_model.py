@@ -1,3 +1,6 @@
+import numpy as np
+
+from src.simulator.events import FAILURE
 from src.simulator.queue_model import SpeculativeServer
 
 def test_idle_budget_increases_when_load_decreases():
@@ -6,3 +9,120 @@ def test_idle_budget_increases_when_load_decreases():
     s2 = SpeculativeServer(mu=1.0, lam=0.4, tau=0.5, beta=0.3, seed=1)
     b2 = s2.idle_budget()
     assert b2 >= b1
+
+
+def test_analytic_rho_tau_matches_monte_carlo():
+    s = SpeculativeServer(mu=1.0, lam=0.6, tau=0.5, seed=3)
+    rho = s.estimate_rho_tau()
+    lo, hi = s.rho_tau_ci(samples=20000, mode="mc", confidence=0.999)
+    assert lo <= rho <= hi
+
+
+def test_rho_tau_cache_follows_parameter_changes():
+    s = SpeculativeServer(mu=1.0, lam=0.6, tau=0.5)
+    r1 = s.estimate_rho_tau()
+    s.tau = 2.0
+    assert s.estimate_rho_tau() != r1
+    s.invalidate_rho_cache()
+    assert not s._rho_cache
+
+
+def test_effective_service_batch_is_reproducible_and_masks_speculation():
+    a = SpeculativeServer(mu=1.0, lam=0.6, tau=0.5, seed=7)
+    b = SpeculativeServer(mu=1.0, lam=0.6, tau=0.5, seed=7)
+    eff_a, spec_a = a.effective_service_batch(1000)
+    eff_b, spec_b = b.effective_service_batch(1000)
+    assert (eff_a == eff_b).all() and (spec_a == spec_b).all()
+    assert (eff_a[~spec_a] <= 0.5).all() and (eff_a[spec_a] > 0.5).all()
+
+
+def test_event_core_records_sojourn_times():
+    # at light load queueing is negligible, so mean sojourn ≈ E[S_τ]
+    s = SpeculativeServer(mu=1.0, lam=0.02, tau=0.5, seed=2)
+    s.run_until(100000.0)
+    assert s.completions > 1500
+    assert abs(s.latency.mean - s.expected_service_tau()) < 0.05
+
+
+def test_failure_restarts_or_hands_off_to_duplicate():
+    s = SpeculativeServer(mu=1.0, lam=2.0, tau=0.5, seed=4)
+    for t in range(200):
+        s.step(0.5, inject_failure=(t % 10 == 0))
+    assert len(s.failures) == 20
+    assert s.metrics()["completions"] > 0
+
+
+def test_vectorized_window_drain_matches_event_loop():
+    runs = []
+    for threshold in (10**9, 1):
+        s = SpeculativeServer(mu=1.0, lam=1.5, tau=0.5, seed=5, batch_threshold=threshold)
+        windowed = []
+        for _ in range(200):
+            s.step(5.0)
+            windowed.append(s.latency_window.quantiles([0.5, 0.99], s.time))
+        runs.append((s.completions, s.speculations, s.dup_wins, len(s.queue), s.latency.sum, windowed))
+    assert runs[0][:4] == runs[1][:4]
+    assert np.isclose(runs[0][4], runs[1][4])
+    # departures land in their own window slices, not at the end of the drained window
+    assert np.allclose(runs[0][5], runs[1][5])
+
+
+def test_tau_change_applies_from_the_next_service_start():
+    runs = []
+    for threshold in (10**9, 1):
+        s = SpeculativeServer(mu=1.0, lam=0.9, tau=0.5, seed=8, batch_threshold=threshold)
+        for i in range(400):
+            s.tau = (0.3, 2.0, 0.8)[i % 3]  # mid-job, as TauTuner does between windows
+            s.step(5.0)
+        runs.append((s.completions, s.speculations, s.dup_wins, s.q_len, s.latency.sum))
+    assert runs[0][:4] == runs[1][:4]
+    assert np.isclose(runs[0][4], runs[1][4])
+
+
+def test_drained_windows_do_not_leak_stale_events():
+    s = SpeculativeServer(mu=10.0, lam=8.0, tau=0.2, seed=0)
+    s.inject_failure(1e9)
+    for _ in range(5000):
+        s.step(5.0)
+    assert s.completions > 150000
+    assert len(s.events) <= 4  # pending arrival, in-service job, far-off failure
+    assert s.events.times_of(FAILURE) == [1e9]
+
+
+def test_job_queue_wraps_and_grows():
+    from src.simulator.job_queue import JobQueue
+    q = JobQueue(capacity=4)
+    for i in range(3):
+        q.append(i, 0.0, 0.0)
+    q.drop(2)
+    q.extend(np.arange(3, 8), np.zeros(5), np.zeros(5))
+    q.appendleft(-1, 0.0, 0.0)
+    assert len(q) == 7
+    assert q.head(7)[0].tolist() == [-1, 2, 3, 4, 5, 6, 7]
+    assert q.popleft()[0] == -1
+
+
+def test_fork_replays_parent_future_and_is_copy_on_write():
+    s = SpeculativeServer(mu=1.0, lam=1.2, tau=0.5, seed=6)
+    s.run_until(500.0)
+    backlog = len(s.queue)
+    child = s.fork()
+    s.run_until(600.0)
+    child.run_until(600.0)
+    assert (child.completions, child.speculations, child.q_len) == (s.completions, s.speculations, s.q_len)
+    other = s.fork(seed=1)
+    other.queue.extend(np.zeros(5), np.ones(5), np.ones(5))
+    assert len(s.queue) != len(other.queue) or backlog == 0
+    assert child.latency.count < s.latency.count  # forks do not carry the latency history
+
+
+def test_dream_env_fork_continues_random_stream():
+    from src.simulator.env import DreamEnv
+    env = DreamEnv(seed=3)
+    for _ in range(20):
+        env.step(1)
+    child = env.fork()
+    n_before = len(env.server_down_time)
+    a = [env.step(1)[1] for _ in range(20)]
+    b = [child.step(1)[1] for _ in range(20)]
+    assert a == b and child.server_down_time == env.server_down_time[n_before:]
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.evaluation.metrics import MEDIAN_ACCURACY, _median, mttr_proxy, summarize
+from src.evaluation.sink import MetricsSink, iter_chunks, load
+
+
+def _history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = rng.exponential(1.0, n)
+    lat[[5, 6, 7, 20, 21, 40]] = 9.0  # incidents, some straddling chunk boundaries
+    lat[:3] = np.nan
+    return [{"lat_p50": float(x / 2), "lat_p95": float(x), "lat_p99": float(2 * x), "rho_tau_est": 0.5,
+             "idle_budget": 0.1, "dream_cpu_secs": float(i), "reward": i % 3, "action": i % 2}
+            for i, x in enumerate(lat)]
+
+
+@pytest.mark.parametrize("name", ["hist", "hist.csv"])
+def test_sink_chunks_reopen_and_widen(tmp_path, name):
+    path = str(tmp_path / name)
+    with MetricsSink(path, chunk=4) as sink:
+        for i in range(10):
+            sink.append({"step": i, "value": i * 0.5})
+        assert sink.rows_flushed == 8 and len(sink) == 10
+    sink = MetricsSink(path, chunk=4)  # appends after the stored rows
+    sink.append({"step": 10, "value": 2.5})
+    sink.append({"step": 11.5, "value": 3.0})  # widens the int column
+    sink.close()
+    df = load(path)
+    assert len(df) == 12 and df["step"].iloc[-1] == 11.5
+    assert np.allclose(df["value"].to_numpy()[:10], np.arange(10) * 0.5)
+    if name == "hist":
+        assert sum(1 for _ in iter_chunks(path)) == 4
+    assert len(load(MetricsSink(path, overwrite=True))) == 0
+
+
+def test_streamed_summaries_match_in_memory(tmp_path):
+    history = _history(50)
+    df, expected = summarize(history)
+    sink = MetricsSink(str(tmp_path / "h"), chunk=6)
+    sink.extend(history)
+    assert summarize(sink)[0] is None
+    streamed = summarize(sink)[1]
+    exact = ["mean", "max", "min"]
+    pd.testing.assert_frame_equal(streamed.loc[exact], expected.loc[exact])
+    # the median comes from a sketch: within its relative accuracy, in bounded memory
+    assert np.allclose(streamed.loc["50%"], expected.loc["50%"], rtol=2 * MEDIAN_ACCURACY, equal_nan=True)
+    assert mttr_proxy(sink) == mttr_proxy(df) == mttr_proxy(str(tmp_path / "h")) > 0
+
+
+def test_streamed_median_handles_signs_and_nan(tmp_path):
+    x = np.array([-3.0, -1.0, np.nan, 0.0, 2.0, 5.0, -2.0, 4.0])
+    for sign in (1, -1):
+        sink = MetricsSink(str(tmp_path / f"m{sign}"), chunk=3)
+        sink.extend({"v": sign * v} for v in x)
+        assert np.isclose(_median(sink, "v"), sign * np.nanmedian(x), rtol=2 * MEDIAN_ACCURACY, atol=1e-9)
+
+
+def test_in_memory_mttr_uses_the_exact_median():
+    rng = np.random.default_rng(1)
+    lat = rng.exponential(1.0, 101)
+    i = int(np.argmax(lat))  # stays above the median, which is left unchanged
+    lat[i] = 1.5 * np.median(lat) * (1 - 1e-5)  # just under the incident threshold
+    df = pd.DataFrame({"lat_p95": lat})
+    above = lat > 1.5 * np.nanmedian(lat)
+    d = np.diff(np.concatenate(([0], above.astype(int), [0])))
+    expected = float(np.mean(np.flatnonzero(d == -1) - np.flatnonzero(d == 1)))
+    assert mttr_proxy(df) == mttr_proxy(df.to_dict("records")) == expected
+    assert _median(df, "lat_p95") == np.median(lat)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.evaluation.sketch import DDSketch, SlidingWindowSketch
+
+
+def test_ddsketch_quantiles_within_relative_accuracy():
+    xs = np.random.default_rng(0).lognormal(0.0, 1.5, size=50000)
+    sk = DDSketch(relative_accuracy=0.01)
+    sk.add_batch(xs[:25000])
+    for x in xs[25000:]:
+        sk.add(x)
+    qs = [0.5, 0.95, 0.99]
+    exact = np.quantile(xs, qs)
+    assert np.all(np.abs(sk.quantiles(qs) - exact) <= 0.011 * exact)
+
+
+def test_ddsketch_merge_matches_single_sketch_and_is_bounded():
+    xs = np.random.default_rng(1).exponential(1.0, size=20000)
+    whole = DDSketch(max_buckets=256)
+    whole.add_batch(xs)
+    parts = [DDSketch(max_buckets=256) for _ in range(4)]
+    for p, chunk in zip(parts, np.array_split(xs, 4)):
+        p.add_batch(chunk)
+    merged = parts[0]
+    for p in parts[1:]:
+        merged.merge(p)
+    assert merged.count == whole.count
+    assert np.allclose(merged.quantiles([0.5, 0.99]), whole.quantiles([0.5, 0.99]))
+    assert len(merged._counts) <= 256
+
+
+def test_sliding_window_forgets_old_values():
+    w = SlidingWindowSketch(window=10.0, slices=5)
+    w.add_batch(np.full(100, 5.0), t=1.0)
+    w.add_batch(np.full(100, 1.0), t=25.0)
+    assert np.isclose(w.quantiles([0.99], t=25.0)[0], 1.0, rtol=0.02)
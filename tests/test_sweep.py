@@ -0,0 +1,13 @@
+from src.experiments.sweep import grid, load_results, run_sweep, server_cell
+
+
+def test_sweep_writes_incrementally_and_resumes(tmp_path):
+    out = str(tmp_path / "sweep.jsonl")
+    cells = grid(mu=[1.0], lam=[0.3, 0.6], tau=[0.5], horizon=[50.0])
+    first = run_sweep(server_cell, cells[:1], out, replicates=2, workers=1)
+    assert len(first) == 2
+    records = run_sweep(server_cell, cells, out, replicates=2, workers=2)
+    assert len(records) == 4 and len(load_results(out)) == 4
+    # the resumed cells kept their original results and streams
+    rerun = run_sweep(server_cell, cells[:1], str(tmp_path / "fresh.jsonl"), replicates=2, workers=1)
+    assert [r["result"] for r in rerun] == [r["result"] for r in first]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.simulator.queue_model import SpeculativeServer
+from src.simulator.trace import TraceWorkload, replay, synthetic_trace, write_trace
+
+
+def test_trace_is_memory_mapped_and_chunked(tmp_path):
+    synthetic_trace(str(tmp_path), n=5000, lam=1.0, mu=2.0, chunk=1000, seed=0)
+    wl = TraceWorkload.open(str(tmp_path), chunk=700)
+    assert isinstance(wl.arrivals, np.memmap) and len(wl) == 5000
+    first = wl.pop()
+    assert first[0] == 0.0  # rebased to start at 0
+    got = wl.pop_until(100.0)
+    assert np.all(got[0] <= 100.0) and wl.pop()[0] > 100.0
+    assert np.all(np.diff(got[0]) >= 0)
+
+
+def test_replay_matches_between_event_and_vectorized_paths(tmp_path):
+    synthetic_trace(str(tmp_path), n=3000, lam=1.5, mu=2.0, seed=1)
+    out = []
+    for threshold in (32, 10**9):
+        wl = TraceWorkload.open(str(tmp_path), chunk=512)
+        server = SpeculativeServer(mu=2.0, lam=wl.rate(), tau=1.0, workload=wl, batch_threshold=threshold)
+        stats = replay(server, window=5.0)
+        out.append((server.completions, server.speculations, server.dup_wins))
+        assert stats["events"] >= 2 * 3000 - 1 and stats["events_per_sec"] > 0
+    assert out[0] == out[1] and out[0][0] == 3000
+
+
+def test_trace_durations_drive_latency(tmp_path):
+    # two jobs, no queueing: sojourn times are exactly the recorded service times
+    write_trace(str(tmp_path), arrivals=[100.0, 110.0], service=[0.5, 2.0], duplicate=[9.0, 9.0])
+    server = SpeculativeServer(mu=1.0, lam=0.1, tau=5.0, workload=TraceWorkload.open(str(tmp_path)))
+    server.run_until(20.0)
+    assert server.completions == 2
+    assert server.latency.min == 0.5 and server.latency.max == 2.0
+    fork = server.fork()
+    assert fork.workload.pos == server.workload.pos
+
+
+def test_replay_swaps_a_poisson_server_onto_a_trace(tmp_path):
+    synthetic_trace(str(tmp_path), n=500, lam=1.0, mu=2.0, seed=2)
+    server = SpeculativeServer(mu=2.0, lam=1.0, tau=1.0, seed=0)
+    server.run_until(50.0)
+    backlog, done = server.q_len, server.completions
+    assert server.next_arrival_time is not None
+    replay(server, window=5.0, workload=TraceWorkload.open(str(tmp_path), start=60.0))
+    # the pending Poisson arrival is dropped: the backlog and the trace's jobs, nothing else
+    assert server.completions == done + backlog + 500
+    assert server.next_arrival_time is None and server.q_len == 0
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from src.scheduler.tuner import TauTuner
+from src.simulator.distributions import LogNormal
+from src.simulator.queue_model import SpeculativeServer
+
+
+def test_tuner_converges_within_budget_and_logs(tmp_path):
+    server = SpeculativeServer(mu=1.0, lam=0.5, tau=4.0, seed=0, service=LogNormal(0.0, 1.5))
+    log_path = tmp_path / "tuner.jsonl"
+    tuner = TauTuner(server, max_windows=12, window=30.0, log_path=str(log_path))
+    tuner.run(15)
+    assert tuner.converged
+    tau, beta = tuner.best()
+    assert all(e["tau"] == tau and e["decision"] == "frozen" for e in tuner.log[12:])
+    assert server.tau == tau and server.beta == beta
+    assert len(log_path.read_text().splitlines()) == 15
+    assert json.loads(log_path.read_text().splitlines()[0])["decision"] == "sweep"
+
+
+def test_budget_floor_rules_out_cpu_hungry_taus():
+    # low-variance service: early duplicates mostly burn CPU
+    server = SpeculativeServer(mu=1.0, lam=0.6, tau=4.0, seed=0, service=LogNormal(0.0, 0.3))
+    tuner = TauTuner(server, budget_floor=0.1, window=30.0)
+    mask, rows = tuner.feasible()
+    assert list(mask) == [False, False, True, True, True, True]
+    tuner.run(8)
+    assert all(e["tau"] >= tuner.taus[2] and e["budget_model"] >= 0.1 for e in tuner.log)
+
+
+def test_window_must_fit_the_servers_latency_window():
+    server = SpeculativeServer(mu=1.0, lam=0.5, tau=1.0, seed=0, latency_window=60.0)
+    assert TauTuner(server).window == server.latency_window.span == 50.0
+    with pytest.raises(ValueError):
+        TauTuner(server, window=60.0)
+
+
+def test_model_moments_are_computed_once_per_bucket(monkeypatch):
+    server = SpeculativeServer(mu=1.0, lam=0.5, tau=1.0, seed=0, service=LogNormal(0.0, 1.0))
+    tuner = TauTuner(server, window=10.0)
+    calls = []
+    quad = type(server.service).expected_service_tau
+    monkeypatch.setattr(type(server.service), "expected_service_tau",
+                        lambda self, tau: calls.append(tau) or quad(self, tau))
+    for _ in range(3):
+        tuner.feasible()
+    assert len(calls) == len(tuner.taus)
+    server.mu = 2.0  # a new service model has new moments
+    tuner.feasible()
+    assert len(calls) == 2 * len(tuner.taus)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.simulator.env import DreamEnv
+from src.simulator.vec_env import VecDreamEnv
+
+
+def test_vec_env_matches_dream_env_statistics():
+    n, episodes = 2000, 1
+    venv = VecDreamEnv(n, seed=0)
+    venv.reset()
+    total = np.zeros(n)
+    for _ in range(50 * episodes):
+        _, rewards, dones, info = venv.step(np.ones(n, dtype=int))
+        total += rewards
+    assert dones.all() and (info["episode_reward"] == total).all()
+
+    env = DreamEnv(seed=0)
+    scalar = []
+    for _ in range(n):
+        env.reset()
+        done, ep = False, 0
+        while not done:
+            _, r, done, _ = env.step(1)
+            ep += r
+        scalar.append(ep)
+    assert abs(total.mean() - np.mean(scalar)) < 4 * np.std(scalar) / np.sqrt(n)
+
+
+def test_vec_env_auto_resets_finished_envs():
+    venv = VecDreamEnv(3, fail_prob=0.0, episode_length=2, seed=1)
+    venv.step([1, 1, 0])
+    obs, rewards, dones, info = venv.step([1, 0, 0])
+    assert dones.all() and (obs == [0, 1]).all()
+    assert info["episode_processed"].tolist() == [2, 1, 0]